@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Competition, CompetitionEvent
+from .models import Competition, CompetitionEvent, SyncRun
 
 
 @admin.register(CompetitionEvent)
@@ -30,11 +30,19 @@ class CompetitionEventAdmin(admin.ModelAdmin):
 
 @admin.register(Competition)
 class CompetitionAdmin(admin.ModelAdmin):
-    list_display = ['title', 'event', 'kaggle_competition_id', 'status', 'start_date', 'end_date', 'participants_count']
-    list_filter = ['status', 'event', 'start_date']
+    list_display = [
+        'title', 'event', 'kaggle_competition_id', 'status', 'start_date', 'end_date', 'participants_count',
+        'sync_breaker_state', 'sync_failure_count'
+    ]
+    list_filter = ['status', 'event', 'start_date', 'sync_breaker_state']
     search_fields = ['title', 'kaggle_competition_id']
     ordering = ['-start_date']
-    readonly_fields = ['participants_count', 'created_at', 'updated_at']
+    readonly_fields = [
+        'participants_count', 'leaderboard_checked_at', 'leaderboard_changed_at', 'next_sync_at',
+        'sync_failure_count', 'sync_breaker_state', 'sync_retry_at', 'last_sync_error',
+        'created_at', 'updated_at'
+    ]
+    actions = ['reset_sync_breaker']
     
     fieldsets = (
         ('Event Assignment', {
@@ -52,4 +60,50 @@ class CompetitionAdmin(admin.ModelAdmin):
         ('Statistics', {
             'fields': ('participants_count', 'created_at', 'updated_at')
         }),
+        ('Leaderboard Sync', {
+            'fields': ('leaderboard_checked_at', 'leaderboard_changed_at', 'sync_interval_seconds', 'next_sync_at')
+        }),
+        ('Sync Failures', {
+            'fields': ('sync_breaker_state', 'sync_failure_count', 'sync_retry_at', 'last_sync_error')
+        }),
     )
+    
+    @admin.action(description='Reset sync circuit breaker (retry now)')
+    def reset_sync_breaker(self, request, queryset):
+        for competition in queryset:
+            competition.reset_sync_breaker()
+        self.message_user(request, f"Reset the sync circuit breaker of {queryset.count()} competition(s)")
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = [
+        'competition', 'outcome', 'trigger', 'started_at', 'total_seconds',
+        'download_seconds', 'write_seconds', 'rows', 'rows_inserted', 'rows_updated', 'rows_removed'
+    ]
+    list_filter = ['outcome', 'trigger', 'started_at']
+    search_fields = ['competition__title', 'competition__kaggle_competition_id', 'error']
+    ordering = ['-started_at']
+    list_select_related = ['competition']
+    
+    fieldsets = (
+        ('Run', {
+            'fields': ('competition', 'trigger', 'outcome', 'error', 'started_at', 'finished_at')
+        }),
+        ('Timings', {
+            'fields': (
+                'download_seconds', 'download_bytes', 'parse_seconds',
+                'match_seconds', 'write_seconds', 'total_seconds'
+            )
+        }),
+        ('Rows', {
+            'fields': ('rows', 'rows_inserted', 'rows_updated', 'rows_unchanged', 'rows_removed')
+        }),
+    )
+    
+    def get_readonly_fields(self, request, obj=None):
+        # The ledger is written by the sync only
+        return [field.name for field in self.model._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
@@ -1,264 +1,953 @@
 """
 Automated Kaggle Leaderboard Sync Service
-- Downloads complete leaderboard from Kaggle using CLI (ALL entries, not just 20)
-- Saves to temporary CSV
+- Downloads complete leaderboard from Kaggle (ALL entries, not just 20) with the
+  fetcher selected by KAGGLE_LEADERBOARD_FETCHER (see leaderboard_fetchers.py)
+- Parses the CSV straight from the downloaded ZIP (or saves to temporary CSV
+  when KAGGLE_SYNC_IN_MEMORY is off) with the stdlib csv parser in
+  leaderboard_parser.py; pandas is optional (KAGGLE_SYNC_PARSER = 'pandas')
 - Updates database
+- Runs post-sync hooks when data changed (cache versions, websocket pushes,
+  see sync_hooks.py)
 - Deletes CSV to save space
 - Runs automatically every 5 minutes via Celery
 
-Requirements: Kaggle 1.7.4.5+ for --download flag to work
+Requirements: Kaggle 1.7.4.5+ for leaderboard downloads to work
 """
 import os
-import subprocess
+import hashlib
+import queue
 import time
-import pandas as pd
-from datetime import datetime
-from kaggle.api.kaggle_api_extended import KaggleApi
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from .leaderboard_fetchers import get_leaderboard_fetcher
+from .leaderboard_parser import LeaderboardRow, iter_leaderboard_rows, iter_row_chunks
+from .sync_hooks import run_post_sync_hooks
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT/UPDATE statement when writing leaderboard entries in bulk
+BULK_BATCH_SIZE = 1000
+
+# LeaderboardEntry fields written by the sync
+ENTRY_SYNC_FIELDS = ['score', 'rank', 'kaggle_team_name', 'kaggle_team_id', 'team_id', 'submission_date']
+
+# Bytes read at a time when hashing a downloaded leaderboard
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# Changes kept in detail by a streaming ingest, beyond this only counts are kept
+STREAM_CHANGE_DETAIL_LIMIT = 1000
+
+
+def normalize_score(value, competition):
+    """
+    Calculate normalized score based on competition's scoring configuration.
+    
+    Formula:
+    - If higher is better: (value - min) / (max - min) * PS_points
+    - If lower is better: (max - value) / (max - min) * PS_points
+    
+    Args:
+        value: Raw metric value from Kaggle (float)
+        competition: Competition object with scoring configuration
+    
+    Returns:
+        float: Normalized score (0 to PS_points)
+    """
+    try:
+        value = float(value)
+        min_val = float(competition.metric_min_value)
+        max_val = float(competition.metric_max_value)
+        ps_points = float(competition.points_for_perfect_score)
+        
+        # Avoid division by zero
+        if max_val == min_val:
+            logger.warning(f"Min and max values are equal ({min_val}), returning 0")
+            return 0.0
+        
+        if competition.higher_is_better:
+            # Higher is better: (value - min) / (max - min) * PS_points
+            normalized = ((value - min_val) / (max_val - min_val)) * ps_points
+        else:
+            # Lower is better: (max - value) / (max - min) * PS_points
+            normalized = ((max_val - value) / (max_val - min_val)) * ps_points
+        
+        # Clamp between 0 and PS_points
+        normalized = max(0.0, min(ps_points, normalized))
+        
+        return normalized
+        
+    except (ValueError, TypeError) as e:
+        logger.error(f"Error calculating normalized score: {e}")
+        return 0.0
+
+
+def lock_competition(competition_id):
+    """Serialize leaderboard writes of a competition (must be called inside a transaction)."""
+    from .models import Competition
+    
+    return Competition.objects.select_for_update().filter(pk=competition_id).values_list('pk', flat=True).first()
+
+
+def leaderboard_digest(stream, competition):
+    """
+    SHA-256 digest of a leaderboard CSV and the scoring config it is ingested with.
+    
+    The scoring configuration is part of the digest so that changing it forces
+    the next sync to rewrite the normalized scores.
+    
+    Args:
+        stream: Binary file-like object positioned at the start of the CSV
+        competition: Competition object with scoring configuration
+    
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f"{competition.higher_is_better}|{competition.metric_min_value}|"
+        f"{competition.metric_max_value}|{competition.points_for_perfect_score}\n".encode()
+    )
+    for chunk in iter(lambda: stream.read(DIGEST_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def leaderboard_rows_from_frame(df):
+    """
+    Turn a Kaggle leaderboard DataFrame into LeaderboardRow records.
+    
+    Used by the optional pandas parser. Ranks, scores and dates are converted
+    as whole-column operations instead of walking the frame row by row.
+    
+    Args:
+        df: Leaderboard DataFrame as read from the Kaggle CSV
+    
+    Returns:
+        list: One LeaderboardRow per row, with the raw score
+    """
+    import pandas as pd
+    
+    team_names = df['TeamName'].fillna('').astype(str).tolist()
+    ranks = pd.to_numeric(df['Rank'], errors='coerce').fillna(0).astype(int).tolist()
+    scores = pd.to_numeric(df['Score'], errors='coerce')
+    scores = scores.astype(object).where(scores.notna(), None).tolist()
+    
+    if 'TeamId' in df.columns:
+        team_ids = pd.to_numeric(df['TeamId'], errors='coerce')
+        team_ids = team_ids.astype('Int64').astype(object).where(team_ids.notna(), None).tolist()
+    else:
+        team_ids = [None] * len(df)
+    
+    # Kaggle calls the column LastSubmissionDate in downloads, SubmissionDate in exports
+    date_column = next((c for c in ('LastSubmissionDate', 'SubmissionDate') if c in df.columns), None)
+    if date_column:
+        dates = pd.to_datetime(df[date_column], utc=True, errors='coerce', format='ISO8601')
+        submission_dates = [
+            date.to_pydatetime() if date is not None else None
+            for date in dates.dt.floor('us').astype(object).where(dates.notna(), None).tolist()
+        ]
+    else:
+        submission_dates = [None] * len(df)
+    
+    if 'TeamMemberUserNames' in df.columns:
+        member_usernames = df['TeamMemberUserNames'].fillna('').astype(str).tolist()
+    else:
+        member_usernames = [''] * len(df)
+    
+    return [
+        LeaderboardRow(rank, team_id, team_name, score, submission_date, members)
+        for rank, team_id, team_name, score, submission_date, members in zip(
+            ranks, team_ids, team_names, scores, submission_dates, member_usernames
+        )
+    ]
+
+
+def measure_overlap(download_spans, write_spans):
+    """
+    Measure how much downloading and writing overlapped in a pipelined sync.
+    
+    Args:
+        download_spans: (start, end) perf_counter pairs of each download
+        write_spans: (start, end) perf_counter pairs of each database write
+    
+    Returns:
+        dict: Busy seconds of each stage, seconds during which a write ran while
+        at least one download was in progress, and that overlap as a share of
+        the write time
+    """
+    # Merge download spans so parallel downloads are not counted twice
+    merged = []
+    for start, end in sorted(download_spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    
+    overlap = 0.0
+    for write_start, write_end in write_spans:
+        for start, end in merged:
+            overlap += max(0.0, min(end, write_end) - max(start, write_start))
+    
+    write_seconds = sum(end - start for start, end in write_spans)
+    return {
+        'download_seconds': round(sum(end - start for start, end in merged), 3),
+        'write_seconds': round(write_seconds, 3),
+        'overlap_seconds': round(overlap, 3),
+        'overlap_ratio': overlap / write_seconds if write_seconds else 0.0,
+    }
+
+
+class LeaderboardChangeSet:
+    """
+    Entries added, changed and removed by one leaderboard sync.
+    
+    Each item is a dict with the entry id, team name, team id and user id
+    plus the old and/or new rank and score, so consumers such as websocket pushes and
+    cache invalidation can act on exactly what changed.
+    
+    With a detail_limit only that many items are kept per kind (streaming
+    ingests of huge leaderboards); counts stay exact and truncated is set
+    once items were dropped.
+    """
+    
+    def __init__(self, competition_id, detail_limit=None):
+        self.competition_id = competition_id
+        self.detail_limit = detail_limit
+        self.truncated = False
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.created_count = 0
+        self.updated_count = 0
+        self.removed_count = 0
+        self.unchanged = 0
+    
+    @property
+    def has_changes(self):
+        return bool(self.created_count or self.updated_count or self.removed_count)
+    
+    def keep(self, items):
+        """Whether another item fits into items under the detail limit."""
+        if self.detail_limit is not None and len(items) >= self.detail_limit:
+            self.truncated = True
+            return False
+        return True
+    
+    def add_added(self, entry):
+        self.created_count += 1
+        if not self.keep(self.added):
+            return
+        self.added.append({
+            'entry_id': entry.id,
+            'team_name': entry.kaggle_team_name,
+            'team_id': entry.team_id,
+            'user_id': entry.user_id,
+            'new_rank': entry.rank,
+            'new_score': entry.score,
+        })
+    
+    def add_changed(self, entry, old_rank, old_score, old_team_name=None, old_team_id=None):
+        self.updated_count += 1
+        if not self.keep(self.changed):
+            return
+        self.changed.append({
+            'entry_id': entry.id,
+            'team_name': entry.kaggle_team_name,
+            'old_team_name': old_team_name if old_team_name is not None else entry.kaggle_team_name,
+            'team_id': entry.team_id,
+            'old_team_id': old_team_id if old_team_id is not None else entry.team_id,
+            'user_id': entry.user_id,
+            'old_rank': old_rank,
+            'new_rank': entry.rank,
+            'old_score': old_score,
+            'new_score': entry.score,
+        })
+    
+    def add_removed(self, entry):
+        self.removed_count += 1
+        if not self.keep(self.removed):
+            return
+        self.removed.append({
+            'entry_id': entry.id,
+            'team_name': entry.kaggle_team_name,
+            'team_id': entry.team_id,
+            'user_id': entry.user_id,
+            'old_rank': entry.rank,
+            'old_score': entry.score,
+        })
+    
+    def summary(self):
+        """Counts per kind of change."""
+        return {
+            'created': self.created_count,
+            'updated': self.updated_count,
+            'unchanged': self.unchanged,
+            'removed': self.removed_count,
+        }
+    
+    def to_dict(self):
+        return {
+            'competition_id': self.competition_id,
+            'added': self.added,
+            'changed': self.changed,
+            'removed': self.removed,
+            'unchanged': self.unchanged,
+            'truncated': self.truncated,
+        }
+
 
 class KaggleLeaderboardSync:
     """Service to sync Kaggle leaderboard with local database"""
     
-    def __init__(self):
-        self.api = KaggleApi()
-        self.api.authenticate()
+    def __init__(self, fetcher=None):
+        """
+        Args:
+            fetcher: LeaderboardFetcher to download with; defaults to the one
+                selected by the KAGGLE_LEADERBOARD_FETCHER setting
+        """
+        self.last_ingest_stats = {}
+        self.last_change_set = None
+        self.last_pipeline_stats = {}
         self.temp_dir = os.path.join(settings.BASE_DIR, 'temp_kaggle_data')
         os.makedirs(self.temp_dir, exist_ok=True)
+        self.fetcher = fetcher or get_leaderboard_fetcher(self.temp_dir)
+    
+    def calculate_normalized_score(self, value, competition):
+        """
+        Calculate normalized score based on competition's scoring configuration.
+        See normalize_score, which match_records applies to every synced row.
+        """
+        return normalize_score(value, competition)
+    
+    def process_csv_and_update_db(self, csv_path, competition):
+        """
+        Read CSV and update database with leaderboard entries
+        
+        CSV Format from Kaggle: Rank, TeamId, TeamName, LastSubmissionDate, Score, SubmissionCount, TeamMemberUserNames
+        
+        CSVs of at least KAGGLE_SYNC_STREAMING_MIN_BYTES are ingested in chunks
+        (see ingest_leaderboard_chunks) instead of being loaded whole.
+        
+        Args:
+            csv_path: Path to the CSV file
+            competition: Competition object from database
+        
+        Returns:
+            int: Number of entries created or updated
+        """
+        logger.info(f"Processing CSV: {csv_path}")
+        
+        self.last_ingest_stats = {}
+        
+        try:
+            with open(csv_path, 'rb') as stream:
+                if self.should_stream(os.path.getsize(csv_path)):
+                    return self.ingest_leaderboard_chunks(self.read_row_chunks(stream), competition)
+                
+                rows = self.read_leaderboard_rows(stream)
+        except Exception as e:
+            logger.error(f"Error processing CSV: {e}")
+            return 0
+        
+        return self.ingest_leaderboard(rows, competition)
     
-    def fetch_and_save_to_csv(self, competition_slug):
+    def should_stream(self, size):
+        """Whether a leaderboard of size bytes is ingested in chunks."""
+        min_bytes = getattr(settings, 'KAGGLE_SYNC_STREAMING_MIN_BYTES', 50 * 1024 * 1024)
+        return min_bytes is not None and size >= min_bytes
+    
+    @property
+    def parser(self):
+        """
+        CSV parser selected by KAGGLE_SYNC_PARSER: 'csv' (stdlib, the default)
+        or 'pandas' (requires the optional pandas package).
         """
-        Download complete leaderboard CSV using Kaggle CLI (gets ALL entries, not just top 20)
+        parser = getattr(settings, 'KAGGLE_SYNC_PARSER', 'csv')
+        if parser not in ('csv', 'pandas'):
+            raise ImproperlyConfigured(f"Unknown KAGGLE_SYNC_PARSER '{parser}', expected 'csv' or 'pandas'")
+        if parser == 'pandas' and find_spec('pandas') is None:
+            raise ImproperlyConfigured("KAGGLE_SYNC_PARSER is 'pandas' but pandas is not installed")
+        return parser
+    
+    def read_leaderboard_rows(self, stream):
+        """
+        Parse a whole leaderboard CSV stream.
         
-        Requires: Kaggle 1.7.4.5+ for --download flag to work properly
+        Returns:
+            list: LeaderboardRow records with raw scores
+        """
+        if self.parser == 'pandas':
+            import pandas as pd
+            return leaderboard_rows_from_frame(pd.read_csv(stream, float_precision='round_trip'))
+        
+        return list(iter_leaderboard_rows(stream))
+    
+    def read_row_chunks(self, stream):
+        """
+        Parse a leaderboard CSV stream lazily in chunks of KAGGLE_SYNC_CHUNK_ROWS rows.
         
         Returns:
-            str: Path to the CSV file
+            iterator: Lists of LeaderboardRow records with raw scores
         """
-        import zipfile
-        import shutil
+        chunk_rows = getattr(settings, 'KAGGLE_SYNC_CHUNK_ROWS', 50000)
+        if self.parser == 'pandas':
+            import pandas as pd
+            return (leaderboard_rows_from_frame(df) for df in pd.read_csv(stream, chunksize=chunk_rows, float_precision='round_trip'))
+        
+        return iter_row_chunks(iter_leaderboard_rows(stream), chunk_rows)
+    
+    def ingest_leaderboard(self, rows, competition):
+        """
+        Update database with the entries of a parsed leaderboard
+        
+        Rows are collected in memory first and only the differences with the
+        stored leaderboard are written (see apply_leaderboard_diff). The change
+        set is kept on last_change_set.
         
-        logger.info(f"Downloading full leaderboard for: {competition_slug}")
+        Args:
+            rows: LeaderboardRow records, see read_leaderboard_rows
+            competition: Competition object from database
+        
+        Returns:
+            int: Number of entries created or updated
+        """
+        from apps.users.kaggle_matching import KaggleUserIndex
+        
+        logger.info(f"Scoring config - Higher is better: {competition.higher_is_better}, "
+                   f"Min: {competition.metric_min_value}, Max: {competition.metric_max_value}, "
+                   f"PS Points: {competition.points_for_perfect_score}")
+        
+        self.last_ingest_stats = {}
+        self.last_change_set = None
         
         try:
-            # Create unique download directory
-            download_path = os.path.join(self.temp_dir, f"{competition_slug}_{int(time.time())}")
-            os.makedirs(download_path, exist_ok=True)
+            started = time.perf_counter()
             
-            # Execute kaggle CLI to download complete leaderboard
-            # Use full path to kaggle executable in virtual environment (Windows compatibility)
-            import sys
-            kaggle_exe = os.path.join(os.path.dirname(sys.executable), 'kaggle.exe')
-            if not os.path.exists(kaggle_exe):
-                # Try without .exe for Unix systems
-                kaggle_exe = os.path.join(os.path.dirname(sys.executable), 'kaggle')
+            logger.info(f"Leaderboard has {len(rows)} entries")
             
-            logger.info(f"Running: {kaggle_exe} competitions leaderboard {competition_slug} --download")
-            result = subprocess.run(
-                [kaggle_exe, 'competitions', 'leaderboard', competition_slug, '--download', '--path', download_path],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=300  # 5 minute timeout
-            )
+            # Resolve every team name and member username in the CSV up front
+            user_index = KaggleUserIndex.for_names(self.collect_candidate_names(rows))
+            logger.info(f"Matched {len(user_index)} registered users from leaderboard names")
+            
+            records = self.match_records(rows, user_index, competition)
+            match_seconds = time.perf_counter() - started
             
-            # Find and extract ZIP file
-            zip_files = [f for f in os.listdir(download_path) if f.endswith('.zip')]
-            if not zip_files:
-                logger.error(f"No ZIP file found in {download_path}")
-                return None
+            phase_started = time.perf_counter()
+            change_set = self.apply_leaderboard_diff(competition, records)
+            self.last_change_set = change_set
+            stats = change_set.summary()
             
-            zip_path = os.path.join(download_path, zip_files[0])
-            logger.info(f"Extracting {zip_files[0]}...")
+            elapsed = time.perf_counter() - started
+            stats['match_seconds'] = round(match_seconds, 3)
+            stats['write_seconds'] = round(time.perf_counter() - phase_started, 3)
+            stats['rows'] = len(rows)
+            stats['seconds'] = round(elapsed, 3)
+            stats['rows_per_second'] = round(len(rows) / elapsed, 1) if elapsed > 0 else 0.0
+            self.last_ingest_stats = stats
             
-            # Extract CSV from ZIP
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(download_path)
+            logger.info(
+                f"✅ Database update complete - Created: {stats['created']}, Updated: {stats['updated']}, "
+                f"Unchanged: {stats['unchanged']}, Removed: {stats['removed']} "
+                f"({stats['rows']} rows in {stats['seconds']}s, {stats['rows_per_second']} rows/sec)"
+            )
+            return stats['created'] + stats['updated']
             
-            # Find extracted CSV (handle Windows path issues with colons in filename)
-            csv_files = [f for f in os.listdir(download_path) if f.endswith('.csv')]
-            if not csv_files:
-                logger.error(f"No CSV file found after extraction in {download_path}")
-                return None
+        except Exception as e:
+            logger.error(f"Error processing leaderboard: {e}")
+            return 0
+    
+    def ingest_leaderboard_chunks(self, chunks, competition, partial=False, stop_when_unchanged=False,
+                                  members_listed=True):
+        """
+        Streaming counterpart of ingest_leaderboard for very large leaderboards.
+        
+        Each chunk is matched, diffed against the stored entries it refers to
+        and written in its own transaction, so memory depends on the chunk size
+        rather than the leaderboard size. Only the ids of the entries seen are
+        kept across chunks (8 bytes each); stored entries that were not seen are
+        removed at the end, as in apply_leaderboard_diff. The change set keeps
+        at most STREAM_CHANGE_DETAIL_LIMIT detailed items per kind.
+        
+        Unlike ingest_leaderboard the leaderboard is not replaced atomically:
+        readers may see a mix of old and new rows while the sync runs.
+        
+        Chunks that only cover the top of the leaderboard (partial, or cut
+        short by stop_when_unchanged) cannot tell a vanished team from one
+        that dropped below the rows read, so nothing is removed then.
+        
+        Args:
+            chunks: Iterable of LeaderboardRow lists, see read_row_chunks
+            competition: Competition object from database
+            partial: The chunks do not cover the whole leaderboard, or a
+                callable telling so once the chunks are consumed
+            stop_when_unchanged: Stop pulling chunks after one that changed
+                nothing; later chunks are assumed unchanged too
+            members_listed: The rows carry their team members; if not, rows
+                that match no user by team name are also matched to users'
+                entries by TeamId or team name
+        
+        Returns:
+            int: Number of entries created or updated
+        """
+        from apps.users.kaggle_matching import KaggleUserIndex
+        
+        self.last_ingest_stats = {}
+        self.last_change_set = None
+        
+        try:
+            started = time.perf_counter()
+            change_set = LeaderboardChangeSet(competition.id, detail_limit=STREAM_CHANGE_DETAIL_LIMIT)
+            seen_ids = array('q')
+            total_rows = 0
+            last_rank = 0
+            stopped_early = False
+            parse_seconds = match_seconds = write_seconds = 0.0
             
-            csv_file = csv_files[0]
-            csv_path = os.path.join(download_path, csv_file)
+            chunks = iter(chunks)
+            while True:
+                # Chunks are parsed lazily, so pulling the next one is parse time
+                phase_started = time.perf_counter()
+                rows = next(chunks, None)
+                parse_seconds += time.perf_counter() - phase_started
+                if rows is None:
+                    break
+                if not rows:
+                    continue
+                total_rows += len(rows)
+                last_rank = max(last_rank, max(row.rank for row in rows))
+                
+                phase_started = time.perf_counter()
+                user_index = KaggleUserIndex.for_names(self.collect_candidate_names(rows))
+                records = self.match_records(rows, user_index, competition)
+                match_seconds += time.perf_counter() - phase_started
+                del rows, user_index
+                
+                phase_started = time.perf_counter()
+                changed_before = change_set.created_count + change_set.updated_count
+                with transaction.atomic():
+                    lock_competition(competition.id)
+                    existing = self.load_existing_entries(competition, records, user_teams=not members_listed)
+                    seen_ids.extend(self.write_records(competition, records, existing, change_set))
+                write_seconds += time.perf_counter() - phase_started
+                logger.info(f"Ingested {total_rows} rows so far")
+                
+                if stop_when_unchanged and change_set.created_count + change_set.updated_count == changed_before:
+                    logger.info(f"Rows up to rank {last_rank} unchanged, not reading further")
+                    stopped_early = True
+                    break
             
-            # Rename CSV if it has colons (Windows path issue with ISO timestamp)
-            if ':' in csv_file:
-                new_name = csv_file.replace(':', '_').replace('T', '_T_')
-                new_path = os.path.join(download_path, new_name)
-                shutil.move(csv_path, new_path)
-                csv_path = new_path
-                logger.info(f"Renamed CSV to avoid Windows path issues: {new_name}")
+            if callable(partial):
+                partial = partial()
+            phase_started = time.perf_counter()
+            if total_rows and not (partial or stopped_early):
+                self.remove_unseen_entries(competition, seen_ids, change_set)
+            write_seconds += time.perf_counter() - phase_started
             
-            # Clean up ZIP file
-            os.remove(zip_path)
+            self.last_change_set = change_set
+            stats = change_set.summary()
             
-            # Count entries for logging
-            df = pd.read_csv(csv_path)
-            logger.info(f"✅ Downloaded complete leaderboard: {len(df)} entries")
+            elapsed = time.perf_counter() - started
+            stats['parse_seconds'] = round(parse_seconds, 3)
+            stats['match_seconds'] = round(match_seconds, 3)
+            stats['write_seconds'] = round(write_seconds, 3)
+            stats['rows'] = total_rows
+            stats['seconds'] = round(elapsed, 3)
+            stats['rows_per_second'] = round(total_rows / elapsed, 1) if elapsed > 0 else 0.0
+            stats['partial'] = partial or stopped_early
+            stats['stopped_early'] = stopped_early
+            self.last_ingest_stats = stats
             
-            return csv_path
+            logger.info(
+                f"✅ Streaming database update complete - Created: {stats['created']}, Updated: {stats['updated']}, "
+                f"Unchanged: {stats['unchanged']}, Removed: {stats['removed']} "
+                f"({stats['rows']} rows in {stats['seconds']}s, {stats['rows_per_second']} rows/sec)"
+            )
+            return stats['created'] + stats['updated']
             
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Kaggle CLI error: {e.stderr}")
-            return None
-        except subprocess.TimeoutExpired:
-            logger.error(f"Download timeout for {competition_slug}")
-            return None
         except Exception as e:
-            logger.error(f"Error downloading leaderboard: {e}")
-            return None
+            logger.error(f"Error processing leaderboard: {e}")
+            return 0
     
-    def calculate_normalized_score(self, value, competition):
+    def match_records(self, rows, user_index, competition):
         """
-        Calculate normalized score based on competition's scoring configuration.
-        
-        Formula:
-        - If higher is better: (value - min) / (max - min) * PS_points
-        - If lower is better: (max - value) / (max - min) * PS_points
+        Link leaderboard rows to registered users and normalize their scores.
         
         Args:
-            value: Raw metric value from Kaggle (float)
+            rows: LeaderboardRow records
+            user_index: KaggleUserIndex covering the rows' names
             competition: Competition object with scoring configuration
         
         Returns:
-            float: Normalized score (0 to PS_points)
+            dict: Field values keyed the way apply_leaderboard_diff looks up
+            existing entries: ('user', user_id) for platform users,
+            ('team', kaggle_team_id) for Kaggle teams, ('name', team_name)
+            for rows without a TeamId
         """
-        try:
-            value = float(value)
-            min_val = float(competition.metric_min_value)
-            max_val = float(competition.metric_max_value)
-            ps_points = float(competition.points_for_perfect_score)
+        from apps.users.kaggle_matching import split_member_usernames
+        
+        # Later rows for the same key win, as with the old update_or_create loop.
+        records = {}
+        
+        for row in rows:
+            team_name = row.team_name
             
-            # Avoid division by zero
-            if max_val == min_val:
-                logger.warning(f"Min and max values are equal ({min_val}), returning 0")
-                return 0.0
+            # Try to find matching user by username
+            # First try team member usernames, then team name
+            user = user_index.match(*split_member_usernames(row.member_usernames), team_name)
+            if not user:
+                # For public Kaggle competitions, create entry without user
+                # This allows displaying the full leaderboard even for non-registered users
+                logger.debug(f"Creating Kaggle-only entry for team: {team_name}")
             
-            if competition.higher_is_better:
-                # Higher is better: (value - min) / (max - min) * PS_points
-                normalized = ((value - min_val) / (max_val - min_val)) * ps_points
+            if user:
+                key = ('user', user.id)
+            elif row.team_id is not None:
+                key = ('team', row.team_id)
             else:
-                # Lower is better: (max - value) / (max - min) * PS_points
-                normalized = ((max_val - value) / (max_val - min_val)) * ps_points
-            
-            # Clamp between 0 and PS_points
-            normalized = max(0.0, min(ps_points, normalized))
-            
-            return normalized
+                key = ('name', team_name)
+            records[key] = {
+                # Normalized score, teams without a valid score get 0
+                'score': normalize_score(row.score, competition) if row.score is not None else 0.0,
+                'rank': row.rank,
+                'kaggle_team_name': team_name,
+                'kaggle_team_id': row.team_id,
+                'submission_date': row.submission_date,
+            }
+        
+        return records
+    
+    def collect_candidate_names(self, rows):
+        """
+        Collect every team name and team member username in a leaderboard.
+        
+        Args:
+            rows: LeaderboardRow records
+        
+        Returns:
+            set: Names to resolve against registered users
+        """
+        from apps.users.kaggle_matching import split_member_usernames
+        
+        names = set()
+        for row in rows:
+            if row.team_name:
+                names.add(row.team_name)
+            names.update(split_member_usernames(row.member_usernames))
+        return names
+    
+    def apply_leaderboard_diff(self, competition, records, partial=False):
+        """
+        Diff a downloaded leaderboard against the stored one and write only the differences.
+        
+        Existing entries for the competition are loaded with one query, under
+        the competition's row lock, and matched against the incoming rows. New rows are inserted, rows whose rank, score,
+        submission date or team name changed are updated, and identical rows are
+        left alone; writes use chunked bulk_create/bulk_update inside one
+        transaction.
+        
+        Teams that vanished from Kaggle are removed: Kaggle-only entries are
+        deleted, entries of registered users are kept (they hold the registration)
+        but reset to unranked with a score of 0.
+        
+        Args:
+            competition: Competition object from database
+            records: dict mapping record keys (see match_records) to the
+                field values for that entry
+            partial: True if records only cover part of the leaderboard; vanished
+                teams are then not removed
+        
+        Returns:
+            LeaderboardChangeSet: What was added, changed and removed
+        """
+        change_set = LeaderboardChangeSet(competition.id)
+        
+        with transaction.atomic():
+            # A concurrent sync of the competition waits here, so the entries
+            # loaded below are the ones this transaction writes over
+            lock_competition(competition.id)
+            existing = self.load_existing_entries(competition)
+            self.write_records(competition, records, existing, change_set)
             
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error calculating normalized score: {e}")
-            return 0.0
+            # Whatever is left in existing was not in the download
+            if records and not partial:
+                self.remove_entries(existing.values(), change_set)
+        
+        return change_set
     
-    def process_csv_and_update_db(self, csv_path, competition):
+    def load_existing_entries(self, competition, records=None, user_teams=False):
         """
-        Read CSV and update database with leaderboard entries
+        Load stored leaderboard entries keyed like the records of match_records.
         
-        CSV Format from Kaggle: Rank, TeamId, TeamName, LastSubmissionDate, Score, SubmissionCount, TeamMemberUserNames
+        Kaggle-only entries stored without a TeamId (synced before TeamIds
+        were kept) are keyed by ('name', team_name); write_records falls back
+        to them for records of the same team name.
+        
+        With user_teams, entries of registered users are also keyed by
+        ('user_team', kaggle_team_id), or ('user_name', team_name) if stored
+        without a TeamId, for the team records. Rows that do not list their
+        team members (paged listings) can only be matched to a user by team
+        name, so write_records falls back to these to update the user's entry
+        rather than create a Kaggle-only duplicate of it.
         
         Args:
-            csv_path: Path to the CSV file
             competition: Competition object from database
+            records: Only load the entries for these records; all entries if None
+            user_teams: Also key users' entries by team for records' TeamIds and
+                team names (only with records)
+        
+        Returns:
+            dict: Entry per ('user', user_id), ('team', kaggle_team_id),
+            ('name', team_name), ('user_team', kaggle_team_id) or
+            ('user_name', team_name) key
         """
         from apps.leaderboard.models import LeaderboardEntry
-        from apps.users.models import User
         
-        logger.info(f"Processing CSV: {csv_path}")
-        logger.info(f"Scoring config - Higher is better: {competition.higher_is_better}, "
-                   f"Min: {competition.metric_min_value}, Max: {competition.metric_max_value}, "
-                   f"PS Points: {competition.points_for_perfect_score}")
-        
-        try:
-            # Read CSV
-            df = pd.read_csv(csv_path)
-            logger.info(f"CSV has {len(df)} entries with columns: {df.columns.tolist()}")
+        entries = LeaderboardEntry.objects.filter(competition=competition)
+        if records is None:
+            querysets = [entries]
+        else:
+            user_ids = [identity for kind, identity in records if kind == 'user']
+            kaggle_team_ids = [identity for kind, identity in records if kind == 'team']
+            team_names = [values['kaggle_team_name'] for (kind, _), values in records.items() if kind != 'user']
             
-            updated_count = 0
-            created_count = 0
-            skipped_count = 0
+            def batched(values):
+                return [values[start:start + BULK_BATCH_SIZE] for start in range(0, len(values), BULK_BATCH_SIZE)]
             
-            # Process each entry
-            for _, row in df.iterrows():
-                # Use actual Kaggle CSV column names
-                team_name = row['TeamName']
-                rank = row['Rank']
-                raw_score = float(row['Score'])  # Raw score from Kaggle
-                submission_date = row.get('LastSubmissionDate')
-                team_usernames = row.get('TeamMemberUserNames', '')
-                
-                # Calculate normalized score using competition's scoring configuration
-                normalized_score = self.calculate_normalized_score(raw_score, competition)
-                logger.debug(f"{team_name}: Raw score {raw_score} -> Normalized {normalized_score:.4f}")
-                
-                # Try to find matching user by username
-                # First try team member usernames, then team name
-                user = None
-                
-                if pd.notna(team_usernames) and team_usernames:
-                    # Try each team member username
-                    for username in str(team_usernames).split(','):
-                        username = username.strip()
-                        try:
-                            user = User.objects.get(username=username)
-                            break
-                        except User.DoesNotExist:
-                            continue
-                
-                # If no user found by team members, try team name
-                if not user:
-                    try:
-                        user = User.objects.get(username=team_name)
-                    except User.DoesNotExist:
-                        # For public Kaggle competitions, create entry without user
-                        # This allows displaying the full leaderboard even for non-registered users
-                        logger.debug(f"Creating Kaggle-only entry for team: {team_name}")
-                        pass
-                
-                # Update or create leaderboard entry
-                # For public competitions, use kaggle_team_name as unique identifier if user is None
-                if user:
-                    entry, created = LeaderboardEntry.objects.update_or_create(
-                        competition=competition,
-                        user=user,
-                        defaults={
-                            'score': normalized_score,  # Use normalized score
-                            'rank': rank,
-                            'kaggle_team_name': team_name,
-                            'submission_date': pd.to_datetime(submission_date) if pd.notna(submission_date) else None
-                        }
-                    )
-                else:
-                    # For Kaggle-only participants (not registered on our platform)
-                    entry, created = LeaderboardEntry.objects.update_or_create(
-                        competition=competition,
-                        user__isnull=True,
-                        kaggle_team_name=team_name,
-                        defaults={
-                            'score': normalized_score,  # Use normalized score
-                            'rank': rank,
-                            'submission_date': pd.to_datetime(submission_date) if pd.notna(submission_date) else None
-                        }
-                    )
-                
-                if created:
-                    created_count += 1
-                    logger.debug(f"Created entry for {team_name} - Rank: {rank}, Raw: {raw_score}, Normalized: {normalized_score:.4f}")
+            querysets = [
+                entries.filter(user_id__in=batch) for batch in batched(user_ids)
+            ] + [
+                entries.filter(user__isnull=True, kaggle_team_id__in=batch) for batch in batched(kaggle_team_ids)
+            ] + [
+                entries.filter(user__isnull=True, kaggle_team_id__isnull=True, kaggle_team_name__in=batch)
+                for batch in batched(team_names)
+            ]
+        
+        existing = {}
+        for queryset in querysets:
+            for entry in queryset.order_by('id'):
+                if entry.user_id:
+                    key = ('user', entry.user_id)
+                elif entry.kaggle_team_id is not None:
+                    key = ('team', entry.kaggle_team_id)
                 else:
-                    updated_count += 1
-                    logger.debug(f"Updated entry for {team_name} - Rank: {rank}, Raw: {raw_score}, Normalized: {normalized_score:.4f}")
-            
-            logger.info(f"✅ Database update complete - Created: {created_count}, Updated: {updated_count}, Skipped: {skipped_count}")
-            return created_count + updated_count
+                    key = ('name', entry.kaggle_team_name)
+                # Keep the first entry if old syncs left duplicates behind
+                existing.setdefault(key, entry)
+        
+        if user_teams and records is not None:
+            user_entries = [
+                entries.filter(user__isnull=False, kaggle_team_id__in=batch) for batch in batched(kaggle_team_ids)
+            ] + [
+                entries.filter(user__isnull=False, kaggle_team_id__isnull=True, kaggle_team_name__in=batch)
+                for batch in batched(team_names)
+            ]
+            for queryset in user_entries:
+                for entry in queryset.order_by('id'):
+                    if entry.kaggle_team_id is not None:
+                        key = ('user_team', entry.kaggle_team_id)
+                    else:
+                        key = ('user_name', entry.kaggle_team_name)
+                    existing.setdefault(key, entry)
+        return existing
+    
+    def write_records(self, competition, records, existing, change_set):
+        """
+        Insert new records and update changed ones; call inside a transaction.
+        
+        Matched entries are popped from existing, so what is left afterwards
+        was not part of records.
+        
+        Args:
+            competition: Competition object from database
+            records: dict of field values, see match_records
+            existing: Stored entries, see load_existing_entries
+            change_set: LeaderboardChangeSet to record the changes in
+        
+        Returns:
+            list: Ids of the entries records were written to or matched
+        """
+        from apps.leaderboard.models import LeaderboardEntry
+        
+        matched = []
+        for (kind, identity), values in records.items():
+            entry = existing.pop((kind, identity), None)
+            if entry is None and kind == 'team':
+                # Entry stored before TeamIds were kept
+                entry = existing.pop(('name', values['kaggle_team_name']), None)
+            if entry is None and kind != 'user':
+                # A registered user's team in rows without members, unless a
+                # record of its own already matched the user
+                for key in (('user_team', values['kaggle_team_id']), ('user_name', values['kaggle_team_name'])):
+                    user_entry = existing.get(key)
+                    if user_entry is not None and ('user', user_entry.user_id) not in records:
+                        entry = existing.pop(key)
+                        break
+            matched.append((kind, identity, values, entry))
+        
+        renamed_teams = self.assign_teams(competition, matched)
+        
+        to_create = []
+        to_update = []
+        seen_ids = []
+        for kind, identity, values, entry in matched:
+            if entry is None:
+                entry = LeaderboardEntry(competition=competition, **values)
+                if kind == 'user':
+                    entry.user_id = identity
+                to_create.append(entry)
+                continue
             
-        except Exception as e:
-            logger.error(f"Error processing CSV: {e}")
-            return 0
+            seen_ids.append(entry.id)
+            if any(getattr(entry, field) != value for field, value in values.items()):
+                old_rank, old_score = entry.rank, entry.score
+                old_team_name, old_team_id = entry.kaggle_team_name, entry.team_id
+                for field, value in values.items():
+                    setattr(entry, field, value)
+                to_update.append(entry)
+                change_set.add_changed(entry, old_rank, old_score, old_team_name, old_team_id)
+            else:
+                change_set.unchanged += 1
+        
+        LeaderboardEntry.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        LeaderboardEntry.objects.bulk_update(to_update, ENTRY_SYNC_FIELDS, batch_size=BULK_BATCH_SIZE)
+        if renamed_teams:
+            from apps.leaderboard.standings import rename_teams
+            rename_teams(renamed_teams)
+        
+        # Primary keys are only known once bulk_create has run
+        for entry in to_create:
+            change_set.add_added(entry)
+            seen_ids.append(entry.id)
+        
+        return seen_ids
+    
+    def assign_teams(self, competition, matched):
+        """
+        Set the team_id of each record, see the Team model.
+        
+        A stored entry keeps its team while it is the same Kaggle team (same
+        TeamId, or the same name for entries without one). A new name for a
+        known TeamId renames the team if it only plays in this competition;
+        a team that also has entries elsewhere (linked by its old name) keeps
+        that name there, and the renamed entry is split off to a team of the
+        new name. New entries and entries that changed team are resolved with
+        Team.ids_for_new_entries.
+        
+        Args:
+            competition: Competition object from database
+            matched: (kind, identity, values, stored entry or None) per record
+        
+        Returns:
+            dict: team id -> new name of the teams to rename
+        """
+        from apps.leaderboard.models import LeaderboardEntry, Team
+        from apps.leaderboard.standings import UNKNOWN_TEAM, batches, standing_team_name
+        
+        renamed = {}
+        unresolved = []
+        for _, _, values, entry in matched:
+            name = standing_team_name(values['kaggle_team_name'])
+            if entry is not None and entry.team_id is not None:
+                old_name = standing_team_name(entry.kaggle_team_name)
+                same_kaggle_team = (
+                    values['kaggle_team_id'] is not None
+                    and entry.kaggle_team_id == values['kaggle_team_id']
+                    # The shared 'Unknown' team is never renamed
+                    and UNKNOWN_TEAM not in (name, old_name)
+                )
+                if old_name == name or same_kaggle_team:
+                    values['team_id'] = entry.team_id
+                    if old_name != name:
+                        renamed[entry.team_id] = (values, name)
+                    continue
+            unresolved.append((values, name))
+        
+        shared = set()
+        for batch in batches(list(renamed)):
+            shared.update(
+                LeaderboardEntry.objects.filter(team_id__in=batch).exclude(competition=competition)
+                .values_list('team_id', flat=True).distinct()
+            )
+        for team_id in shared:
+            unresolved.append(renamed.pop(team_id))
+        
+        team_ids = Team.ids_for_new_entries(competition.id, [name for _, name in unresolved])
+        for (values, _), team_id in zip(unresolved, team_ids):
+            values['team_id'] = team_id
+        return {team_id: name for team_id, (_, name) in renamed.items()}
+    
+    def remove_entries(self, entries, change_set):
+        """
+        Remove entries of teams that vanished from the Kaggle leaderboard.
+        
+        Kaggle-only entries are deleted, entries of registered users are kept
+        (they hold the registration) but reset to unranked with a score of 0.
+        """
+        from apps.leaderboard.models import LeaderboardEntry
+        
+        to_delete = []
+        to_reset = []
+        for entry in entries:
+            if entry.user_id is None:
+                to_delete.append(entry.id)
+                change_set.add_removed(entry)
+            elif entry.rank or entry.score:
+                change_set.add_removed(entry)
+                entry.rank = 0
+                entry.score = 0.0
+                to_reset.append(entry)
+        
+        LeaderboardEntry.objects.bulk_update(to_reset, ['rank', 'score'], batch_size=BULK_BATCH_SIZE)
+        for start in range(0, len(to_delete), BULK_BATCH_SIZE):
+            LeaderboardEntry.objects.filter(id__in=to_delete[start:start + BULK_BATCH_SIZE]).delete()
+    
+    def remove_unseen_entries(self, competition, seen_ids, change_set):
+        """
+        Remove the stored entries of a competition whose id is not in seen_ids.
+        
+        Used by streaming ingests that read the whole leaderboard. Seen ids are
+        marked in a bitmap over the competition's id range and stored entries
+        are scanned in batches, so memory stays at one bit per id plus one
+        batch of entries.
+        """
+        from django.db.models import Max, Min
+        from apps.leaderboard.models import LeaderboardEntry
+        
+        entries = LeaderboardEntry.objects.filter(competition=competition)
+        id_range = entries.aggregate(low=Min('id'), high=Max('id'))
+        if id_range['low'] is None:
+            return
+        
+        low = id_range['low']
+        seen = bytearray((id_range['high'] - low) // 8 + 1)
+        for entry_id in seen_ids:
+            offset = entry_id - low
+            seen[offset >> 3] |= 1 << (offset & 7)
+        
+        def is_seen(entry_id):
+            offset = entry_id - low
+            return bool(seen[offset >> 3] & (1 << (offset & 7)))
+        
+        batch = []
+        for entry in entries.order_by('id').iterator(chunk_size=BULK_BATCH_SIZE):
+            if not is_seen(entry.id):
+                batch.append(entry)
+            if len(batch) >= BULK_BATCH_SIZE:
+                with transaction.atomic():
+                    lock_competition(competition.id)
+                    self.remove_entries(batch, change_set)
+                batch = []
+        
+        if batch:
+            with transaction.atomic():
+                lock_competition(competition.id)
+                self.remove_entries(batch, change_set)
     
     def cleanup_csv(self, csv_path):
         """Delete the temporary CSV file"""
@@ -284,60 +973,363 @@ class KaggleLeaderboardSync:
         except Exception as e:
             logger.error(f"Error cleaning up old files: {e}")
     
-    def sync_competition_leaderboard(self, competition):
+    def competition_slug(self, competition):
+        """Kaggle slug of a competition, extracted from the URL if needed."""
+        kaggle_id = competition.kaggle_competition_id
+        if kaggle_id.startswith('http'):
+            # Extract slug from URL: https://www.kaggle.com/competitions/slug -> slug
+            kaggle_id = kaggle_id.rstrip('/').split('/')[-1]
+        return kaggle_id
+    
+    def new_result(self, competition):
+        """Empty sync result dict for a competition."""
+        return {
+            'success': False,
+            'competition': competition.title,
+            'entries_processed': 0,
+            'skipped': False,
+            'error': None,
+            'timings': {},
+        }
+    
+    def record_sync_run(self, competition, result, started_at, trigger=''):
+        """
+        Store the result of a sync as a SyncRun and count failures towards the
+        competition's backoff and circuit breaker; never fails the sync itself.
+        """
+        from .models import SyncRun
+        
+        try:
+            SyncRun.record(competition, result, started_at, trigger)
+        except Exception as e:
+            logger.error(f"Could not record sync run for {competition.title}: {e}")
+        
+        if not result.get('success') and not result.get('skipped'):
+            try:
+                competition.record_sync_failure(result.get('error') or '')
+            except Exception as e:
+                logger.error(f"Could not record sync failure for {competition.title}: {e}")
+    
+    def sync_competition_leaderboard(self, competition, force=False, trigger='manual'):
         """
         Complete sync process for a competition:
         1. Fetch from Kaggle
-        2. Save to CSV
-        3. Update database
-        4. Delete CSV
+        2. Save to CSV (skipped when KAGGLE_SYNC_IN_MEMORY is on, the CSV
+           is then parsed directly from the downloaded ZIP)
+        3. Update database, unless the leaderboard is unchanged since the last sync
+        4. Delete downloaded files
         
         Args:
             competition: Competition object with kaggle_competition_id
+            force: Rewrite the leaderboard even if its digest matches the last sync
+            trigger: What started the sync, stored on the SyncRun
         
         Returns:
             dict: Sync results
         """
         logger.info(f"Starting leaderboard sync for: {competition.title}")
         
-        result = {
-            'success': False,
-            'competition': competition.title,
-            'entries_processed': 0,
-            'error': None
-        }
+        result = self.new_result(competition)
+        started_at = timezone.now()
         
         try:
-            # Extract competition slug from URL if needed
-            kaggle_id = competition.kaggle_competition_id
-            if kaggle_id.startswith('http'):
-                # Extract slug from URL: https://www.kaggle.com/competitions/slug -> slug
-                kaggle_id = kaggle_id.rstrip('/').split('/')[-1]
-            
+            kaggle_id = self.competition_slug(competition)
             logger.info(f"Using Kaggle competition slug: {kaggle_id}")
             
-            # Step 1: Fetch and save to CSV
-            csv_path = self.fetch_and_save_to_csv(kaggle_id)
+            if self.fetcher.paged:
+                # Steps 1-3 page by page, falling back to the full download if needed
+                self.sync_from_pages(competition, result, force)
+            else:
+                # Step 1: Fetch from Kaggle
+                self.fetch_and_ingest(competition, result, force)
             
-            if not csv_path:
-                result['error'] = "Failed to fetch leaderboard"
-                return result
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"Sync failed for {competition.title}: {e}")
+        
+        self.record_sync_run(competition, result, started_at, trigger)
+        return result
+    
+    def fetch_and_ingest(self, competition, result, force=False):
+        """Download the full leaderboard of a competition and ingest it."""
+        phase_started = time.perf_counter()
+        download = self.fetcher.fetch(self.competition_slug(competition))
+        result['timings']['download_seconds'] = round(time.perf_counter() - phase_started, 3)
+        
+        if not download:
+            result['error'] = "Failed to fetch leaderboard"
+        else:
+            self.ingest_download(competition, download, result, force)
+    
+    def sync_from_pages(self, competition, result, force=False, top_n=None):
+        """
+        Sync a competition from a paged fetcher, ingesting pages as they arrive.
+        
+        Listing stops after the top top_n rows (KAGGLE_PAGED_TOP_N by default)
+        and, unless force is set, at the first page that changed nothing
+        (KAGGLE_PAGED_STOP_ON_UNCHANGED); the ingest is then partial and
+        removes no vanished teams, as a team missing from the pages read may
+        just rank further down. The same goes for listings that end on a
+        full page (or a single page) without a next page token: Kaggle may
+        have cut them short, so vanished teams are only removed once a
+        listing ends on a short last page. Pages carry no digest, so a sync
+        that changed data clears the stored one.
+        
+        Pages do not list team members, so rows are matched to the entries of
+        registered users by TeamId or team name (see load_existing_entries).
+        
+        Without page tokens (the current Kaggle SDK) only the first page can be
+        listed: when that does not cover the rows needed, the full leaderboard
+        is downloaded instead.
+        
+        Args:
+            competition: Competition object with kaggle_competition_id
+            result: Sync result dict to fill in
+            force: Do not stop at unchanged pages
+            top_n: Only sync the top top_n rows; 0 or None for all rows
+        """
+        top_n = top_n if top_n is not None else getattr(settings, 'KAGGLE_PAGED_TOP_N', None)
+        stop_when_unchanged = not force and getattr(settings, 'KAGGLE_PAGED_STOP_ON_UNCHANGED', True)
+        tokens = self.fetcher.supports_page_tokens
+        
+        if not tokens and not top_n:
+            logger.info("Kaggle client has no leaderboard page tokens, downloading the full leaderboard")
+            return self.fetch_and_ingest(competition, result, force)
+        
+        pages = self.fetcher.iter_pages(self.competition_slug(competition))
+        first = next(pages, None)
+        if first is None:
+            result['error'] = "Kaggle returned no leaderboard pages"
+            return
+        if not first.rows:
+            logger.info(f"Leaderboard of {competition.title} is empty, nothing to sync")
+            competition.record_leaderboard_sync()
+            result['pages'] = 1
+            result['skipped'] = True
+            result['success'] = True
+            return
+        if not tokens and len(first.rows) < top_n:
+            logger.info(f"First leaderboard page has {len(first.rows)} rows, downloading the full leaderboard for the top {top_n}")
+            return self.fetch_and_ingest(competition, result, force)
+        
+        page_stats = {'pages': 0, 'fetch_seconds': 0.0, 'complete': False}
+        
+        def chunks():
+            page = first
+            while page is not None:
+                page_stats['pages'] += 1
+                page_stats['fetch_seconds'] += page.fetch_seconds
+                rows = [row for row in page.rows if not top_n or row.rank <= top_n]
+                yield rows
+                if top_n and len(rows) < len(page.rows):
+                    return
+                if not page.next_page_token or not page.rows:
+                    # Only an empty or short last page shows the end of the leaderboard
+                    # was reached; a full one without a token may be a listing cut short
+                    page_stats['complete'] = tokens and (
+                        not page.rows or page is not first and len(page.rows) < len(first.rows)
+                    )
+                    return
+                page = next(pages, None)
+        
+        result['entries_processed'] = self.ingest_leaderboard_chunks(
+            chunks(), competition, partial=lambda: bool(top_n) or not page_stats['complete'],
+            stop_when_unchanged=stop_when_unchanged, members_listed=False
+        )
+        result['pages'] = page_stats['pages']
+        result['timings']['download_seconds'] = round(page_stats['fetch_seconds'], 3)
+        if not self.last_ingest_stats:
+            result['error'] = "Failed to update database"
+            return
+        
+        result['partial'] = self.last_ingest_stats['partial']
+        changed = self.last_change_set.has_changes
+        if not changed:
+            result['skipped'] = True
+        # Pulling a page counts as parse time in the ingest stats, minus the fetch itself
+        parse_seconds = max(0.0, self.last_ingest_stats['parse_seconds'] - page_stats['fetch_seconds'])
+        self.record_ingest(competition, result, '' if changed else None, parse_seconds)
+    
+    def sync_competitions_pipelined(self, competitions, download_workers=None, queue_size=None, trigger='batch'):
+        """
+        Sync several competitions with downloads and database writes overlapping.
+        
+        Downloads run in a small thread pool and hand finished downloads to a
+        bounded queue; the calling thread is the single writer draining it, so
+        competition N+1 downloads while competition N is being written. The
+        bounded queue stops downloads from running far ahead of the writer
+        (and piling up files on disk). Only the writer touches the database.
+        
+        How much the two stages overlapped is logged and kept on
+        last_pipeline_stats (see measure_overlap).
+        
+        Args:
+            competitions: Competition objects to sync
+            download_workers: Parallel downloads, defaults to KAGGLE_SYNC_DOWNLOAD_WORKERS
+            queue_size: Downloads allowed to wait for the writer, defaults to KAGGLE_SYNC_QUEUE_SIZE
+            trigger: What started the syncs, stored on their SyncRuns
+        
+        Returns:
+            list: Sync result dicts, in the order competitions finished
+        """
+        download_workers = download_workers or getattr(settings, 'KAGGLE_SYNC_DOWNLOAD_WORKERS', 2)
+        queue_size = queue_size or getattr(settings, 'KAGGLE_SYNC_QUEUE_SIZE', 2)
+        competitions = list(competitions)
+        
+        if self.fetcher.paged:
+            # Paged fetchers already overlap listing and writing page by page
+            self.last_pipeline_stats = {}
+            return [self.sync_competition_leaderboard(competition, trigger=trigger) for competition in competitions]
+        
+        downloads = queue.Queue(maxsize=queue_size)
+        download_spans = []
+        write_spans = []
+        started = time.perf_counter()
+        
+        def download(competition):
+            started_at = timezone.now()
+            begin = time.perf_counter()
+            try:
+                fetched = self.fetcher.fetch(self.competition_slug(competition))
+            except Exception as e:
+                logger.error(f"Error downloading leaderboard for {competition.title}: {e}")
+                fetched = None
+            end = time.perf_counter()
+            download_spans.append((begin, end))
+            downloads.put((competition, fetched, started_at, round(end - begin, 3)))
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=download_workers) as pool:
+            for competition in competitions:
+                pool.submit(download, competition)
             
-            # Step 2: Process CSV and update database
-            entries_processed = self.process_csv_and_update_db(csv_path, competition)
-            result['entries_processed'] = entries_processed
+            for _ in competitions:
+                competition, fetched, started_at, download_seconds = downloads.get()
+                result = self.new_result(competition)
+                result['timings']['download_seconds'] = download_seconds
+                
+                if fetched is None:
+                    result['error'] = "Failed to fetch leaderboard"
+                else:
+                    begin = time.perf_counter()
+                    try:
+                        self.ingest_download(competition, fetched, result)
+                    except Exception as e:
+                        result['error'] = str(e)
+                        logger.error(f"Sync failed for {competition.title}: {e}")
+                    write_spans.append((begin, time.perf_counter()))
+                
+                self.record_sync_run(competition, result, started_at, trigger)
+                results.append(result)
+        
+        stats = measure_overlap(download_spans, write_spans)
+        stats['wall_seconds'] = round(time.perf_counter() - started, 3)
+        self.last_pipeline_stats = stats
+        logger.info(
+            f"Pipelined sync of {len(competitions)} competitions in {stats['wall_seconds']}s - "
+            f"download {stats['download_seconds']}s, write {stats['write_seconds']}s, "
+            f"overlap {stats['overlap_seconds']}s ({stats['overlap_ratio']:.0%} of write time)"
+        )
+        return results
+    
+    def ingest_download(self, competition, download, result, force=False):
+        """
+        Update the database from a downloaded leaderboard and delete the download.
+        
+        Args:
+            competition: Competition object from database
+            download: LeaderboardDownload returned by the fetcher
+            result: Sync result dict to fill in
+            force: Rewrite the leaderboard even if its digest matches the last sync
+        """
+        try:
+            result['timings']['download_bytes'] = download.size
+            streaming = self.should_stream(download.csv_size)
             
-            # Step 3: Delete CSV
-            self.cleanup_csv(csv_path)
+            if getattr(settings, 'KAGGLE_SYNC_IN_MEMORY', True):
+                # Step 2: Read the CSV straight out of the download
+                open_source = download.open_csv
+            else:
+                # Step 2: Save to CSV
+                csv_path = download.extract_csv()
+                open_source = lambda: open(csv_path, 'rb')
             
+            # Step 3: Update database
+            self.sync_from_source(competition, open_source, result, force, streaming)
+        finally:
+            # Step 4: Delete downloaded files
+            download.cleanup()
+    
+    def sync_from_source(self, competition, open_source, result, force=False, streaming=False):
+        """
+        Ingest a downloaded leaderboard unless it matches the last synced one.
+        
+        The CSV is hashed first; if the digest equals the one stored on the
+        competition the run is recorded as skipped and nothing is parsed or
+        written. Otherwise the CSV is parsed, ingested and the new digest stored.
+        
+        Args:
+            competition: Competition object from database
+            open_source: Callable returning a context manager that yields the
+                CSV as a binary stream; called once for hashing, once for parsing
+            result: Sync result dict to fill in
+            force: Ingest even if the digest is unchanged
+            streaming: Ingest in chunks with ingest_leaderboard_chunks
+        """
+        with open_source() as stream:
+            digest = leaderboard_digest(stream, competition)
+        
+        if not force and digest == competition.leaderboard_digest:
+            logger.info(f"Leaderboard unchanged for {competition.title}, skipping database update")
+            competition.record_leaderboard_sync()
+            result['skipped'] = True
             result['success'] = True
-            logger.info(f"Sync completed successfully for {competition.title}")
+            return
+        
+        if streaming:
+            # Parse time is measured chunk by chunk by the ingest itself
+            read_seconds = 0.0
+            with open_source() as stream:
+                result['entries_processed'] = self.ingest_leaderboard_chunks(self.read_row_chunks(stream), competition)
+        else:
+            phase_started = time.perf_counter()
+            with open_source() as stream:
+                rows = self.read_leaderboard_rows(stream)
+            read_seconds = time.perf_counter() - phase_started
             
-        except Exception as e:
-            result['error'] = str(e)
-            logger.error(f"Sync failed for {competition.title}: {e}")
+            result['entries_processed'] = self.ingest_leaderboard(rows, competition)
+        if not self.last_ingest_stats:
+            result['error'] = "Failed to update database"
+            return
         
-        return result
+        self.record_ingest(competition, result, digest, read_seconds + self.last_ingest_stats.get('parse_seconds', 0.0))
+    
+    def record_ingest(self, competition, result, digest, parse_seconds):
+        """
+        Finish a sync after a successful ingest: store the digest, fill in the
+        result and run the post-sync hooks.
+        
+        Args:
+            competition: Competition object from database
+            result: Sync result dict to fill in
+            digest: Digest of the ingested leaderboard, None if nothing changed
+            parse_seconds: Time spent parsing the leaderboard
+        """
+        competition.record_leaderboard_sync(digest)
+        stats = self.last_ingest_stats
+        result['timings'].update({
+            'parse_seconds': round(parse_seconds, 3),
+            'match_seconds': stats['match_seconds'],
+            'write_seconds': stats['write_seconds'],
+        })
+        result['rows'] = stats['rows']
+        result['changes'] = self.last_change_set.summary()
+        
+        # Step 3b: Cache invalidation and websocket pushes, only if data changed
+        result['hooks'] = run_post_sync_hooks(competition, self.last_change_set)
+        result['rows_per_second'] = self.last_ingest_stats.get('rows_per_second', 0.0)
+        result['success'] = True
+        logger.info(f"Sync completed successfully for {competition.title}")
 
 
 # Standalone function for testing
@@ -0,0 +1,386 @@
+"""
+Leaderboard fetchers used by KaggleLeaderboardSync.
+
+A fetcher downloads the complete leaderboard of a Kaggle competition into
+its own directory under the sync's temp directory and returns a
+LeaderboardDownload. The implementation is picked with the
+KAGGLE_LEADERBOARD_FETCHER setting:
+- 'api': in-process download through the worker's authenticated KaggleApi
+- 'cli': the kaggle CLI in a subprocess (original behaviour)
+- 'paged': lists the leaderboard page by page through the Kaggle API, so a
+  sync can stop after the top N or at the first unchanged page
+- 'local': copies leaderboards from KAGGLE_LEADERBOARD_LOCAL_DIR, for offline runs and tests
+"""
+import os
+import glob
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardDownload:
+    """
+    A downloaded leaderboard file (ZIP as served by Kaggle, or plain CSV).
+
+    The file lives in a directory owned by the download, removed by cleanup().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.directory = os.path.dirname(path)
+
+    @property
+    def size(self):
+        """Size of the downloaded file in bytes."""
+        return os.path.getsize(self.path)
+
+    @property
+    def is_zip(self):
+        return zipfile.is_zipfile(self.path)
+
+    @property
+    def csv_size(self):
+        """Uncompressed size of the leaderboard CSV in bytes."""
+        if not self.is_zip:
+            return self.size
+
+        with zipfile.ZipFile(self.path, 'r') as zf:
+            return sum(info.file_size for info in zf.infolist() if info.filename.endswith('.csv'))
+
+    @contextmanager
+    def open_csv(self):
+        """
+        Open the leaderboard CSV as a binary stream.
+
+        For ZIP downloads the CSV member is read straight from the archive,
+        nothing is extracted to disk.
+        """
+        if not self.is_zip:
+            with open(self.path, 'rb') as stream:
+                yield stream
+            return
+
+        with zipfile.ZipFile(self.path, 'r') as zf:
+            csv_members = [name for name in zf.namelist() if name.endswith('.csv')]
+            if not csv_members:
+                raise ValueError(f"No CSV file found in {self.path}")
+
+            with zf.open(csv_members[0]) as stream:
+                yield stream
+
+    def extract_csv(self):
+        """
+        Extract the leaderboard CSV next to the download.
+
+        Returns:
+            str: Path to the CSV file
+        """
+        if not self.is_zip:
+            return self.path
+
+        logger.info(f"Extracting {os.path.basename(self.path)}...")
+        with zipfile.ZipFile(self.path, 'r') as zf:
+            zf.extractall(self.directory)
+
+        # Find extracted CSV (handle Windows path issues with colons in filename)
+        csv_files = [f for f in os.listdir(self.directory) if f.endswith('.csv')]
+        if not csv_files:
+            raise ValueError(f"No CSV file found after extraction in {self.directory}")
+
+        csv_file = csv_files[0]
+        csv_path = os.path.join(self.directory, csv_file)
+
+        # Rename CSV if it has colons (Windows path issue with ISO timestamp)
+        if ':' in csv_file:
+            new_name = csv_file.replace(':', '_').replace('T', '_T_')
+            new_path = os.path.join(self.directory, new_name)
+            shutil.move(csv_path, new_path)
+            csv_path = new_path
+            logger.info(f"Renamed CSV to avoid Windows path issues: {new_name}")
+
+        # Clean up ZIP file
+        os.remove(self.path)
+        self.path = csv_path
+
+        return csv_path
+
+    def cleanup(self):
+        """Delete the download directory."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class LeaderboardPage:
+    """
+    One page of a paged leaderboard listing.
+
+    Attributes:
+        rows: LeaderboardRow records of the page, ranked from 1 across pages
+        next_page_token: Token of the following page, None on the last page
+        fetch_seconds: Time spent fetching the page
+    """
+    __slots__ = ('rows', 'next_page_token', 'fetch_seconds')
+
+    def __init__(self, rows, next_page_token=None, fetch_seconds=0.0):
+        self.rows = rows
+        self.next_page_token = next_page_token
+        self.fetch_seconds = fetch_seconds
+
+
+class LeaderboardFetcher:
+    """
+    Base class for leaderboard fetchers.
+
+    Fetchers with paged = True also implement iter_pages and
+    supports_page_tokens; KaggleLeaderboardSync then ingests their pages as
+    they arrive (see sync_from_pages).
+    """
+
+    paged = False
+
+    def __init__(self, temp_dir):
+        self.temp_dir = temp_dir
+
+    def make_download_dir(self, competition_slug):
+        """Create a unique download directory for one fetch."""
+        download_path = os.path.join(self.temp_dir, f"{competition_slug}_{time.time_ns()}")
+        os.makedirs(download_path, exist_ok=True)
+        return download_path
+
+    def fetch(self, competition_slug):
+        """
+        Download the complete leaderboard of a competition.
+
+        Args:
+            competition_slug: Kaggle competition slug
+
+        Returns:
+            LeaderboardDownload: The downloaded leaderboard, or None on failure
+        """
+        raise NotImplementedError
+
+    def find_download(self, download_path):
+        """Wrap the leaderboard file in download_path, removing the directory if there is none."""
+        files = [f for f in os.listdir(download_path) if f.endswith(('.zip', '.csv'))]
+        if not files:
+            logger.error(f"No leaderboard file found in {download_path}")
+            shutil.rmtree(download_path, ignore_errors=True)
+            return None
+        return LeaderboardDownload(os.path.join(download_path, files[0]))
+
+
+class KaggleApiFetcher(LeaderboardFetcher):
+    """
+    Downloads leaderboards in-process with the worker's authenticated KaggleApi.
+
+    Avoids spawning the kaggle CLI (interpreter startup plus package import)
+    for every competition on every sync.
+
+    Args:
+        service: KaggleService to call through, defaults to get_kaggle_service();
+            pass one wrapping KaggleStandInApi to sync against the offline stand-in
+    """
+
+    def __init__(self, temp_dir, service=None):
+        super().__init__(temp_dir)
+        self._service = service
+
+    @property
+    def service(self):
+        from apps.submissions.kaggle_service import get_kaggle_service
+
+        return self._service or get_kaggle_service()
+
+    def fetch(self, competition_slug):
+        logger.info(f"Downloading full leaderboard for: {competition_slug}")
+        download_path = self.make_download_dir(competition_slug)
+
+        try:
+            # Rate limited and spread over the credential pool by KaggleService
+            self.service.call(
+                'competition_leaderboard_download', competition_slug, download_path, quiet=True
+            )
+        except Exception as e:
+            logger.error(f"Error downloading leaderboard: {e}")
+            shutil.rmtree(download_path, ignore_errors=True)
+            return None
+
+        return self.find_download(download_path)
+
+
+class KaggleApiPagedFetcher(KaggleApiFetcher):
+    """
+    Lists leaderboards page by page through the Kaggle API leaderboard view.
+
+    Pages are yielded as they arrive, so the sync can ingest them while the
+    next one is requested and stop early without downloading the full ZIP.
+    Each page request goes through the shared rate limiter.
+
+    Page tokens are only available with Kaggle clients that still have
+    competition_view_leaderboard (returning nextPageToken); the current SDK's
+    competition_leaderboard_view returns just the top of the leaderboard with
+    no token. supports_page_tokens tells the two apart, and fetch() still
+    downloads the full ZIP for syncs that need the whole leaderboard.
+    """
+
+    paged = True
+
+    @property
+    def supports_page_tokens(self):
+        return hasattr(self.service.api, 'competition_view_leaderboard')
+
+    def request_page(self, competition_slug, page_token=None):
+        """
+        Request one page of the leaderboard view.
+
+        Returns:
+            tuple: (list of Kaggle leaderboard submissions, next page token or None)
+        """
+        service = self.service
+        if not self.supports_page_tokens:
+            return service.call('competition_leaderboard_view', competition_slug) or [], None
+
+        kwargs = {'page_token': page_token} if page_token else {}
+        response = service.call('competition_view_leaderboard', competition_slug, **kwargs) or {}
+        return response.get('submissions') or [], response.get('nextPageToken') or None
+
+    def iter_pages(self, competition_slug):
+        """
+        List a competition's leaderboard page by page.
+
+        Yields:
+            LeaderboardPage: Pages in rank order; errors propagate to the caller
+        """
+        from .leaderboard_parser import leaderboard_row_from_submission
+
+        logger.info(f"Listing leaderboard pages for: {competition_slug}")
+        page_token = None
+        rank = 0
+        while True:
+            started = time.perf_counter()
+            submissions, page_token = self.request_page(competition_slug, page_token)
+            rows = []
+            for submission in submissions:
+                rank += 1
+                rows.append(leaderboard_row_from_submission(submission, rank))
+            yield LeaderboardPage(rows, page_token, time.perf_counter() - started)
+
+            if not page_token or not rows:
+                return
+
+
+class KaggleCliFetcher(LeaderboardFetcher):
+    """
+    Downloads leaderboards with the kaggle CLI in a subprocess.
+
+    Requires: Kaggle 1.7.4.5+ for --download flag to work properly
+    """
+
+    def fetch(self, competition_slug):
+        from apps.submissions.kaggle_rate_limit import get_kaggle_rate_limiter
+
+        logger.info(f"Downloading full leaderboard for: {competition_slug}")
+        download_path = self.make_download_dir(competition_slug)
+
+        try:
+            # Take a token from the shared rate limiter and run with its credential
+            credential = get_kaggle_rate_limiter().acquire()
+            env = os.environ.copy()
+            if credential.key:
+                env['KAGGLE_USERNAME'] = credential.username
+                env['KAGGLE_KEY'] = credential.key
+
+            # Use full path to kaggle executable in virtual environment (Windows compatibility)
+            kaggle_exe = os.path.join(os.path.dirname(sys.executable), 'kaggle.exe')
+            if not os.path.exists(kaggle_exe):
+                # Try without .exe for Unix systems
+                kaggle_exe = os.path.join(os.path.dirname(sys.executable), 'kaggle')
+
+            logger.info(f"Running: {kaggle_exe} competitions leaderboard {competition_slug} --download")
+            subprocess.run(
+                [kaggle_exe, 'competitions', 'leaderboard', competition_slug, '--download', '--path', download_path],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=env,
+                timeout=300  # 5 minute timeout
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Kaggle CLI error: {e.stderr}")
+            shutil.rmtree(download_path, ignore_errors=True)
+            return None
+        except subprocess.TimeoutExpired:
+            logger.error(f"Download timeout for {competition_slug}")
+            shutil.rmtree(download_path, ignore_errors=True)
+            return None
+        except Exception as e:
+            logger.error(f"Error downloading leaderboard: {e}")
+            shutil.rmtree(download_path, ignore_errors=True)
+            return None
+
+        return self.find_download(download_path)
+
+
+class LocalFileFetcher(LeaderboardFetcher):
+    """
+    Serves leaderboards from a local directory instead of Kaggle.
+
+    Looks for <slug>.zip, <slug>.csv or <slug>*.csv (e.g. the exports in
+    all_leaderboard_data/) and copies the file into a fresh download
+    directory, so the sync can clean up after it like after a real download.
+    """
+
+    def __init__(self, temp_dir, source_dir=None):
+        super().__init__(temp_dir)
+        self.source_dir = str(source_dir or settings.KAGGLE_LEADERBOARD_LOCAL_DIR)
+
+    def find_source(self, competition_slug):
+        for pattern in (f'{competition_slug}.zip', f'{competition_slug}.csv', f'{competition_slug}*.csv'):
+            matches = sorted(glob.glob(os.path.join(glob.escape(self.source_dir), pattern)))
+            if matches:
+                return matches[0]
+        return None
+
+    def fetch(self, competition_slug):
+        source = self.find_source(competition_slug)
+        if not source:
+            logger.error(f"No local leaderboard for {competition_slug} in {self.source_dir}")
+            return None
+
+        download_path = self.make_download_dir(competition_slug)
+        path = shutil.copy(source, download_path)
+        logger.info(f"Using local leaderboard file: {source}")
+        return LeaderboardDownload(path)
+
+
+LEADERBOARD_FETCHERS = {
+    'api': KaggleApiFetcher,
+    'cli': KaggleCliFetcher,
+    'paged': KaggleApiPagedFetcher,
+    'local': LocalFileFetcher,
+}
+
+
+def get_leaderboard_fetcher(temp_dir, name=None):
+    """
+    Create the leaderboard fetcher selected by KAGGLE_LEADERBOARD_FETCHER.
+
+    Args:
+        temp_dir: Directory downloads are placed in
+        name: Fetcher name, overrides the setting
+    """
+    name = name or getattr(settings, 'KAGGLE_LEADERBOARD_FETCHER', 'api')
+    try:
+        fetcher_class = LEADERBOARD_FETCHERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown KAGGLE_LEADERBOARD_FETCHER '{name}', expected one of: {', '.join(LEADERBOARD_FETCHERS)}"
+        )
+    return fetcher_class(temp_dir)
@@ -0,0 +1,190 @@
+"""
+Pandas-free parsing of Kaggle leaderboard CSVs.
+
+Rows are read with the stdlib csv module and turned into slotted
+LeaderboardRow records with typed fields, so the sync does not need pandas
+(and its import time and memory) in every web and Celery process.
+
+CSV Format from Kaggle: Rank, TeamId, TeamName, LastSubmissionDate, Score, SubmissionCount, TeamMemberUserNames
+"""
+import csv
+import io
+import math
+from datetime import datetime, timezone as dt_timezone
+from django.utils.dateparse import parse_datetime
+
+# Kaggle calls the column LastSubmissionDate in downloads, SubmissionDate in exports
+DATE_COLUMNS = ('LastSubmissionDate', 'SubmissionDate')
+
+REQUIRED_COLUMNS = ('Rank', 'TeamName', 'Score')
+
+
+class LeaderboardRow:
+    """
+    One team on a Kaggle leaderboard.
+
+    Attributes:
+        rank: Leaderboard rank (0 if missing)
+        team_id: Kaggle TeamId, or None
+        team_name: Team name ('' if missing)
+        score: Raw metric value as a float, or None if it is not a number
+        submission_date: Last submission as an aware UTC datetime, or None
+        member_usernames: Kaggle's comma-separated TeamMemberUserNames value
+    """
+    __slots__ = ('rank', 'team_id', 'team_name', 'score', 'submission_date', 'member_usernames')
+
+    def __init__(self, rank, team_id, team_name, score, submission_date=None, member_usernames=''):
+        self.rank = rank
+        self.team_id = team_id
+        self.team_name = team_name
+        self.score = score
+        self.submission_date = submission_date
+        self.member_usernames = member_usernames
+
+    def __repr__(self):
+        return f"<LeaderboardRow {self.rank}: {self.team_name} ({self.score})>"
+
+
+def parse_int(value, default=None):
+    """Parse an integer cell, tolerating '12.0'; default if empty or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            return default
+
+
+def parse_float(value):
+    """Parse a score cell; None if empty, invalid or NaN."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def parse_timestamp(value):
+    """Parse a submission date cell (or datetime) into an aware UTC datetime, or None."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = parse_datetime(str(value).strip())
+        except ValueError:
+            return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed.astimezone(dt_timezone.utc)
+
+
+def iter_leaderboard_rows(stream, encoding='utf-8-sig'):
+    """
+    Parse a Kaggle leaderboard CSV lazily, one LeaderboardRow at a time.
+
+    Args:
+        stream: Binary file-like object positioned at the start of the CSV
+        encoding: Text encoding of the CSV
+
+    Yields:
+        LeaderboardRow: One per non-empty CSV line
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        columns = {name.strip(): index for index, name in enumerate(header)}
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Leaderboard CSV is missing columns: {', '.join(missing)}")
+
+        rank_col = columns['Rank']
+        name_col = columns['TeamName']
+        score_col = columns['Score']
+        team_id_col = columns.get('TeamId')
+        members_col = columns.get('TeamMemberUserNames')
+        date_col = next((columns[name] for name in DATE_COLUMNS if name in columns), None)
+        width = len(header)
+
+        for values in reader:
+            if not values:
+                continue
+            if len(values) < width:
+                values += [''] * (width - len(values))
+
+            yield LeaderboardRow(
+                rank=parse_int(values[rank_col], 0),
+                team_id=parse_int(values[team_id_col]) if team_id_col is not None else None,
+                team_name=values[name_col],
+                score=parse_float(values[score_col]),
+                submission_date=parse_timestamp(values[date_col]) if date_col is not None else None,
+                member_usernames=values[members_col] if members_col is not None else '',
+            )
+    finally:
+        # Leave closing the underlying stream to its owner
+        try:
+            text.detach()
+        except ValueError:
+            # Underlying stream was already closed
+            pass
+
+
+def leaderboard_row_from_submission(submission, rank):
+    """
+    Build a LeaderboardRow from one entry of the Kaggle API leaderboard view.
+
+    Accepts both the SDK's submission objects (team_name, ...) and the JSON
+    dicts of older clients (teamName, ...). The API does not list team
+    members, so member_usernames stays empty; syncs match such rows to the
+    entries of registered users by TeamId instead (see
+    KaggleLeaderboardSync.load_existing_entries).
+
+    Args:
+        submission: Leaderboard entry returned by the Kaggle API
+        rank: Position of the entry in the listing, starting at 1
+    """
+    def field(*names):
+        for name in names:
+            if isinstance(submission, dict):
+                value = submission.get(name)
+            else:
+                value = getattr(submission, name, None)
+            if value is not None:
+                return value
+        return None
+
+    return LeaderboardRow(
+        rank=rank,
+        team_id=parse_int(field('team_id', 'teamId')),
+        team_name=field('team_name', 'teamName') or '',
+        score=parse_float(field('score', 'publicScore')),
+        submission_date=parse_timestamp(field('submission_date', 'submissionDate')),
+    )
+
+
+def iter_row_chunks(rows, size):
+    """
+    Group rows into lists of at most size rows.
+
+    Yields:
+        list: Consecutive LeaderboardRow objects
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,117 @@
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.competitions.models import Competition
+from apps.competitions.kaggle_leaderboard_sync import KaggleLeaderboardSync
+from apps.competitions.leaderboard_fetchers import KaggleApiFetcher, KaggleApiPagedFetcher
+from apps.submissions.kaggle_service import KaggleService
+from apps.submissions.kaggle_standin import KaggleStandInApi
+
+FETCHERS = {
+    'api': KaggleApiFetcher,
+    'paged': KaggleApiPagedFetcher,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark end-to-end leaderboard syncs (download, parse, match, write) against the '
+        'offline Kaggle stand-in, with synthetic leaderboards of the given sizes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Leaderboard sizes (number of teams) to benchmark'
+        )
+        parser.add_argument(
+            '--syncs',
+            type=int,
+            default=3,
+            help='Syncs per size: the first inserts everything, later ones see --churn'
+        )
+        parser.add_argument('--fetcher', choices=sorted(FETCHERS), default='api')
+        parser.add_argument('--churn', type=float, default=0.01, help='Fraction of teams resubmitting between syncs')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds per Kaggle call (plus jitter)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of Kaggle calls that fail')
+        parser.add_argument('--partial-rate', type=float, default=0.0, help='Fraction of truncated listings')
+        parser.add_argument('--page-size', type=int, default=50, help='Entries per leaderboard view page')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--rate-limit', action='store_true', help='Apply the shared Kaggle API rate limit')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark competitions and their entries')
+
+    def handle(self, *args, **options):
+        if options['syncs'] < 1:
+            raise CommandError('--syncs must be at least 1')
+
+        api = KaggleStandInApi(
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            partial_rate=options['partial_rate'],
+            churn=options['churn'],
+            page_size=options['page_size'],
+            seed=options['seed'],
+        )
+        service = KaggleService(api=api, rate_limited=options['rate_limit'])
+
+        self.stdout.write(
+            f"{'Rows':>9} {'Sync':>4} {'Outcome':>9} {'Download':>9} {'Parse':>7} {'Match':>7} "
+            f"{'Write':>7} {'Total':>7} {'Rows/s':>9}  Changes"
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fetcher = FETCHERS[options['fetcher']](temp_dir, service=service)
+            syncer = KaggleLeaderboardSync(fetcher=fetcher)
+
+            for size in options['sizes']:
+                competition = self._create_competition(size)
+                try:
+                    for run in range(1, options['syncs'] + 1):
+                        started = timezone.now()
+                        result = syncer.sync_competition_leaderboard(competition, trigger='benchmark')
+                        self._report(size, run, result, (timezone.now() - started).total_seconds())
+                finally:
+                    if not options['keep']:
+                        competition.delete()
+
+        self.stdout.write(f"Stand-in served {api.calls} Kaggle API calls")
+
+    def _create_competition(self, size):
+        slug = f'synthetic-{size}-benchmark'
+        if Competition.objects.filter(kaggle_competition_id=slug).exists():
+            raise CommandError(f"Competition '{slug}' already exists (left by --keep?), delete it first")
+
+        now = timezone.now()
+        competition = Competition.objects.create(
+            title=f'Sync benchmark ({size} teams)',
+            description='Created by benchmark_kaggle_sync',
+            start_date=now,
+            end_date=now + timezone.timedelta(days=30),
+        )
+        # Set the slug without a save, so the post_save signal does not queue a real sync
+        Competition.objects.filter(pk=competition.pk).update(kaggle_competition_id=slug)
+        competition.refresh_from_db()
+        return competition
+
+    def _report(self, size, run, result, total_seconds):
+        timings = result.get('timings', {})
+        if not result.get('success'):
+            outcome = 'failed'
+        elif result.get('skipped'):
+            outcome = 'unchanged'
+        else:
+            outcome = 'success'
+        changes = result.get('changes') or {}
+        changes_text = ', '.join(f"{key} {value}" for key, value in changes.items()) or result.get('error') or ''
+
+        def seconds(key):
+            value = timings.get(key)
+            return f"{value:.3f}" if value is not None else '-'
+
+        self.stdout.write(
+            f"{size:>9} {run:>4} {outcome:>9} {seconds('download_seconds'):>9} {seconds('parse_seconds'):>7} "
+            f"{seconds('match_seconds'):>7} {seconds('write_seconds'):>7} {total_seconds:>7.3f} "
+            f"{result.get('rows_per_second', 0.0) or 0.0:>9.1f}  {changes_text}"
+        )
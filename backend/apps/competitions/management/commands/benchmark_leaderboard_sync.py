@@ -0,0 +1,95 @@
+import io
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from apps.competitions.models import Competition
+from apps.competitions.kaggle_leaderboard_sync import leaderboard_rows_from_frame, normalize_score
+from apps.competitions.leaderboard_parser import iter_leaderboard_rows
+
+
+def build_synthetic_leaderboard(size, seed=0):
+    """Build a Kaggle-style leaderboard DataFrame with the given number of teams."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2025-10-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 30 * 86400, size), unit='s')
+    return pd.DataFrame({
+        'Rank': np.arange(1, size + 1),
+        'TeamId': np.arange(1_000_000, 1_000_000 + size),
+        'TeamName': [f'team-{i}' for i in range(size)],
+        'LastSubmissionDate': dates.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+        'Score': np.sort(rng.random(size))[::-1].round(5),
+        'SubmissionCount': rng.integers(1, 50, size),
+        'TeamMemberUserNames': [f'user-{i}' for i in range(size)],
+    })
+
+
+def prepare_per_row(data, competition):
+    """Row preparation as the sync did it before vectorization: read_csv, then one iterrows() pass."""
+    df = pd.read_csv(io.BytesIO(data))
+    records = []
+    for _, row in df.iterrows():
+        submission_date = row.get('LastSubmissionDate')
+        records.append({
+            'team_name': row['TeamName'],
+            'rank': row['Rank'],
+            'score': normalize_score(float(row['Score']), competition),
+            'submission_date': pd.to_datetime(submission_date) if pd.notna(submission_date) else None,
+            'member_usernames': row.get('TeamMemberUserNames', ''),
+        })
+    return records
+
+
+def prepare_pandas(data, competition):
+    """Optional pandas parser: read_csv plus column-wise conversion and score normalization."""
+    rows = leaderboard_rows_from_frame(pd.read_csv(io.BytesIO(data), float_precision='round_trip'))
+    return [normalize_score(row.score, competition) for row in rows]
+
+
+def prepare_csv(data, competition):
+    """Default stdlib csv parser plus score normalization."""
+    rows = list(iter_leaderboard_rows(io.BytesIO(data)))
+    return [normalize_score(row.score, competition) for row in rows]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Kaggle leaderboard parsing: per-row pandas vs column-wise pandas vs stdlib csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Leaderboard sizes (number of teams) to benchmark'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Runs per measurement, the fastest run is reported'
+        )
+
+    def handle(self, *args, **options):
+        # Unsaved competition, only its scoring configuration is used
+        competition = Competition(
+            higher_is_better=True,
+            metric_min_value=0.0,
+            metric_max_value=1.0,
+            points_for_perfect_score=100.0,
+        )
+
+        self.stdout.write(f"{'Rows':>10} {'Per-row (s)':>12} {'Pandas (s)':>11} {'csv (s)':>9}")
+        for size in options['sizes']:
+            data = build_synthetic_leaderboard(size).to_csv(index=False).encode()
+            per_row = self._best_time(prepare_per_row, data, competition, options['repeat'])
+            pandas_time = self._best_time(prepare_pandas, data, competition, options['repeat'])
+            csv_time = self._best_time(prepare_csv, data, competition, options['repeat'])
+            self.stdout.write(f"{size:>10} {per_row:>12.3f} {pandas_time:>11.3f} {csv_time:>9.3f}")
+
+    def _best_time(self, prepare, data, competition, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            prepare(data, competition)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
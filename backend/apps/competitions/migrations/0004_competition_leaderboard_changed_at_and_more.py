@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0003_competition_higher_is_better_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='leaderboard_changed_at',
+            field=models.DateTimeField(blank=True, help_text='Last leaderboard sync that wrote new data', null=True),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='leaderboard_checked_at',
+            field=models.DateTimeField(blank=True, help_text='Last leaderboard sync run, including runs skipped because nothing changed', null=True),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='leaderboard_digest',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the last ingested Kaggle leaderboard, unchanged downloads are skipped', max_length=64),
+        ),
+    ]
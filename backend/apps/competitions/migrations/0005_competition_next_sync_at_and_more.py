@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0004_competition_leaderboard_changed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When the leaderboard is next due for a sync (empty means due now)', null=True),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='sync_interval_seconds',
+            field=models.IntegerField(default=300, help_text='Current leaderboard sync interval, shrinks while the leaderboard changes and grows while it is quiet'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0005_competition_next_sync_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(blank=True, help_text='What started the sync, e.g. task, batch, manual', max_length=20)),
+                ('outcome', models.CharField(choices=[('success', 'Success'), ('unchanged', 'Unchanged'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('download_seconds', models.FloatField(blank=True, null=True)),
+                ('download_bytes', models.BigIntegerField(blank=True, null=True)),
+                ('parse_seconds', models.FloatField(blank=True, null=True)),
+                ('match_seconds', models.FloatField(blank=True, null=True)),
+                ('write_seconds', models.FloatField(blank=True, null=True)),
+                ('total_seconds', models.FloatField(blank=True, null=True)),
+                ('rows', models.IntegerField(default=0)),
+                ('rows_inserted', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+                ('rows_removed', models.IntegerField(default=0)),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_runs', to='competitions.competition')),
+            ],
+            options={
+                'db_table': 'competition_sync_runs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['competition', '-started_at'], name='competition_competi_fe49f3_idx'), models.Index(fields=['outcome', '-started_at'], name='competition_outcome_71b23f_idx')],
+            },
+        ),
+    ]
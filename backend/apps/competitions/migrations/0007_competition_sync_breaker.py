@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0006_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='last_sync_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='sync_breaker_state',
+            field=models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half-open')], default='closed', help_text='Open after repeated failures: no syncs until sync_retry_at, then one half-open probe', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='sync_failure_count',
+            field=models.IntegerField(default=0, help_text='Consecutive failed leaderboard syncs'),
+        ),
+        migrations.AddField(
+            model_name='competition',
+            name='sync_retry_at',
+            field=models.DateTimeField(blank=True, help_text='Failing leaderboard syncs are not retried before this time', null=True),
+        ),
+    ]
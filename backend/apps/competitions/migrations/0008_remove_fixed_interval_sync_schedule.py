@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.utils import timezone
+
+FIXED_INTERVAL_SYNC_TASK = 'apps.competitions.tasks.sync_kaggle_leaderboard_auto'
+
+
+def remove_fixed_interval_sync(apps, schema_editor):
+    """
+    Delete the 5-minute full sync stored by the DatabaseScheduler.
+
+    Entries renamed in config/celery.py's beat_schedule are added to the database but
+    the old rows are never removed, so the fixed-interval sync would keep
+    running next to dispatch_due_leaderboard_syncs.
+    """
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTasks = apps.get_model('django_celery_beat', 'PeriodicTasks')
+
+    deleted, _ = PeriodicTask.objects.filter(task=FIXED_INTERVAL_SYNC_TASK).delete()
+    if deleted:
+        # Historical models send no signals the scheduler listens to: tell it the schedule changed
+        PeriodicTasks.objects.update_or_create(ident=1, defaults={'last_update': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0007_competition_sync_breaker'),
+        ('django_celery_beat', '0018_improve_crontab_helptext'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_fixed_interval_sync, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class CompetitionEvent(models.Model):
@@ -127,6 +130,57 @@ class Competition(models.Model):
         help_text='Maximum points awarded for perfect score (PS points)'
     )
     
+    # Leaderboard sync bookkeeping
+    leaderboard_digest = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text='SHA-256 of the last ingested Kaggle leaderboard, unchanged downloads are skipped'
+    )
+    leaderboard_checked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Last leaderboard sync run, including runs skipped because nothing changed'
+    )
+    leaderboard_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Last leaderboard sync that wrote new data'
+    )
+    sync_interval_seconds = models.IntegerField(
+        default=300,
+        help_text='Current leaderboard sync interval, shrinks while the leaderboard changes and grows while it is quiet'
+    )
+    next_sync_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text='When the leaderboard is next due for a sync (empty means due now)'
+    )
+    
+    # Circuit breaker for competitions whose syncs keep failing
+    SYNC_BREAKER_CHOICES = [
+        ('closed', 'Closed'),
+        ('open', 'Open'),
+        ('half_open', 'Half-open'),
+    ]
+    sync_failure_count = models.IntegerField(
+        default=0,
+        help_text='Consecutive failed leaderboard syncs'
+    )
+    sync_breaker_state = models.CharField(
+        max_length=10,
+        choices=SYNC_BREAKER_CHOICES,
+        default='closed',
+        help_text='Open after repeated failures: no syncs until sync_retry_at, then one half-open probe'
+    )
+    sync_retry_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Failing leaderboard syncs are not retried before this time'
+    )
+    last_sync_error = models.TextField(blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -141,6 +195,15 @@ class Competition(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the status and event as loaded, so post_save can tell whether they changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_event_id = instance.__dict__.get('event_id')
+        instance._loaded_points_for_perfect_score = instance.__dict__.get('points_for_perfect_score')
+        return instance
+
     def update_status(self):
         """Update competition status based on current time."""
         now = timezone.now()
@@ -172,7 +235,266 @@ class Competition(models.Model):
         """Calculate competition duration in days."""
         return (self.end_date - self.start_date).days
 
+    def next_sync_interval(self, changed, now=None):
+        """
+        Work out the sync interval after a sync run.
+        
+        The interval halves after a run that found changes and doubles after
+        one that did not, within KAGGLE_SYNC_MIN_INTERVAL and
+        KAGGLE_SYNC_MAX_INTERVAL. Within KAGGLE_SYNC_DEADLINE_WINDOW_HOURS of
+        end_date the minimum interval is used, so final standings stay fresh.
+        
+        Args:
+            changed: Whether the run wrote new leaderboard data
+            now: Current time, defaults to timezone.now()
+        
+        Returns:
+            int: Interval in seconds
+        """
+        from django.conf import settings
+        
+        now = now or timezone.now()
+        min_interval = getattr(settings, 'KAGGLE_SYNC_MIN_INTERVAL', 60)
+        max_interval = getattr(settings, 'KAGGLE_SYNC_MAX_INTERVAL', 3600)
+        deadline_window = timezone.timedelta(hours=getattr(settings, 'KAGGLE_SYNC_DEADLINE_WINDOW_HOURS', 24))
+        
+        if now <= self.end_date <= now + deadline_window:
+            return min_interval
+        
+        interval = self.sync_interval_seconds or min_interval
+        interval = interval // 2 if changed else interval * 2
+        return max(min_interval, min(max_interval, interval))
+
+    def record_leaderboard_sync(self, digest=None):
+        """
+        Record a leaderboard sync run and schedule the next one.
+        
+        Pass the digest of the ingested leaderboard when the run wrote data,
+        leave it out for runs that were skipped as unchanged. Uses a queryset
+        update so that the post_save sync trigger does not fire again.
+        """
+        now = timezone.now()
+        interval = self.next_sync_interval(changed=digest is not None, now=now)
+        fields = {
+            'leaderboard_checked_at': now,
+            'sync_interval_seconds': interval,
+            'next_sync_at': now + timezone.timedelta(seconds=interval),
+        }
+        if digest is not None:
+            fields['leaderboard_digest'] = digest
+            fields['leaderboard_changed_at'] = now
+        
+        # A sync that got this far succeeded, close the circuit breaker
+        fields.update({
+            'sync_failure_count': 0,
+            'sync_breaker_state': 'closed',
+            'sync_retry_at': None,
+            'last_sync_error': '',
+        })
+        
+        Competition.objects.filter(pk=self.pk).update(**fields)
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    def sync_retry_delay(self, failures):
+        """
+        Seconds to wait before retrying after a number of consecutive failures.
+        
+        Backs off exponentially from KAGGLE_SYNC_BACKOFF_BASE up to
+        KAGGLE_SYNC_BACKOFF_MAX; from KAGGLE_SYNC_BREAKER_THRESHOLD failures on
+        the breaker is open and KAGGLE_SYNC_BREAKER_COOLDOWN applies.
+        """
+        from django.conf import settings
+        
+        if failures >= getattr(settings, 'KAGGLE_SYNC_BREAKER_THRESHOLD', 5):
+            return getattr(settings, 'KAGGLE_SYNC_BREAKER_COOLDOWN', 6 * 3600)
+        
+        base = getattr(settings, 'KAGGLE_SYNC_BACKOFF_BASE', 60)
+        return min(getattr(settings, 'KAGGLE_SYNC_BACKOFF_MAX', 3600), base * 2 ** max(0, failures - 1))
+
+    def record_sync_failure(self, error='', now=None):
+        """
+        Record a failed leaderboard sync and back off.
+        
+        The retry time moves out exponentially with every consecutive failure.
+        After KAGGLE_SYNC_BREAKER_THRESHOLD failures, or when a half-open probe
+        fails, the breaker opens and the competition is left alone for
+        KAGGLE_SYNC_BREAKER_COOLDOWN. Uses a queryset update so that the
+        post_save sync trigger does not fire again.
+        """
+        from django.conf import settings
+        
+        now = now or timezone.now()
+        failures = self.sync_failure_count + 1
+        if self.sync_breaker_state == 'half_open':
+            # The probe failed, stay open for another cooldown
+            failures = max(failures, getattr(settings, 'KAGGLE_SYNC_BREAKER_THRESHOLD', 5))
+        
+        state = 'open' if failures >= getattr(settings, 'KAGGLE_SYNC_BREAKER_THRESHOLD', 5) else 'closed'
+        retry_at = now + timezone.timedelta(seconds=self.sync_retry_delay(failures))
+        fields = {
+            'sync_failure_count': failures,
+            'sync_breaker_state': state,
+            'sync_retry_at': retry_at,
+            'next_sync_at': retry_at,
+            'last_sync_error': error or '',
+        }
+        
+        Competition.objects.filter(pk=self.pk).update(**fields)
+        for field, value in fields.items():
+            setattr(self, field, value)
+        
+        if state == 'open':
+            logger.warning(
+                f"🔌 Sync circuit breaker open for '{self.title}' after {failures} failures, "
+                f"next probe at {retry_at.isoformat()}"
+            )
+
+    def claim_sync_attempt(self, now=None):
+        """
+        Whether a scheduled or triggered sync may run now.
+        
+        Backing-off competitions wait for sync_retry_at. Once an open breaker's
+        cooldown has passed, exactly one caller gets to run the half-open probe:
+        the state moves to half_open, with sync_retry_at pushed out by
+        KAGGLE_SYNC_LOCK_TIMEOUT so a lost probe is retried later.
+        
+        Returns:
+            bool: True if the sync should go ahead
+        """
+        from django.conf import settings
+        
+        now = now or timezone.now()
+        if self.sync_retry_at and self.sync_retry_at > now:
+            return False
+        if self.sync_breaker_state == 'closed':
+            return True
+        
+        retry_at = now + timezone.timedelta(seconds=getattr(settings, 'KAGGLE_SYNC_LOCK_TIMEOUT', 900))
+        claimed = Competition.objects.filter(
+            pk=self.pk,
+            sync_breaker_state=self.sync_breaker_state,
+            sync_retry_at=self.sync_retry_at,
+        ).update(sync_breaker_state='half_open', sync_retry_at=retry_at)
+        if claimed:
+            self.sync_breaker_state = 'half_open'
+            self.sync_retry_at = retry_at
+            logger.info(f"🔌 Probing leaderboard sync for '{self.title}' (circuit half-open)")
+        return bool(claimed)
+
+    def reset_sync_breaker(self):
+        """Close the circuit breaker and make the competition due for a sync now."""
+        fields = {
+            'sync_failure_count': 0,
+            'sync_breaker_state': 'closed',
+            'sync_retry_at': None,
+            'next_sync_at': None,
+            'last_sync_error': '',
+        }
+        Competition.objects.filter(pk=self.pk).update(**fields)
+        for field, value in fields.items():
+            setattr(self, field, value)
+
     def increment_participants(self):
         """Increment participants count."""
         self.participants_count += 1
         self.save(update_fields=['participants_count', 'updated_at'])
+
+
+class SyncRun(models.Model):
+    """
+    One leaderboard sync of a competition, with per-phase timings and row counts.
+    Written by KaggleLeaderboardSync and the sync tasks, for capacity planning.
+    """
+    OUTCOME_CHOICES = [
+        ('success', 'Success'),
+        ('unchanged', 'Unchanged'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    competition = models.ForeignKey(
+        Competition,
+        on_delete=models.CASCADE,
+        related_name='sync_runs'
+    )
+    trigger = models.CharField(max_length=20, blank=True, help_text='What started the sync, e.g. task, batch, manual')
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Phase timings in seconds, empty for phases the run did not reach
+    download_seconds = models.FloatField(null=True, blank=True)
+    download_bytes = models.BigIntegerField(null=True, blank=True)
+    parse_seconds = models.FloatField(null=True, blank=True)
+    match_seconds = models.FloatField(null=True, blank=True)
+    write_seconds = models.FloatField(null=True, blank=True)
+    total_seconds = models.FloatField(null=True, blank=True)
+
+    # Rows in the downloaded leaderboard and what the diff did with them
+    rows = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+    rows_removed = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'competition_sync_runs'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['competition', '-started_at']),
+            models.Index(fields=['outcome', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.competition} - {self.outcome} at {self.started_at}"
+
+    @property
+    def rows_per_second(self):
+        """Rows ingested per second of parse, match and write time."""
+        busy = (self.parse_seconds or 0) + (self.match_seconds or 0) + (self.write_seconds or 0)
+        return round(self.rows / busy, 1) if busy > 0 else None
+
+    @classmethod
+    def record(cls, competition, result, started_at, trigger=''):
+        """
+        Create a SyncRun from a sync result dict.
+        
+        Args:
+            competition: Competition that was synced
+            result: Result dict of KaggleLeaderboardSync or a sync task
+            started_at: When the sync started
+            trigger: What started the sync
+        """
+        if result.get('skipped') and result.get('success'):
+            outcome = 'unchanged'
+        elif result.get('skipped'):
+            outcome = 'skipped'
+        elif result.get('success'):
+            outcome = 'success'
+        else:
+            outcome = 'failed'
+
+        timings = result.get('timings', {})
+        changes = result.get('changes', {})
+        finished_at = timezone.now()
+        return cls.objects.create(
+            competition=competition,
+            trigger=trigger,
+            outcome=outcome,
+            error=result.get('error') or '',
+            started_at=started_at,
+            finished_at=finished_at,
+            download_seconds=timings.get('download_seconds'),
+            download_bytes=timings.get('download_bytes'),
+            parse_seconds=timings.get('parse_seconds'),
+            match_seconds=timings.get('match_seconds'),
+            write_seconds=timings.get('write_seconds'),
+            total_seconds=round((finished_at - started_at).total_seconds(), 3),
+            rows=result.get('rows', 0),
+            rows_inserted=changes.get('created', 0),
+            rows_updated=changes.get('updated', 0),
+            rows_unchanged=changes.get('unchanged', 0),
+            rows_removed=changes.get('removed', 0),
+        )
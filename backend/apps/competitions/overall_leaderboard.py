@@ -0,0 +1,225 @@
+"""
+Overall event leaderboard pages, cached per event version.
+
+Pages are cached under the event's cache version (apps/utils/cache.py),
+which the post-sync hooks bump whenever one of the event's competitions
+ingests new data and standings rebuilds bump as well. Between bumps every
+request is a cache hit.
+
+After a bump the first requests are served stale-while-revalidate: the
+latest page computed for an earlier version is returned immediately and a
+single background task (guarded by a cache lock per page) recomputes it for
+the current version. Only a page that was never computed is built in the
+request.
+
+The task is published by a single background thread per process, handed
+the page once the request's transaction commits, so the request never
+waits on the broker. Publishing uses a bounded connect timeout and no
+retries. The web process never recomputes pages itself: if the broker is
+down the page's refresh lock is kept until it expires, so each page is
+offered to the broker at most once per EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT
+and the stale page is served until a worker refreshes it.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def build_overall_leaderboard(event, limit, cursor=None, top=False, details=False):
+    """
+    Build one page of an event's overall leaderboard.
+
+    Args:
+        event: CompetitionEvent
+        limit: Teams per page
+        cursor: next_cursor of the previous page
+        top: Only the first limit teams, without a next_cursor
+        details: Include each team's competition_details
+
+    Returns:
+        dict: event_id, event_title, entries, competitions_count and next_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    from apps.leaderboard.models import LeaderboardEntry, EventStanding
+    from apps.leaderboard.standings import (
+        refresh_event_standings, standings_queryset, standings_page, team_competition_details,
+    )
+
+    total_competitions = event.competitions.count()
+
+    if not total_competitions:
+        return {
+            'event_id': event.id,
+            'event_title': event.title,
+            'entries': [],
+            'competitions_count': 0,
+            'next_cursor': None
+        }
+
+    if getattr(settings, 'EVENT_STANDINGS_SOURCE', 'materialized') == 'database':
+        standings = standings_queryset(event.id, competitions_count=total_competitions)
+    else:
+        standings = EventStanding.objects.filter(event=event)
+        if not standings.exists() and LeaderboardEntry.objects.filter(competition__event=event).exists():
+            # Standings not built yet (e.g. entries synced before they existed)
+            refresh_event_standings(event.id)
+        standings = standings.order_by('-total_score', 'team_name', 'team_id').values(
+            'team_id', 'team_name', 'total_score', 'average_score', 'competitions_participated'
+        )
+
+    page, next_cursor = standings_page(standings, limit, None if top else cursor)
+    if top:
+        next_cursor = None
+
+    leaderboard_data = []
+    for row in page:
+        leaderboard_data.append({
+            'team_id': row['team_id'],
+            'team_name': row['team_name'],
+            'total_score': round(row['total_score'] or 0.0, 2),
+            'average_score': round(row['average_score'] or 0.0, 2),
+            'competitions_participated': row['competitions_participated'],
+            'missing_competitions': total_competitions - row['competitions_participated'],
+            'rank': row['rank']
+        })
+
+    if details:
+        # Per-competition breakdown of the teams on this page only
+        competition_details = team_competition_details(event.id, [row['team_id'] for row in page])
+        for entry in leaderboard_data:
+            entry['competition_details'] = competition_details.get(entry['team_id'], [])
+
+    return {
+        'event_id': event.id,
+        'event_title': event.title,
+        'entries': leaderboard_data,
+        'competitions_count': total_competitions,
+        'next_cursor': next_cursor
+    }
+
+
+def page_cache_id(limit, cursor=None, top=False, details=False):
+    """Cache identifier of one page's query params."""
+    from apps.utils.cache import cache_key
+
+    return cache_key(limit, None if top else cursor, bool(top), bool(details))
+
+
+def latest_page_key(event_id, page_id):
+    """Cache key of the most recent page computed for any version of the event."""
+    return f"event:{event_id}:overall_leaderboard:latest:{page_id}"
+
+
+def refresh_lock_key(event_id, page_id):
+    """Cache key held while a background recompute of the page is queued or running."""
+    return f"event:{event_id}:overall_leaderboard:refreshing:{page_id}"
+
+
+def store_overall_leaderboard(event, limit, cursor=None, top=False, details=False):
+    """
+    Compute a page for the event's current version and cache it.
+
+    Returns:
+        dict: The page, with the event version it was computed for
+    """
+    from apps.utils.cache import get_cache_version, versioned_cache_key
+
+    # Read the version first: if it is bumped mid-compute, the result is
+    # stored under the old version and the next request recomputes again
+    version = get_cache_version('event', event.id)
+    page_id = page_cache_id(limit, cursor, top, details)
+
+    data = build_overall_leaderboard(event, limit, cursor, top, details)
+    data['version'] = version
+
+    timeout = getattr(settings, 'EVENT_STANDINGS_CACHE_TIMEOUT', 3600)
+    cache.set(versioned_cache_key('event', event.id, 'overall_leaderboard', page_id, version=version), data, timeout)
+
+    # Keep the newest page as the stale copy for the next version
+    latest = cache.get(latest_page_key(event.id, page_id))
+    if latest is None or latest.get('version', 0) <= version:
+        cache.set(latest_page_key(event.id, page_id), data, timeout * 24)
+    return data
+
+
+def get_overall_leaderboard(event, limit, cursor=None, top=False, details=False):
+    """
+    One page of an event's overall leaderboard, from the cache where possible.
+
+    Fresh pages are returned from the cache. After a version bump the
+    previous page is returned as is and one background recompute is
+    queued (see schedule_page_refresh); pages never computed before are built
+    here.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    from apps.utils.cache import versioned_cache_key
+
+    page_id = page_cache_id(limit, cursor, top, details)
+    data = cache.get(versioned_cache_key('event', event.id, 'overall_leaderboard', page_id))
+    if data is not None:
+        return data
+
+    stale = cache.get(latest_page_key(event.id, page_id))
+    if stale is None:
+        return store_overall_leaderboard(event, limit, cursor, top, details)
+
+    lock_timeout = getattr(settings, 'EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT', 120)
+    if cache.add(refresh_lock_key(event.id, page_id), True, timeout=lock_timeout):
+        args = (event.id, limit, cursor, top, details)
+        transaction.on_commit(lambda: schedule_page_refresh(*args))
+    return stale
+
+
+def refresh_publisher():
+    """Single thread of this process that publishes page refreshes to the broker."""
+    global _publisher
+
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='standings-refresh')
+        return _publisher
+
+
+def schedule_page_refresh(event_id, limit, cursor=None, top=False, details=False):
+    """
+    Hand a page refresh to the publisher thread and return at once.
+
+    The refresh lock taken by get_overall_leaderboard allows one hand-off
+    per page per lock timeout, which bounds the publisher's queue.
+    """
+    refresh_publisher().submit(queue_page_refresh, event_id, limit, cursor, top, details)
+
+
+def queue_page_refresh(event_id, limit, cursor=None, top=False, details=False):
+    """
+    Queue refresh_overall_leaderboard_task for a page; runs on the publisher thread.
+
+    Publishes with EVENT_STANDINGS_REFRESH_PUBLISH_TIMEOUT as the connect
+    timeout, no retries and no result subscription. If the broker cannot
+    take the task, the page's refresh lock is left to expire, so the next
+    request after EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT tries again; the page
+    is not recomputed in the web process.
+    """
+    from celery import current_app
+    from .tasks import refresh_overall_leaderboard_task
+
+    args = (event_id, limit, cursor, top, details)
+    timeout = getattr(settings, 'EVENT_STANDINGS_REFRESH_PUBLISH_TIMEOUT', 2)
+    transport_options = dict(current_app.conf.broker_transport_options or {}, max_retries=0)
+    try:
+        with current_app.connection_for_write(connect_timeout=timeout, transport_options=transport_options) as connection:
+            refresh_overall_leaderboard_task.apply_async(args, connection=connection, retry=False, ignore_result=True)
+    except Exception as e:
+        logger.error(f"Could not queue overall leaderboard refresh for event {event_id}, serving the stale page: {e}")
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Competition, CompetitionEvent
+from .models import Competition, CompetitionEvent, SyncRun
 
 
 class CompetitionEventSerializer(serializers.ModelSerializer):
@@ -100,3 +100,19 @@ class CompetitionDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Competition
         fields = '__all__'
+
+
+class SyncRunSerializer(serializers.ModelSerializer):
+    """Serializer for leaderboard sync runs (admin monitoring)."""
+    competition_title = serializers.CharField(source='competition.title', read_only=True)
+    rows_per_second = serializers.ReadOnlyField()
+
+    class Meta:
+        model = SyncRun
+        fields = [
+            'id', 'competition', 'competition_title', 'trigger', 'outcome', 'error',
+            'started_at', 'finished_at', 'download_seconds', 'download_bytes',
+            'parse_seconds', 'match_seconds', 'write_seconds', 'total_seconds',
+            'rows', 'rows_inserted', 'rows_updated', 'rows_unchanged', 'rows_removed',
+            'rows_per_second'
+        ]
@@ -4,8 +4,11 @@ Automatically triggers sync when:
 1. A new competition is created with kaggle_competition_id
 2. An existing competition's kaggle_competition_id is updated
 3. A competition's status changes to 'ongoing'
+
+Also rebuilds the materialized event standings when a competition joins,
+leaves or is deleted from an event, or its scoring changes.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Competition
 import logging
@@ -13,13 +16,22 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Fields written by routine bookkeeping saves (update_status, increment_participants),
+# which on their own do not call for a leaderboard sync
+BOOKKEEPING_FIELDS = {'status', 'participants_count', 'updated_at'}
+
+
 @receiver(post_save, sender=Competition)
-def auto_sync_kaggle_leaderboard(sender, instance, created, **kwargs):
+def auto_sync_kaggle_leaderboard(sender, instance, created, update_fields=None, **kwargs):
     """
     Automatically sync Kaggle leaderboard when:
     - New competition is created with kaggle_competition_id
     - Existing competition gets kaggle_competition_id added
     - Competition becomes active (status='ongoing')
+    
+    Bookkeeping saves are ignored unless they change the status to 'ongoing'.
+    Triggers are debounced and deduplicated by request_leaderboard_sync, so a
+    burst of saves queues at most one sync.
     """
     # Only sync if competition has kaggle_competition_id
     if not instance.kaggle_competition_id:
@@ -34,20 +46,62 @@ def auto_sync_kaggle_leaderboard(sender, instance, created, **kwargs):
         should_sync = True
         reason = "New competition created"
     elif instance.status == 'ongoing':
-        # Competition is active
-        should_sync = True
-        reason = "Competition is active"
+        if update_fields and set(update_fields) <= BOOKKEEPING_FIELDS:
+            # Routine save, only a transition to 'ongoing' is worth a sync
+            if getattr(instance, '_loaded_status', None) != 'ongoing':
+                should_sync = True
+                reason = "Competition became active"
+        else:
+            # Competition is active
+            should_sync = True
+            reason = "Competition is active"
     
     if should_sync:
-        logger.info(f"🚀 Auto-triggering Kaggle sync for '{instance.title}' ({reason})")
-        
         # Import here to avoid circular imports
-        from .tasks import sync_competition_leaderboard_task
+        from .tasks import request_leaderboard_sync
         
         # Trigger async sync via Celery
-        sync_competition_leaderboard_task.delay(instance.id)
-        
-        logger.info(f"✅ Sync task queued for competition: {instance.title}")
+        if request_leaderboard_sync(instance.id):
+            logger.info(f"🚀 Kaggle sync queued for '{instance.title}' ({reason})")
+        else:
+            logger.debug(f"Kaggle sync already pending for '{instance.title}' ({reason})")
+
+
+def schedule_standings_refresh(event_ids):
+    """Rebuild the standings of the given events once the current transaction commits."""
+    from apps.leaderboard.standings import schedule_standings_update
+
+    for event_id in {event_id for event_id in event_ids if event_id}:
+        schedule_standings_update(event_id)
+
+
+@receiver(post_save, sender=Competition)
+def refresh_standings_on_competition_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Rebuild event standings when the event's competitions or their scoring change.
+    
+    Adding or moving a competition changes the competition count every average
+    is taken over; a new points_for_perfect_score changes every team's points.
+    """
+    if update_fields and not {'event', 'event_id', 'points_for_perfect_score'} & set(update_fields):
+        return
+    
+    loaded_event_id = getattr(instance, '_loaded_event_id', instance.event_id)
+    if created:
+        schedule_standings_refresh([instance.event_id])
+    elif loaded_event_id != instance.event_id:
+        schedule_standings_refresh([loaded_event_id, instance.event_id])
+    elif getattr(instance, '_loaded_points_for_perfect_score', instance.points_for_perfect_score) != instance.points_for_perfect_score:
+        schedule_standings_refresh([instance.event_id])
+    
+    instance._loaded_event_id = instance.event_id
+    instance._loaded_points_for_perfect_score = instance.points_for_perfect_score
+
+
+@receiver(post_delete, sender=Competition)
+def refresh_standings_on_competition_delete(sender, instance, **kwargs):
+    """Rebuild the standings of the deleted competition's event (after commit, once its entries are gone)."""
+    schedule_standings_refresh([instance.event_id])
 
 
 @receiver(post_save, sender=Competition)
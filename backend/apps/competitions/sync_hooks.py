@@ -0,0 +1,109 @@
+"""
+Post-sync hooks for Kaggle leaderboard syncs.
+
+KaggleLeaderboardSync runs these once after every sync that changed stored
+leaderboard entries (never for unchanged or failed syncs):
+1. Bump the competition's cache version (and drop its plain cache keys)
+2. Broadcast the new leaderboard to the competition's websocket group
+3. Update the parent event's materialized standings for the changed teams
+4. Bump the parent event's cache version and notify its overall standings group
+
+A failing hook is logged and does not stop the others or fail the sync.
+"""
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def event_group_name(event_id):
+    """Channels group of the overall standings of an event."""
+    return f'event_leaderboard_{event_id}'
+
+
+def bump_competition_cache(competition, change_set):
+    """Move the competition's cached data, such as its leaderboard, to a new version."""
+    from apps.utils.cache import CacheHelper
+
+    CacheHelper.invalidate_competition_cache(competition.id)
+    version = CacheHelper.bump_competition_version(competition.id)
+    logger.info(f"Competition {competition.id} cache now at version {version}")
+
+
+def broadcast_leaderboard(competition, change_set):
+    """Push the updated leaderboard to websocket clients of the competition."""
+    from apps.leaderboard.consumers import send_leaderboard_update
+
+    send_leaderboard_update(competition.id)
+
+
+def update_event_standings(competition, change_set):
+    """Re-aggregate the parent event's standings of the teams in the change set."""
+    if not competition.event_id:
+        return
+
+    from apps.leaderboard.standings import apply_change_set
+
+    apply_change_set(competition, change_set)
+
+
+def notify_event_standings(competition, change_set):
+    """Invalidate the parent event's overall standings and tell its websocket clients."""
+    if not competition.event_id:
+        return
+
+    from channels.layers import get_channel_layer
+    from asgiref.sync import async_to_sync
+    from apps.utils.cache import CacheHelper
+
+    version = CacheHelper.bump_event_version(competition.event_id)
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    async_to_sync(channel_layer.group_send)(
+        event_group_name(competition.event_id),
+        {
+            'type': 'standings_update',
+            'data': {
+                'event_id': competition.event_id,
+                'competition_id': competition.id,
+                'version': version,
+                'changes': change_set.summary(),
+                'updated_at': timezone.now().isoformat(),
+            }
+        }
+    )
+
+
+POST_SYNC_HOOKS = [
+    bump_competition_cache,
+    broadcast_leaderboard,
+    update_event_standings,
+    notify_event_standings,
+]
+
+
+def run_post_sync_hooks(competition, change_set):
+    """
+    Run every post-sync hook once for a sync that changed data.
+
+    Args:
+        competition: Competition that was synced
+        change_set: LeaderboardChangeSet of the sync
+
+    Returns:
+        list: Names of the hooks that ran successfully
+    """
+    if change_set is None or not change_set.has_changes:
+        return []
+
+    completed = []
+    for hook in POST_SYNC_HOOKS:
+        try:
+            hook(competition, change_set)
+            completed.append(hook.__name__)
+        except Exception as e:
+            logger.error(f"Post-sync hook {hook.__name__} failed for {competition.title}: {e}")
+    return completed
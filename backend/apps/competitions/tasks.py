@@ -1,25 +1,110 @@
 from celery import shared_task
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
 from django.utils import timezone
-from .models import Competition
+from .models import Competition, SyncRun
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def pending_sync_key(competition_id):
+    """Cache key held while a triggered sync is queued or running."""
+    return f"leaderboard_sync:pending:{competition_id}"
+
+
+def running_sync_key(competition_id):
+    """Cache key held while a sync of the competition is running."""
+    return f"leaderboard_sync:running:{competition_id}"
+
+
+def requeue_sync_key(competition_id):
+    """Cache key set when a trigger arrives after the pending sync has started."""
+    return f"leaderboard_sync:requeue:{competition_id}"
+
+
+def request_leaderboard_sync(competition_id):
+    """
+    Queue a debounced leaderboard sync, unless one is already queued or running.
+    
+    The first request opens a KAGGLE_SYNC_DEBOUNCE_SECONDS window and queues the
+    sync to run at its end; requests arriving while that sync is queued are
+    coalesced into it. Requests arriving once it has started may come too
+    late for it (e.g. a new kaggle_competition_id), so they are remembered
+    and one more sync is requested when it finishes. The pending key expires
+    after KAGGLE_SYNC_LOCK_TIMEOUT in case the task is lost.
+    
+    Args:
+        competition_id: ID of the Competition to sync
+    
+    Returns:
+        bool: True if a sync was queued, False if one was already pending
+            or could not be queued
+    """
+    debounce = getattr(settings, 'KAGGLE_SYNC_DEBOUNCE_SECONDS', 30)
+    lock_timeout = getattr(settings, 'KAGGLE_SYNC_LOCK_TIMEOUT', 900)
+    
+    if not cache.add(pending_sync_key(competition_id), True, timeout=debounce + lock_timeout):
+        cache.set(requeue_sync_key(competition_id), True, timeout=debounce + lock_timeout)
+        return False
+    
+    try:
+        sync_competition_leaderboard_task.apply_async(
+            (competition_id,), {'release_pending': True}, countdown=debounce
+        )
+    except Exception as e:
+        # Nothing will release the key, so do not let it swallow later triggers
+        cache.delete(pending_sync_key(competition_id))
+        logger.error(f"Could not queue leaderboard sync for competition {competition_id}: {e}")
+        return False
+    return True
+
+
+@contextmanager
+def competition_sync_lock(competition_id):
+    """
+    In-flight lock for syncing one competition, shared by all workers via the cache.
+    
+    Usage:
+        with competition_sync_lock(competition.id) as acquired:
+            if acquired:
+                sync()
+    """
+    key = running_sync_key(competition_id)
+    acquired = cache.add(key, True, timeout=getattr(settings, 'KAGGLE_SYNC_LOCK_TIMEOUT', 900))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
 @shared_task
-def sync_competition_leaderboard_task(competition_id):
+def sync_competition_leaderboard_task(competition_id, release_pending=False):
     """
-    Sync leaderboard for a single competition (triggered by signal).
-    This is called automatically when a competition is created or updated.
+    Sync leaderboard for a single competition.
+    Queued by request_leaderboard_sync when a competition is created or
+    updated, and by queue_leaderboard_syncs for scheduled syncs. Skipped if
+    the competition is already syncing.
     
     Args:
         competition_id: ID of the Competition to sync
+        release_pending: True for the run queued by request_leaderboard_sync,
+            which releases the pending key (and requests the follow-up sync
+            of triggers that arrived meanwhile) when done
     
     Returns:
         dict: Sync results with success status and entry count
     """
     from .kaggle_leaderboard_sync import KaggleLeaderboardSync
     
+    requeue = False
+    if release_pending:
+        # Triggers up to now are covered by this run
+        cache.delete(requeue_sync_key(competition_id))
+    
     try:
         competition = Competition.objects.get(id=competition_id)
         
@@ -30,8 +115,31 @@ def sync_competition_leaderboard_task(competition_id):
                 'competition': competition.title
             }
         
-        syncer = KaggleLeaderboardSync()
-        result = syncer.sync_competition_leaderboard(competition)
+        if not competition.claim_sync_attempt():
+            logger.info(f"⏭️ Sync of '{competition.title}' is backing off until {competition.sync_retry_at}, skipping")
+            return {
+                'success': False,
+                'skipped': True,
+                'error': 'Backing off after failed syncs',
+                'competition': competition.title
+            }
+        
+        with competition_sync_lock(competition.id) as acquired:
+            if not acquired:
+                logger.info(f"⏭️ Sync already running for '{competition.title}', skipping")
+                # The running sync may have started before the trigger's change
+                requeue = release_pending
+                result = {
+                    'success': False,
+                    'skipped': True,
+                    'error': 'Sync already running',
+                    'competition': competition.title
+                }
+                SyncRun.record(competition, result, timezone.now(), trigger='task')
+                return result
+            
+            syncer = KaggleLeaderboardSync()
+            result = syncer.sync_competition_leaderboard(competition, trigger='task')
         
         logger.info(
             f"✅ Auto-sync complete for '{competition.title}': "
@@ -48,6 +156,12 @@ def sync_competition_leaderboard_task(competition_id):
         error_msg = f"Error syncing competition {competition_id}: {e}"
         logger.error(error_msg)
         return {'success': False, 'error': str(e)}
+    finally:
+        if release_pending:
+            # Let the next trigger queue a new sync
+            cache.delete(pending_sync_key(competition_id))
+            if cache.delete(requeue_sync_key(competition_id)) or requeue:
+                request_leaderboard_sync(competition_id)
 
 
 @shared_task
@@ -76,45 +190,180 @@ def update_competition_statuses():
 @shared_task
 def sync_kaggle_leaderboard_auto():
     """
-    Automatically sync leaderboard from Kaggle for all active competitions.
-    Process: Fetch -> Save CSV -> Update DB -> Delete CSV
-    Runs every 5 minutes.
+    Sync the leaderboards of ongoing competitions that are due.
+    Kept for beat schedules and callers that still name it: it honours each
+    competition's next_sync_at like dispatch_due_leaderboard_syncs, which
+    Celery Beat runs instead.
     """
-    import logging
-    from .kaggle_leaderboard_sync import KaggleLeaderboardSync
-    
-    logger = logging.getLogger(__name__)
+    return dispatch_due_leaderboard_syncs()
+
+
+@shared_task
+def dispatch_due_leaderboard_syncs():
+    """
+    Sync the leaderboards of ongoing competitions that are due.
+    Runs every minute from Celery Beat.
     
-    # Get all active competitions with Kaggle ID
-    active_competitions = Competition.objects.filter(
+    A competition is due once its next_sync_at has passed; each sync moves
+    next_sync_at by the competition's adaptive interval (see
+    Competition.next_sync_interval). Due competitions are claimed by moving
+    next_sync_at one interval ahead before queueing, so a sync that is still
+    running is not queued again by the next dispatch. Competitions backing
+    off after failures, or with an open circuit breaker, are left out until
+    their sync_retry_at (see Competition.record_sync_failure).
+    """
+    now = timezone.now()
+    due = Competition.objects.filter(
         status='ongoing',
         kaggle_competition_id__isnull=False
-    ).exclude(kaggle_competition_id='')
+    ).exclude(kaggle_competition_id='').filter(
+        Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now),
+        Q(sync_retry_at__isnull=True) | Q(sync_retry_at__lte=now)
+    ).only('id', 'sync_interval_seconds')
     
-    if not active_competitions.exists():
-        return 'No active Kaggle competitions to sync'
+    competition_ids = []
+    for competition in due:
+        claimed = Competition.objects.filter(
+            Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now),
+            pk=competition.pk
+        ).update(next_sync_at=now + timezone.timedelta(seconds=competition.sync_interval_seconds))
+        if claimed:
+            competition_ids.append(competition.id)
+    
+    if not competition_ids:
+        return 'No leaderboard syncs due'
+    
+    return queue_leaderboard_syncs(competition_ids)
+
+
+def queue_leaderboard_syncs(competition_ids):
+    """
+    Fan out leaderboard syncs for several competitions as a Celery chord.
+    
+    Each competition gets its own sync task as long as there are no more than
+    KAGGLE_SYNC_MAX_PARALLEL of them. Beyond that the competitions are spread
+    over KAGGLE_SYNC_MAX_PARALLEL batch tasks that sync their share one after
+    another, which caps how many worker slots a sync cycle can take.
+    collect_leaderboard_sync_results runs once every task has finished.
+    
+    Args:
+        competition_ids: IDs of the competitions to sync
+    
+    Returns:
+        str: Summary of what was queued
+    """
+    from celery import chord
+    from django.conf import settings
+    
+    max_parallel = max(1, getattr(settings, 'KAGGLE_SYNC_MAX_PARALLEL', 4))
+    
+    if len(competition_ids) <= max_parallel:
+        header = [sync_competition_leaderboard_task.s(competition_id) for competition_id in competition_ids]
+    else:
+        lanes = [competition_ids[lane::max_parallel] for lane in range(max_parallel)]
+        header = [sync_competition_batch_task.s(lane) for lane in lanes]
+    
+    chord(header)(collect_leaderboard_sync_results.s())
+    
+    return f'Queued leaderboard sync for {len(competition_ids)} competitions in {len(header)} parallel tasks'
+
+
+@shared_task
+def sync_competition_batch_task(competition_ids):
+    """
+    Sync the leaderboards of several competitions in one worker slot.
+    Used by queue_leaderboard_syncs when there are more competitions than parallel slots.
+    Downloads and database writes are pipelined (see sync_competitions_pipelined).
+    
+    Args:
+        competition_ids: IDs of the competitions to sync
+    
+    Returns:
+        list: Sync results, one dict per competition
+    """
+    from .kaggle_leaderboard_sync import KaggleLeaderboardSync
     
     syncer = KaggleLeaderboardSync()
-    results = []
     
-    for competition in active_competitions:
-        try:
-            result = syncer.sync_competition_leaderboard(competition)
-            results.append(result)
-            logger.info(f"Synced {competition.title}: {result['entries_processed']} entries")
-        except Exception as e:
-            logger.error(f"Error syncing {competition.title}: {e}")
-            results.append({
-                'success': False,
-                'competition': competition.title,
-                'error': str(e)
-            })
+    with ExitStack() as locks:
+        # Leave out competitions another worker is already syncing, or backing off
+        competitions = []
+        for competition in Competition.objects.filter(id__in=competition_ids):
+            if not competition.claim_sync_attempt():
+                logger.info(f"⏭️ Sync of '{competition.title}' is backing off, skipping")
+            elif locks.enter_context(competition_sync_lock(competition.id)):
+                competitions.append(competition)
+            else:
+                logger.info(f"⏭️ Sync already running for '{competition.title}', skipping")
+                SyncRun.record(competition, {'skipped': True, 'error': 'Sync already running'}, timezone.now(), trigger='batch')
+        
+        # Download the next competition while the previous one is written
+        results = syncer.sync_competitions_pipelined(competitions)
+    
+    for result in results:
+        logger.info(f"Synced {result['competition']}: {result['entries_processed']} entries")
+    
+    return results
+
+
+@shared_task
+def collect_leaderboard_sync_results(task_results):
+    """
+    Chord callback for queue_leaderboard_syncs: summarize a sync cycle and clean up.
+    
+    Args:
+        task_results: Results of the sync tasks, each a result dict or a list of them
+    
+    Returns:
+        str: Summary of the sync cycle
+    """
+    from .kaggle_leaderboard_sync import KaggleLeaderboardSync
+    
+    results = []
+    for task_result in task_results:
+        if isinstance(task_result, list):
+            results.extend(task_result)
+        else:
+            results.append(task_result)
     
     # Cleanup old CSV files
-    syncer.cleanup_old_files()
+    KaggleLeaderboardSync().cleanup_old_files()
     
-    total_synced = sum(r['entries_processed'] for r in results if r['success'])
-    return f'Synced {total_synced} entries across {len(results)} competitions'
+    total_synced = sum(r.get('entries_processed', 0) for r in results if r.get('success'))
+    unchanged = sum(1 for r in results if r.get('skipped'))
+    failed = sum(1 for r in results if not r.get('success'))
+    summary = (
+        f'Synced {total_synced} entries across {len(results)} competitions '
+        f'({unchanged} unchanged, {failed} failed)'
+    )
+    logger.info(summary)
+    return summary
+
+
+@shared_task
+def refresh_overall_leaderboard_task(event_id, limit, cursor=None, top=False, details=False):
+    """
+    Recompute one cached overall leaderboard page of an event for its current version.
+    Queued by get_overall_leaderboard when it serves a stale page; releases
+    the page's refresh lock when done.
+    
+    Args:
+        event_id: ID of the CompetitionEvent
+        limit, cursor, top, details: Query params of the page
+    
+    Returns:
+        int: Event version the page was computed for, None if the event is gone
+    """
+    from .models import CompetitionEvent
+    from .overall_leaderboard import page_cache_id, refresh_lock_key, store_overall_leaderboard
+    
+    try:
+        event = CompetitionEvent.objects.filter(id=event_id).first()
+        if event is None:
+            return None
+        return store_overall_leaderboard(event, limit, cursor, top, details)['version']
+    finally:
+        cache.delete(refresh_lock_key(event_id, page_cache_id(limit, cursor, top, details)))
 
 
 @shared_task
@@ -226,6 +475,13 @@ def sync_kaggle_submissions():
                 leaderboard_updated += 1
                 rank_counter += 1
             
+            if leaderboard_updated:
+                # Written outside the leaderboard sync, so no post-sync hook updates the standings
+                from apps.leaderboard.standings import schedule_standings_update
+                from apps.utils.cache import CacheHelper
+                schedule_standings_update(competition.event_id)
+                CacheHelper.bump_competition_version(competition.id)
+            
             logger.info(f"Synced {competition.title}: {submissions_created} submissions, {leaderboard_updated} leaderboard entries")
             total_synced += 1
             
@@ -1 +1,570 @@
 # Competition app tests
+import csv
+import os
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.leaderboard.models import LeaderboardEntry
+from . import tasks
+from .kaggle_leaderboard_sync import KaggleLeaderboardSync
+from .leaderboard_fetchers import KaggleApiFetcher, KaggleApiPagedFetcher
+from .leaderboard_parser import LeaderboardRow
+from .models import Competition, CompetitionEvent
+
+
+def create_competition(title='Test', event=None, slug=''):
+    """Competition that does not queue a sync when saved (the slug is set with an update)."""
+    now = timezone.now()
+    competition = Competition.objects.create(
+        title=title, description='', kaggle_competition_id='', event=event,
+        start_date=now, end_date=now + timezone.timedelta(days=30)
+    )
+    if slug:
+        Competition.objects.filter(pk=competition.pk).update(kaggle_competition_id=slug)
+        competition.refresh_from_db()
+    return competition
+
+
+def leaderboard_rows(teams):
+    """LeaderboardRow records for (team_id, team_name, score) tuples, ranked in order."""
+    date = datetime(2025, 10, 1, tzinfo=dt_timezone.utc)
+    return [
+        LeaderboardRow(rank, team_id, team_name, score, date, '')
+        for rank, (team_id, team_name, score) in enumerate(teams, 1)
+    ]
+
+
+def write_leaderboard_csv(path, size):
+    """Write a Kaggle-style leaderboard CSV with size teams."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Rank', 'TeamId', 'TeamName', 'LastSubmissionDate', 'Score', 'SubmissionCount', 'TeamMemberUserNames'])
+        for rank in range(1, size + 1):
+            writer.writerow([rank, 1000 + rank, f'team-{rank}', '2025-10-28 14:41:56', 1 - rank / 1000000, 3, f'member-{rank}'])
+
+
+@override_settings(KAGGLE_SYNC_STREAMING_MIN_BYTES=0, KAGGLE_SYNC_CHUNK_ROWS=500)
+class StreamingIngestTests(TestCase):
+    """Chunked leaderboard ingest (KaggleLeaderboardSync.ingest_leaderboard_chunks)."""
+
+    def setUp(self):
+        now = timezone.now()
+        # No kaggle_competition_id, so saving does not queue a sync
+        self.competition = Competition.objects.create(
+            title='Streaming', description='', kaggle_competition_id='',
+            start_date=now, end_date=now + timezone.timedelta(days=30)
+        )
+        self.syncer = KaggleLeaderboardSync()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ingest(self, size):
+        path = os.path.join(self.tmp.name, f'leaderboard-{size}.csv')
+        write_leaderboard_csv(path, size)
+        return self.syncer.process_csv_and_update_db(path, self.competition)
+
+    def peak_memory(self, size):
+        LeaderboardEntry.objects.filter(competition=self.competition).delete()
+        path = os.path.join(self.tmp.name, f'leaderboard-{size}.csv')
+        write_leaderboard_csv(path, size)
+
+        tracemalloc.start()
+        try:
+            self.syncer.process_csv_and_update_db(path, self.competition)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_streaming_ingest_matches_leaderboard(self):
+        self.assertEqual(self.ingest(1200), 1200)
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 1200)
+
+        # Teams missing from the next download are removed, the rest left alone
+        self.assertEqual(self.ingest(700), 0)
+        stats = self.syncer.last_ingest_stats
+        self.assertEqual(stats['unchanged'], 700)
+        self.assertEqual(stats['removed'], 500)
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 700)
+
+    def test_peak_memory_does_not_grow_with_leaderboard_size(self):
+        small = self.peak_memory(2000)
+        large = self.peak_memory(16000)
+
+        # 8x the rows, but only the 8-byte seen ids grow with the leaderboard
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 16000)
+        self.assertLess(large, small * 1.5)
+
+
+class LeaderboardDiffTests(TestCase):
+    """Change sets of KaggleLeaderboardSync.ingest_leaderboard against the stored entries."""
+
+    def setUp(self):
+        self.competition = create_competition()
+        self.syncer = KaggleLeaderboardSync()
+
+    def ingest(self, teams):
+        self.syncer.ingest_leaderboard(leaderboard_rows(teams), self.competition)
+        return self.syncer.last_change_set
+
+    def entry(self, team_id):
+        return LeaderboardEntry.objects.get(competition=self.competition, kaggle_team_id=team_id)
+
+    def test_first_sync_adds_every_team(self):
+        change_set = self.ingest([(1, 'alpha', 90), (2, 'beta', 80)])
+
+        self.assertEqual(change_set.summary(), {'created': 2, 'updated': 0, 'unchanged': 0, 'removed': 0})
+        self.assertEqual(sorted(item['team_name'] for item in change_set.added), ['alpha', 'beta'])
+
+    def test_only_differences_are_written(self):
+        self.ingest([(1, 'alpha', 90), (2, 'beta', 80), (3, 'gamma', 70)])
+        beta = self.entry(2)
+
+        change_set = self.ingest([(2, 'beta', 95), (1, 'alpha', 90), (4, 'delta', 60)])
+
+        self.assertEqual(change_set.summary(), {'created': 1, 'updated': 2, 'unchanged': 0, 'removed': 1})
+        changed = {item['team_name']: item for item in change_set.changed}
+        self.assertEqual((changed['beta']['old_rank'], changed['beta']['new_rank']), (2, 1))
+        self.assertEqual(changed['beta']['new_score'], self.entry(2).score)
+        self.assertEqual(changed['alpha']['new_rank'], 2)
+        self.assertEqual([item['team_name'] for item in change_set.removed], ['gamma'])
+        # Entries are updated in place
+        self.assertEqual(self.entry(2).pk, beta.pk)
+
+    def test_unchanged_download_changes_nothing(self):
+        teams = [(1, 'alpha', 90), (2, 'beta', 80)]
+        self.ingest(teams)
+
+        change_set = self.ingest(teams)
+
+        self.assertFalse(change_set.has_changes)
+        self.assertEqual(change_set.unchanged, 2)
+
+    def test_renamed_team_keeps_its_entry_and_team(self):
+        self.ingest([(1, 'alpha', 90), (2, 'beta', 80)])
+        beta = self.entry(2)
+
+        change_set = self.ingest([(1, 'alpha', 90), (2, 'beta-renamed', 80)])
+
+        self.assertEqual(change_set.summary(), {'created': 0, 'updated': 1, 'unchanged': 1, 'removed': 0})
+        renamed = self.entry(2)
+        self.assertEqual((renamed.pk, renamed.team_id), (beta.pk, beta.team_id))
+        self.assertEqual(renamed.team.name, 'beta-renamed')
+
+    def test_same_name_teams_stay_apart(self):
+        self.ingest([(1, 'twins', 90), (2, 'twins', 80)])
+
+        self.assertNotEqual(self.entry(1).team_id, self.entry(2).team_id)
+
+    def test_existing_entries_are_loaded_under_the_competition_lock(self):
+        from django.db import connection
+        from . import kaggle_leaderboard_sync
+
+        self.ingest([(1, 'alpha', 90)])
+        calls = []
+        load_existing_entries = self.syncer.load_existing_entries
+
+        def load(*args, **kwargs):
+            calls.append(('load', len(connection.savepoint_ids)))
+            return load_existing_entries(*args, **kwargs)
+
+        outside = len(connection.savepoint_ids)
+        with mock.patch.object(kaggle_leaderboard_sync, 'lock_competition',
+                               side_effect=lambda competition_id: calls.append(('lock', competition_id))), \
+                mock.patch.object(self.syncer, 'load_existing_entries', side_effect=load):
+            self.ingest([(1, 'alpha', 95)])
+
+        self.assertEqual(calls, [('lock', self.competition.id), ('load', outside + 1)])
+
+    def test_entry_stored_without_team_id_is_matched_by_name(self):
+        legacy = LeaderboardEntry.objects.create(competition=self.competition, kaggle_team_name='alpha', rank=5)
+
+        change_set = self.ingest([(1, 'alpha', 90)])
+
+        self.assertEqual(change_set.summary(), {'created': 0, 'updated': 1, 'unchanged': 0, 'removed': 0})
+        self.assertEqual(self.entry(1).pk, legacy.pk)
+
+
+class DigestSkipTests(TestCase):
+    """Syncs whose download matches the last ingested leaderboard are skipped."""
+
+    def setUp(self):
+        from apps.submissions.kaggle_service import KaggleService
+        from apps.submissions.kaggle_standin import KaggleStandInApi
+
+        self.tmp = tempfile.TemporaryDirectory()
+        service = KaggleService(api=KaggleStandInApi(churn=0.0), rate_limited=False)
+        self.syncer = KaggleLeaderboardSync(fetcher=KaggleApiFetcher(self.tmp.name, service=service))
+        self.competition = create_competition(slug='synthetic-50-digest')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_download_is_skipped(self):
+        first = self.syncer.sync_competition_leaderboard(self.competition)
+        second = self.syncer.sync_competition_leaderboard(self.competition)
+
+        self.assertTrue(first['success'])
+        self.assertFalse(first.get('skipped', False))
+        self.assertTrue(second['success'])
+        self.assertTrue(second['skipped'])
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 50)
+
+    def test_forced_sync_ingests_again(self):
+        self.syncer.sync_competition_leaderboard(self.competition)
+
+        forced = self.syncer.sync_competition_leaderboard(self.competition, force=True)
+
+        self.assertFalse(forced.get('skipped', False))
+
+    def test_scoring_change_invalidates_the_digest(self):
+        self.syncer.sync_competition_leaderboard(self.competition)
+        Competition.objects.filter(pk=self.competition.pk).update(points_for_perfect_score=50)
+        self.competition.refresh_from_db()
+
+        result = self.syncer.sync_competition_leaderboard(self.competition)
+
+        self.assertFalse(result.get('skipped', False))
+
+
+
+@override_settings(KAGGLE_PAGED_TOP_N=0, KAGGLE_PAGED_STOP_ON_UNCHANGED=False)
+class PagedSyncTests(TestCase):
+    """Paged leaderboard syncs against full downloads of the same leaderboard."""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.competition = create_competition(slug='synthetic-20-paged')
+        # Matched through TeamMemberUserNames only, the team is called team-0-3
+        self.user = get_user_model().objects.create_user(username='alice', password='x', kaggle_username='user-0-3')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def syncer(self, paged, **options):
+        from apps.submissions.kaggle_service import KaggleService
+        from apps.submissions.kaggle_standin import KaggleStandInApi
+
+        service = KaggleService(api=KaggleStandInApi(churn=0.0, page_size=8, **options), rate_limited=False)
+        fetcher_class = KaggleApiPagedFetcher if paged else KaggleApiFetcher
+        return KaggleLeaderboardSync(fetcher=fetcher_class(self.tmp.name, service=service))
+
+    def user_entry(self):
+        return LeaderboardEntry.objects.get(competition=self.competition, user=self.user)
+
+    def test_paged_sync_keeps_entries_matched_by_members(self):
+        self.syncer(paged=False).sync_competition_leaderboard(self.competition)
+        full = self.user_entry()
+        self.assertEqual(full.rank, 3)
+
+        result = self.syncer(paged=True).sync_competition_leaderboard(self.competition)
+
+        self.assertTrue(result['success'])
+        self.assertFalse(result['partial'])
+        self.assertEqual(result['changes'], {'created': 0, 'updated': 0, 'unchanged': 20, 'removed': 0})
+        entry = self.user_entry()
+        self.assertEqual((entry.pk, entry.rank, entry.score), (full.pk, full.rank, full.score))
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 20)
+
+        # A full download afterwards finds nothing to change either
+        result = self.syncer(paged=False).sync_competition_leaderboard(self.competition, force=True)
+        self.assertEqual(result['changes'], {'created': 0, 'updated': 0, 'unchanged': 20, 'removed': 0})
+
+    def test_listing_cut_short_removes_nothing(self):
+        self.syncer(paged=False).sync_competition_leaderboard(self.competition)
+
+        # Every listing ends without a next page token after its first page
+        result = self.syncer(paged=True, partial_rate=1.0).sync_competition_leaderboard(self.competition)
+
+        self.assertTrue(result['success'])
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['changes']['removed'], 0)
+        self.assertEqual(LeaderboardEntry.objects.filter(competition=self.competition).count(), 20)
+        self.assertEqual(self.user_entry().rank, 3)
+
+    def test_complete_listing_removes_vanished_teams(self):
+        self.syncer(paged=False).sync_competition_leaderboard(self.competition)
+        LeaderboardEntry.objects.create(
+            competition=self.competition, kaggle_team_name='gone', kaggle_team_id=1, rank=21, score=1.0
+        )
+
+        result = self.syncer(paged=True).sync_competition_leaderboard(self.competition)
+
+        self.assertEqual(result['changes']['removed'], 1)
+        self.assertFalse(LeaderboardEntry.objects.filter(competition=self.competition, kaggle_team_name='gone').exists())
+
+    def test_listing_without_pages_is_an_error(self):
+        syncer = self.syncer(paged=True)
+        with mock.patch.object(syncer.fetcher, 'iter_pages', return_value=iter([])):
+            result = syncer.sync_competition_leaderboard(self.competition)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], "Kaggle returned no leaderboard pages")
+
+@override_settings(
+    KAGGLE_SYNC_BACKOFF_BASE=60, KAGGLE_SYNC_BACKOFF_MAX=3600,
+    KAGGLE_SYNC_BREAKER_THRESHOLD=3, KAGGLE_SYNC_BREAKER_COOLDOWN=7200, KAGGLE_SYNC_LOCK_TIMEOUT=900
+)
+class CircuitBreakerTests(TestCase):
+    """Backoff and circuit breaker transitions of failing syncs."""
+
+    def setUp(self):
+        self.competition = create_competition()
+        self.now = timezone.now()
+
+    def fail(self, times=1):
+        for _ in range(times):
+            self.competition.record_sync_failure('503', now=self.now)
+
+    def test_failures_back_off_exponentially(self):
+        self.fail()
+        self.assertEqual(self.competition.sync_retry_at, self.now + timezone.timedelta(seconds=60))
+        self.fail()
+        self.assertEqual(self.competition.sync_retry_at, self.now + timezone.timedelta(seconds=120))
+        self.assertEqual(self.competition.sync_breaker_state, 'closed')
+        self.assertFalse(self.competition.claim_sync_attempt(now=self.now))
+
+    def test_breaker_opens_at_threshold(self):
+        self.fail(3)
+
+        self.assertEqual(self.competition.sync_breaker_state, 'open')
+        self.assertEqual(self.competition.sync_retry_at, self.now + timezone.timedelta(seconds=7200))
+        self.assertFalse(self.competition.claim_sync_attempt(now=self.now + timezone.timedelta(seconds=3600)))
+
+    def test_one_half_open_probe_after_cooldown(self):
+        self.fail(3)
+        later = self.now + timezone.timedelta(seconds=7201)
+        other_worker = Competition.objects.get(pk=self.competition.pk)
+
+        self.assertTrue(self.competition.claim_sync_attempt(now=later))
+        self.assertEqual(self.competition.sync_breaker_state, 'half_open')
+        self.assertFalse(other_worker.claim_sync_attempt(now=later))
+
+    def test_failed_probe_reopens(self):
+        self.fail(3)
+        later = self.now + timezone.timedelta(seconds=7201)
+        self.competition.claim_sync_attempt(now=later)
+
+        self.competition.record_sync_failure('503', now=later)
+
+        self.assertEqual(self.competition.sync_breaker_state, 'open')
+        self.assertEqual(self.competition.sync_retry_at, later + timezone.timedelta(seconds=7200))
+
+    def test_success_closes_the_breaker(self):
+        self.fail(3)
+        self.competition.claim_sync_attempt(now=self.now + timezone.timedelta(seconds=7201))
+
+        self.competition.record_leaderboard_sync(digest='abc')
+
+        self.competition.refresh_from_db()
+        self.assertEqual(self.competition.sync_breaker_state, 'closed')
+        self.assertEqual(self.competition.sync_failure_count, 0)
+        self.assertIsNone(self.competition.sync_retry_at)
+
+
+@override_settings(KAGGLE_SYNC_DEBOUNCE_SECONDS=30, KAGGLE_SYNC_LOCK_TIMEOUT=900)
+class SyncDebounceTests(TestCase):
+    """request_leaderboard_sync and the pending/running keys of sync_competition_leaderboard_task."""
+
+    def setUp(self):
+        cache.clear()
+        self.competition = create_competition()
+        patcher = mock.patch.object(tasks.sync_competition_leaderboard_task, 'apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pending(self):
+        return cache.get(tasks.pending_sync_key(self.competition.id)) is not None
+
+    def test_triggers_are_coalesced(self):
+        self.assertTrue(tasks.request_leaderboard_sync(self.competition.id))
+        self.assertFalse(tasks.request_leaderboard_sync(self.competition.id))
+
+        self.apply_async.assert_called_once_with(
+            (self.competition.id,), {'release_pending': True}, countdown=30
+        )
+
+    def test_only_the_debounced_run_releases_the_pending_key(self):
+        tasks.request_leaderboard_sync(self.competition.id)
+
+        # A scheduled sync of the same competition (no kaggle slug, so it returns at once)
+        tasks.sync_competition_leaderboard_task(self.competition.id)
+        self.assertTrue(self.pending())
+
+        tasks.sync_competition_leaderboard_task(self.competition.id, release_pending=True)
+        self.assertFalse(self.pending())
+        self.assertEqual(self.apply_async.call_count, 1)
+
+    def test_trigger_during_the_run_queues_one_more_sync(self):
+        tasks.request_leaderboard_sync(self.competition.id)
+
+        def trigger_while_running(**kwargs):
+            tasks.request_leaderboard_sync(self.competition.id)
+            return Competition.objects.filter(**kwargs).first()
+
+        with mock.patch.object(Competition.objects, 'get', side_effect=trigger_while_running):
+            tasks.sync_competition_leaderboard_task(self.competition.id, release_pending=True)
+
+        self.assertEqual(self.apply_async.call_count, 2)
+        self.assertTrue(self.pending())
+
+    def test_failed_enqueue_releases_the_pending_key(self):
+        self.apply_async.side_effect = ConnectionError('broker down')
+
+        self.assertFalse(tasks.request_leaderboard_sync(self.competition.id))
+        self.assertFalse(self.pending())
+
+    def test_sync_lock_is_exclusive(self):
+        with tasks.competition_sync_lock(self.competition.id) as first:
+            with tasks.competition_sync_lock(self.competition.id) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with tasks.competition_sync_lock(self.competition.id) as again:
+            self.assertTrue(again)
+
+
+
+class CompetitionLeaderboardCacheTests(TestCase):
+    """Competition leaderboards cached per competition version, bumped by changed syncs."""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        self.client = APIClient()
+        self.competition = create_competition()
+        self.syncer = KaggleLeaderboardSync()
+        self.syncer.ingest_leaderboard(leaderboard_rows([(1, 'alpha', 90), (2, 'beta', 80)]), self.competition)
+
+    def leaderboard(self):
+        response = self.client.get(f'/api/competitions/{self.competition.id}/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        return [entry['kaggle_team_name'] for entry in response.json()]
+
+    def test_changed_sync_bumps_the_cached_leaderboard(self):
+        from .sync_hooks import run_post_sync_hooks
+
+        self.assertEqual(self.leaderboard(), ['alpha', 'beta'])
+        self.syncer.ingest_leaderboard(leaderboard_rows([(3, 'gamma', 95), (1, 'alpha', 90)]), self.competition)
+        # Served from the cache until the post-sync hooks run
+        self.assertEqual(self.leaderboard(), ['alpha', 'beta'])
+
+        hooks = run_post_sync_hooks(self.competition, self.syncer.last_change_set)
+
+        self.assertIn('bump_competition_cache', hooks)
+        self.assertEqual(self.leaderboard(), ['gamma', 'alpha'])
+
+    def test_unchanged_sync_keeps_the_cached_leaderboard(self):
+        from apps.utils.cache import get_cache_version
+        from .sync_hooks import run_post_sync_hooks
+
+        self.leaderboard()
+        self.syncer.ingest_leaderboard(leaderboard_rows([(1, 'alpha', 90), (2, 'beta', 80)]), self.competition)
+
+        self.assertEqual(run_post_sync_hooks(self.competition, self.syncer.last_change_set), [])
+        self.assertEqual(get_cache_version('competition', self.competition.id), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.leaderboard(), ['alpha', 'beta'])
+
+class OverallLeaderboardCacheTests(TestCase):
+    """Stale-while-revalidate pages of get_overall_leaderboard."""
+
+    def setUp(self):
+        from apps.leaderboard.standings import refresh_event_standings
+
+        cache.clear()
+        now = timezone.now()
+        self.event = CompetitionEvent.objects.create(
+            title='Cached', slug='cached', description='', start_date=now, end_date=now + timezone.timedelta(days=30)
+        )
+        competition = create_competition(event=self.event)
+        KaggleLeaderboardSync().ingest_leaderboard(leaderboard_rows([(1, 'alpha', 90), (2, 'beta', 80)]), competition)
+        refresh_event_standings(self.event.id)
+        from . import overall_leaderboard
+
+        self.real_schedule_page_refresh = overall_leaderboard.schedule_page_refresh
+        patcher = mock.patch('apps.competitions.overall_leaderboard.schedule_page_refresh')
+        self.schedule_page_refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self):
+        from .overall_leaderboard import get_overall_leaderboard
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return get_overall_leaderboard(self.event, 10)
+
+    def test_fresh_page_is_cached(self):
+        first = self.get()
+        with mock.patch('apps.competitions.overall_leaderboard.build_overall_leaderboard') as build:
+            second = self.get()
+
+        build.assert_not_called()
+        self.assertEqual(first, second)
+        self.schedule_page_refresh.assert_not_called()
+
+    def test_stale_page_is_served_and_refreshed_once(self):
+        from apps.utils.cache import CacheHelper
+
+        first = self.get()
+        CacheHelper.bump_event_version(self.event.id)
+
+        stale = self.get()
+        again = self.get()
+
+        self.assertEqual(stale['version'], first['version'])
+        self.assertEqual(again['version'], first['version'])
+        self.schedule_page_refresh.assert_called_once_with(self.event.id, 10, None, False, False)
+
+    def test_refresh_task_stores_the_current_version(self):
+        from apps.utils.cache import CacheHelper
+
+        self.get()
+        version = CacheHelper.bump_event_version(self.event.id)
+
+        self.assertEqual(tasks.refresh_overall_leaderboard_task(self.event.id, 10), version)
+        self.assertEqual(self.get()['version'], version)
+
+    def test_stale_request_does_not_wait_for_the_publish(self):
+        import threading
+        from apps.utils.cache import CacheHelper
+        from . import overall_leaderboard
+
+        self.get()
+        CacheHelper.bump_event_version(self.event.id)
+        published, release = threading.Event(), threading.Event()
+
+        def slow_publish(*args):
+            published.set()
+            release.wait(5)
+
+        self.schedule_page_refresh.side_effect = self.real_schedule_page_refresh
+        with mock.patch.object(overall_leaderboard, 'queue_page_refresh', side_effect=slow_publish):
+            self.get()
+            # The request returned while the publisher thread is still blocked
+            self.assertTrue(published.wait(5))
+            self.assertFalse(release.is_set())
+            release.set()
+            overall_leaderboard.refresh_publisher().submit(lambda: None).result(5)
+
+    def test_unqueued_refresh_is_not_recomputed_in_process(self):
+        from .overall_leaderboard import page_cache_id, queue_page_refresh, refresh_lock_key
+
+        lock = refresh_lock_key(self.event.id, page_cache_id(10))
+        cache.add(lock, True)
+        with mock.patch('celery.current_app.connection_for_write', side_effect=ConnectionError('broker down')), \
+                mock.patch('apps.competitions.overall_leaderboard.store_overall_leaderboard') as store:
+            queue_page_refresh(self.event.id, 10)
+
+        store.assert_not_called()
+        # Left to expire, so the refresh is retried after the lock timeout
+        self.assertTrue(cache.get(lock))
+
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CompetitionViewSet, CompetitionEventViewSet
+from .views import CompetitionViewSet, CompetitionEventViewSet, SyncRunViewSet
 
 router = DefaultRouter()
 router.register(r'events', CompetitionEventViewSet, basename='competition-event')
+router.register(r'sync-runs', SyncRunViewSet, basename='sync-run')
 router.register(r'', CompetitionViewSet, basename='competition')
 
 urlpatterns = [
@@ -3,17 +3,31 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from django.utils import timezone
-from .models import Competition, CompetitionEvent
+from .models import Competition, CompetitionEvent, SyncRun
 from .serializers import (
     CompetitionSerializer,
     CompetitionListSerializer,
     CompetitionDetailSerializer,
     CompetitionEventSerializer,
     CompetitionEventListSerializer,
-    CompetitionEventDetailSerializer
+    CompetitionEventDetailSerializer,
+    SyncRunSerializer
 )
 
 
+def kaggle_rate_limited_response():
+    """429 for a request whose Kaggle call found no rate limit token in time."""
+    from django.conf import settings
+    import math
+
+    retry_after = math.ceil(60 / max(getattr(settings, 'KAGGLE_API_RATE_PER_MINUTE', 30), 1))
+    return Response(
+        {'error': 'Kaggle API rate limit reached, try again shortly'},
+        status=429,
+        headers={'Retry-After': str(retry_after)}
+    )
+
+
 class CompetitionEventViewSet(viewsets.ModelViewSet):
     """
     ViewSet for CompetitionEvent CRUD operations.
@@ -66,84 +80,114 @@ class CompetitionEventViewSet(viewsets.ModelViewSet):
         - Teams that don't participate in a competition get 0 points for that competition
         - Total score = sum of all normalized scores across competitions
         - Average score = total score / number of competitions in event (not just participated)
-        """
-        from apps.leaderboard.models import LeaderboardEntry
-        from django.db.models import Sum, Count, Avg, Q, F
-        from collections import defaultdict
         
-        event = self.get_object()
-        competitions = event.competitions.all()
-        total_competitions = competitions.count()
-        
-        if not total_competitions:
-            return Response({
-                'event_id': event.id,
-                'event_title': event.title,
-                'entries': [],
-                'competitions_count': 0
-            })
-        
-        # Get all leaderboard entries for competitions in this event
-        all_entries = LeaderboardEntry.objects.filter(
-            competition__in=competitions
-        ).select_related('competition').order_by('kaggle_team_name', 'competition__title')
-        
-        # Group entries by team and calculate normalized scores
-        team_data = defaultdict(lambda: {
-            'scores': [],
-            'competitions_participated': 0,
-            'competition_details': []
-        })
-        
-        for entry in all_entries:
-            team_name = entry.kaggle_team_name or 'Unknown'
-            competition = entry.competition
-            
-            # Calculate normalized score (0-100 scale)
-            # If scoring config is properly set, the score should already be normalized
-            # But we'll clamp it to 0-100 range for safety
-            if competition.points_for_perfect_score > 0:
-                # Score is already normalized during sync
-                normalized_score = max(0.0, min(competition.points_for_perfect_score, float(entry.score)))
-            else:
-                # Fallback: use raw score clamped to 0-100
-                normalized_score = max(0.0, min(100.0, float(entry.score)))
-            
-            team_data[team_name]['scores'].append(normalized_score)
-            team_data[team_name]['competitions_participated'] += 1
-            team_data[team_name]['competition_details'].append({
-                'competition_name': competition.title,
-                'score': normalized_score,
-                'rank': entry.rank
-            })
-        
-        # Calculate final scores for each team
-        leaderboard_data = []
-        for team_name, data in team_data.items():
-            total_score = sum(data['scores'])
-            # Average score across ALL competitions in event (treating missing as 0)
-            average_score = total_score / total_competitions
-            
-            leaderboard_data.append({
-                'team_name': team_name,
-                'total_score': round(total_score, 2),
-                'average_score': round(average_score, 2),
-                'competitions_participated': data['competitions_participated'],
-                'missing_competitions': total_competitions - data['competitions_participated'],
-                'competition_details': data['competition_details']
-            })
-        
-        # Sort by total score (descending)
-        leaderboard_data.sort(key=lambda x: x['total_score'], reverse=True)
+        Totals come from the materialized EventStanding table, which the
+        leaderboard syncs keep up to date (see apps/leaderboard/standings.py),
+        or with EVENT_STANDINGS_SOURCE = 'database' are aggregated from the
+        entries in SQL. Either way the database orders the teams (total, then
+        team name), so a team's rank is its position.
+        
+        Pages are cached per event version and refreshed in the background
+        after a sync, see apps/competitions/overall_leaderboard.py.
+        
+        Query params:
+        - limit: Teams per page (EVENT_STANDINGS_PAGE_SIZE by default)
+        - cursor: next_cursor of the previous page, to continue after it
+        - top: Just the first N teams, without a next_cursor
+        - expand=details: Include each team's competition_details (for this
+          page only; see team_breakdown for a single team)
+        """
+        from django.conf import settings
+        from apps.leaderboard.standings import decode_standings_cursor
+        from .overall_leaderboard import get_overall_leaderboard
+        
+        details = 'details' in request.query_params.get('expand', '').split(',')
+        max_limit = getattr(settings, 'EVENT_STANDINGS_MAX_PAGE_SIZE', 1000)
+        top = request.query_params.get('top')
+        cursor = None if top else request.query_params.get('cursor')
+        try:
+            limit = int(top or request.query_params.get('limit', getattr(settings, 'EVENT_STANDINGS_PAGE_SIZE', 100)))
+        except ValueError:
+            return Response({'error': 'limit and top must be integers'}, status=400)
+        if not 1 <= limit <= max_limit:
+            return Response({'error': f'limit and top must be between 1 and {max_limit}'}, status=400)
         
-        # Assign ranks
-        for rank, entry in enumerate(leaderboard_data, 1):
-            entry['rank'] = rank
+        try:
+            if cursor:
+                decode_standings_cursor(cursor)
+            data = get_overall_leaderboard(self.get_object(), limit, cursor, bool(top), details)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
         
+        return Response(data)
+
+    @action(detail=True, methods=['get'])
+    def team_breakdown(self, request, slug=None):
+        """
+        One team's overall standing in this event with its per-competition scores.
+
+        Query params:
+        - team_id: Team id as listed in the overall leaderboard
+        - team: Team name, if no team_id is given (400 if several teams
+          of the event have it)
+        """
+        from django.conf import settings
+        from django.db.models import Q
+        from apps.leaderboard.models import EventStanding, Team
+        from apps.leaderboard.standings import standings_queryset, team_competition_details
+
+        team_id = request.query_params.get('team_id')
+        team_name = request.query_params.get('team')
+        if team_id:
+            try:
+                team_id = int(team_id)
+            except ValueError:
+                return Response({'error': 'team_id must be an integer'}, status=400)
+        elif not team_name:
+            return Response({'error': 'team_id or team is required'}, status=400)
+
+        event = self.get_object()
+        if not team_id:
+            team_ids = list(Team.objects.filter(
+                name=team_name, entries__competition__event=event
+            ).values_list('id', flat=True).distinct()[:2])
+            if len(team_ids) > 1:
+                return Response({'error': 'Several teams have this name, pass team_id'}, status=400)
+            team_id = team_ids[0] if team_ids else None
+        total_competitions = event.competitions.count()
+
+        if getattr(settings, 'EVENT_STANDINGS_SOURCE', 'materialized') == 'database':
+            standings = standings_queryset(event.id, competitions_count=total_competitions)
+            standing = standings_queryset(event.id, [team_id], total_competitions).first() if team_id else None
+        else:
+            standings = EventStanding.objects.filter(event=event).values(
+                'team_id', 'team_name', 'total_score', 'average_score', 'competitions_participated'
+            )
+            standing = standings.filter(team_id=team_id).first() if team_id else None
+
+        if standing is None:
+            return Response({'error': 'Team has no standing in this event'}, status=404)
+
+        # Teams ahead: higher total, or the same total and an earlier name (or id)
+        rank = standings.filter(
+            Q(total_score__gt=standing['total_score']) |
+            Q(total_score=standing['total_score'], team_name__lt=standing['team_name']) |
+            Q(total_score=standing['total_score'], team_name=standing['team_name'], team_id__lt=standing['team_id'])
+        ).order_by().count() + 1
+
         return Response({
             'event_id': event.id,
             'event_title': event.title,
-            'entries': leaderboard_data,
+            'team_id': standing['team_id'],
+            'team_name': standing['team_name'],
+            'total_score': round(standing['total_score'] or 0.0, 2),
+            'average_score': round(standing['average_score'] or 0.0, 2),
+            'competitions_participated': standing['competitions_participated'],
+            'missing_competitions': total_competitions - standing['competitions_participated'],
+            'rank': rank,
+            'competition_details': team_competition_details(event.id, [standing['team_id']]).get(
+                standing['team_id'], []
+            ),
             'competitions_count': total_competitions
         })
 
@@ -195,17 +239,31 @@ class CompetitionViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def leaderboard(self, request, pk=None):
-        """Get leaderboard for a specific competition."""
+        """
+        Get leaderboard for a specific competition.
+        
+        Cached per competition version: syncs that change the leaderboard and
+        other writers of its entries bump the version, which orphans the
+        cached copy.
+        """
         competition = self.get_object()
+        from django.core.cache import cache
         from apps.leaderboard.models import LeaderboardEntry
         from apps.leaderboard.serializers import LeaderboardEntrySerializer
-        
-        entries = LeaderboardEntry.objects.filter(
-            competition=competition
-        ).select_related('user').order_by('rank')
-        
-        serializer = LeaderboardEntrySerializer(entries, many=True)
-        return Response(serializer.data)
+        from apps.utils.cache import get_cache_timeout, get_cache_version, versioned_cache_key
+        
+        # Read the version first, so a bump during the query orphans this copy
+        version = get_cache_version('competition', competition.id)
+        key = versioned_cache_key('competition', competition.id, 'leaderboard', version=version)
+        data = cache.get(key)
+        if data is None:
+            entries = LeaderboardEntry.objects.filter(
+                competition=competition
+            ).select_related('user').order_by('rank')
+            
+            data = list(LeaderboardEntrySerializer(entries, many=True).data)
+            cache.set(key, data, get_cache_timeout('leaderboard'))
+        return Response(data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def fetch_kaggle_leaderboard(self, request, pk=None):
@@ -232,7 +290,8 @@ class CompetitionViewSet(viewsets.ModelViewSet):
         try:
             sync_service = KaggleLeaderboardSync()
             # Pass the Competition object, not just the kaggle_competition_id string
-            result = sync_service.sync_competition_leaderboard(competition)
+            # Manual syncs always rewrite, even if the leaderboard looks unchanged
+            result = sync_service.sync_competition_leaderboard(competition, force=True)
             
             if not result['success']:
                 error_msg = result.get('error', 'Failed to sync leaderboard')
@@ -331,10 +390,14 @@ class CompetitionViewSet(viewsets.ModelViewSet):
             )
 
         # Create leaderboard entry
-        LeaderboardEntry.objects.create(
+        from apps.leaderboard.standings import schedule_standings_update
+        from apps.utils.cache import CacheHelper
+        entry = LeaderboardEntry.objects.create(
             user=user,
             competition=competition
         )
+        schedule_standings_update(competition.event_id, [entry.team_id])
+        CacheHelper.bump_competition_version(competition.id)
         
         competition.increment_participants()
         user.increment_competitions()
@@ -345,12 +408,17 @@ class CompetitionViewSet(viewsets.ModelViewSet):
     def search_kaggle(self, request):
         """Search for competitions on Kaggle."""
         from apps.submissions.kaggle_service import get_kaggle_service
+        from apps.submissions.kaggle_rate_limit import KaggleRateLimitTimeout, limit_kaggle_wait
         
         search_term = request.query_params.get('q', '')
         page = int(request.query_params.get('page', 1))
         
         kaggle_service = get_kaggle_service()
-        results = kaggle_service.search_competitions(search_term=search_term, page=page)
+        try:
+            with limit_kaggle_wait():
+                results = kaggle_service.search_competitions(search_term=search_term, page=page)
+        except KaggleRateLimitTimeout:
+            return kaggle_rate_limited_response()
         
         if results is None:
             return Response(
@@ -377,6 +445,7 @@ class CompetitionViewSet(viewsets.ModelViewSet):
     def import_from_kaggle(self, request):
         """Import a competition from Kaggle by ID with scoring parameters."""
         from apps.submissions.kaggle_service import get_kaggle_service
+        from apps.submissions.kaggle_rate_limit import KaggleRateLimitTimeout, limit_kaggle_wait
         from datetime import datetime
         import logging
         
@@ -437,7 +506,11 @@ class CompetitionViewSet(viewsets.ModelViewSet):
         
         # Fetch from Kaggle
         kaggle_service = get_kaggle_service()
-        comp_data = kaggle_service.get_competition_details(kaggle_id)
+        try:
+            with limit_kaggle_wait():
+                comp_data = kaggle_service.get_competition_details(kaggle_id)
+        except KaggleRateLimitTimeout:
+            return kaggle_rate_limited_response()
         
         if not comp_data:
             return Response(
@@ -529,3 +602,79 @@ class CompetitionViewSet(viewsets.ModelViewSet):
             'message': 'Competition imported successfully',
             'competition': serializer.data
         })
+
+
+class SyncRunViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only ViewSet for the leaderboard sync ledger (admins only).
+    Filter with ?competition=<id> and ?outcome=<outcome>.
+    """
+    queryset = SyncRun.objects.all().select_related('competition')
+    serializer_class = SyncRunSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['started_at', 'total_seconds', 'rows', 'download_bytes']
+    ordering = ['-started_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        competition_id = self.request.query_params.get('competition')
+        if competition_id:
+            queryset = queryset.filter(competition_id=competition_id)
+        outcome = self.request.query_params.get('outcome')
+        if outcome:
+            queryset = queryset.filter(outcome=outcome)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Per-competition sync cost over the last ?days=7 days.
+        Compare against earlier windows to spot competitions whose sync cost is growing.
+        """
+        from django.db.models import Avg, Count, Max, Q
+        
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            days = 7
+        since = timezone.now() - timezone.timedelta(days=days)
+        
+        rows = self.get_queryset().filter(started_at__gte=since).order_by().values(
+            'competition', 'competition__title'
+        ).annotate(
+            runs=Count('id'),
+            failed=Count('id', filter=Q(outcome='failed')),
+            unchanged=Count('id', filter=Q(outcome='unchanged')),
+            avg_total_seconds=Avg('total_seconds'),
+            avg_download_seconds=Avg('download_seconds'),
+            avg_write_seconds=Avg('write_seconds'),
+            max_download_bytes=Max('download_bytes'),
+            max_rows=Max('rows'),
+        ).order_by('-avg_total_seconds')
+        
+        return Response({
+            'days': days,
+            'competitions': [
+                {
+                    'competition': row['competition'],
+                    'competition_title': row['competition__title'],
+                    'runs': row['runs'],
+                    'failed': row['failed'],
+                    'unchanged': row['unchanged'],
+                    'avg_total_seconds': row['avg_total_seconds'],
+                    'avg_download_seconds': row['avg_download_seconds'],
+                    'avg_write_seconds': row['avg_write_seconds'],
+                    'max_download_bytes': row['max_download_bytes'],
+                    'max_rows': row['max_rows'],
+                }
+                for row in rows
+            ]
+        })
+
+    @action(detail=False, methods=['get'], url_path='kaggle-rate-limit')
+    def kaggle_rate_limit(self, request):
+        """Current state of the shared Kaggle API rate limiter, per pooled credential."""
+        from apps.submissions.kaggle_rate_limit import get_kaggle_rate_limiter
+        
+        return Response(get_kaggle_rate_limiter().status())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LeaderboardEntry
+from .models import LeaderboardEntry, EventStanding, Team
 
 
 @admin.register(LeaderboardEntry)
@@ -9,3 +9,26 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'competition__title']
     ordering = ['competition', 'rank']
     readonly_fields = ['last_submission_time']
+
+
+@admin.register(EventStanding)
+class EventStandingAdmin(admin.ModelAdmin):
+    list_display = ['team_name', 'event', 'total_score', 'average_score', 'competitions_participated', 'updated_at']
+    list_filter = ['event']
+    search_fields = ['team_name', 'event__title']
+    ordering = ['event', '-total_score', 'team_name']
+    
+    def get_readonly_fields(self, request, obj=None):
+        # Maintained from the leaderboard syncs
+        return [field.name for field in self.model._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+    ordering = ['name']
+    readonly_fields = ['created_at']
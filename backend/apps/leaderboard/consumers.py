@@ -81,6 +81,43 @@ class LeaderboardConsumer(AsyncWebsocketConsumer):
         }
 
 
+class EventLeaderboardConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer notifying clients when an event's overall standings change.
+    Sends a small notification; clients refetch the overall leaderboard.
+    """
+    
+    async def connect(self):
+        """Handle WebSocket connection."""
+        from apps.competitions.sync_hooks import event_group_name
+        
+        self.event_id = self.scope['url_route']['kwargs']['event_id']
+        self.room_group_name = event_group_name(self.event_id)
+        
+        # Join room group
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+        
+        await self.accept()
+    
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        # Leave room group
+        await self.channel_layer.group_discard(
+            self.room_group_name,
+            self.channel_name
+        )
+    
+    async def standings_update(self, event):
+        """Receive standings change notification from room group."""
+        await self.send(text_data=json.dumps({
+            'type': 'standings_update',
+            'data': event['data']
+        }))
+
+
 # Helper function to send updates from outside the consumer
 def send_leaderboard_update(competition_id):
     """
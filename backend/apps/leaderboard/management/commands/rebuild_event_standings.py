@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.competitions.models import CompetitionEvent
+from apps.leaderboard.standings import refresh_event_standings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized overall standings of competition events from their leaderboard entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event',
+            action='append',
+            dest='events',
+            metavar='SLUG',
+            help='Slug of an event to rebuild (repeatable), defaults to all events'
+        )
+
+    def handle(self, *args, **options):
+        events = CompetitionEvent.objects.all()
+        if options['events']:
+            events = events.filter(slug__in=options['events'])
+        
+        for event in events:
+            teams = refresh_event_standings(event.id)
+            self.stdout.write(self.style.SUCCESS(f"✅ {event.title}: {teams} teams"))
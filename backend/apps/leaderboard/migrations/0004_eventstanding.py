@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0007_competition_sync_breaker'),
+        ('leaderboard', '0003_alter_leaderboardentry_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_name', models.CharField(help_text="Kaggle team name the standing aggregates ('Unknown' if missing)", max_length=255)),
+                ('total_score', models.FloatField(default=0.0, help_text="Sum of the team's points across the event's competitions")),
+                ('average_score', models.FloatField(default=0.0, help_text='Total score divided by the number of competitions in the event')),
+                ('competitions_participated', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'event_standings',
+                'ordering': ['-total_score', 'team_name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['kaggle_team_name', 'competition'], name='leaderboard_kaggle__4e6bc9_idx'),
+        ),
+        migrations.AddField(
+            model_name='eventstanding',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='competitions.competitionevent'),
+        ),
+        migrations.AddIndex(
+            model_name='eventstanding',
+            index=models.Index(fields=['event', '-total_score', 'team_name'], name='event_stand_event_i_b0f385_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventstanding',
+            unique_together={('event', 'team_name')},
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:01
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+import django.db.models.deletion
+
+
+def team_name_expression(field):
+    return Coalesce(NullIf(field, Value('')), Value('Unknown'))
+
+
+def backfill_teams(apps, schema_editor):
+    """Create a Team per stored team name and link the entries to it."""
+    Team = apps.get_model('leaderboard', 'Team')
+    LeaderboardEntry = apps.get_model('leaderboard', 'LeaderboardEntry')
+
+    names = LeaderboardEntry.objects.annotate(
+        name=team_name_expression('kaggle_team_name')
+    ).values_list('name', flat=True).distinct()
+    Team.objects.bulk_create([Team(name=name) for name in names], batch_size=500, ignore_conflicts=True)
+
+    LeaderboardEntry.objects.update(team_id=Subquery(
+        Team.objects.filter(name=team_name_expression(OuterRef('kaggle_team_name'))).values('id')[:1]
+    ))
+
+
+def clear_standings(apps, schema_editor):
+    """Standings were keyed by name; they are rebuilt by team on first read or with rebuild_event_standings."""
+    apps.get_model('leaderboard', 'EventStanding').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0007_competition_sync_breaker'),
+        ('leaderboard', '0004_eventstanding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'teams',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='leaderboardentry',
+            name='leaderboard_kaggle__4e6bc9_idx',
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='kaggle_team_id',
+            field=models.BigIntegerField(blank=True, help_text='TeamId from Kaggle, identifies the team within the competition', null=True),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='team',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entries', to='leaderboard.team'),
+        ),
+        migrations.AlterField(
+            model_name='eventstanding',
+            name='team_name',
+            field=models.CharField(help_text='Name of the team, copied for ordering and cursors', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['team', 'competition'], name='leaderboard_team_id_3e2cba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['competition', 'kaggle_team_id'], name='leaderboard_competi_428ee5_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventstanding',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='eventstanding',
+            name='team',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='leaderboard.team'),
+        ),
+        migrations.RunPython(backfill_teams, migrations.RunPython.noop),
+        migrations.RunPython(clear_standings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='eventstanding',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='leaderboard.team'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventstanding',
+            unique_together={('event', 'team')},
+        ),
+    ]
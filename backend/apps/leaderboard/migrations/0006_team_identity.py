@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0005_team'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='eventstanding',
+            options={'ordering': ['-total_score', 'team_name', 'team']},
+        ),
+        migrations.RemoveIndex(
+            model_name='eventstanding',
+            name='event_stand_event_i_b0f385_idx',
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='eventstanding',
+            index=models.Index(fields=['event', '-total_score', 'team_name', 'team'], name='event_stand_event_i_fbad5a_idx'),
+        ),
+    ]
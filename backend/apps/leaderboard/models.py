@@ -2,6 +2,80 @@ from django.db import models
 from django.conf import settings
 
 
+class Team(models.Model):
+    """
+    Integer identity of a team across the competitions of the platform.
+
+    Within a competition a team is its Kaggle TeamId: the sync keeps an
+    entry's team when the team is renamed on Kaggle (and renames the Team),
+    and two Kaggle teams of the same name get separate teams. Across
+    competitions, where TeamIds differ, an entry joins the team of the same
+    name that is not in the competition yet; so a team renamed in one of
+    several competitions is split off to a team of its new name rather than
+    renamed everywhere. Entries without a team name share the 'Unknown' team.
+    """
+    name = models.CharField(max_length=255, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'teams'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def ids_for_new_entries(cls, competition_id, names):
+        """
+        Teams for entries that join a competition, creating the teams that are missing.
+
+        Args:
+            competition_id: Competition the entries belong to
+            names: Team name of each entry (standing_team_name), names may repeat
+
+        Returns:
+            list: Team id of each entry, in the order of names
+        """
+        from .standings import UNKNOWN_TEAM, batches
+
+        names = list(names)
+        available = {}
+        for batch in batches(set(names) - {UNKNOWN_TEAM}):
+            # Teams of these names from other competitions
+            rows = cls.objects.filter(name__in=batch).exclude(
+                entries__competition_id=competition_id
+            ).order_by('id').values_list('name', 'id')
+            for name, team_id in rows:
+                available.setdefault(name, team_id)
+
+        ids = []
+        to_create = []
+        for position, name in enumerate(names):
+            if name == UNKNOWN_TEAM:
+                team_id = cls.unknown_team_id()
+            else:
+                # Each team joins one entry per competition, the next entry of the name is another team
+                team_id = available.pop(name, None)
+                if team_id is None:
+                    to_create.append((position, cls(name=name)))
+            ids.append(team_id)
+
+        cls.objects.bulk_create([team for _, team in to_create], batch_size=500)
+        for position, team in to_create:
+            ids[position] = team.pk
+        return ids
+
+    @classmethod
+    def unknown_team_id(cls):
+        """Id of the team shared by entries without a team name."""
+        from .standings import UNKNOWN_TEAM
+
+        team_id = cls.objects.filter(name=UNKNOWN_TEAM).order_by('id').values_list('id', flat=True).first()
+        if team_id is None:
+            team_id = cls.objects.create(name=UNKNOWN_TEAM).pk
+        return team_id
+
+
 class LeaderboardEntry(models.Model):
     """
     Model representing a user's standing in a competition leaderboard.
@@ -9,6 +83,9 @@ class LeaderboardEntry(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_entries', null=True, blank=True)
     competition = models.ForeignKey('competitions.Competition', on_delete=models.CASCADE, related_name='leaderboard_entries')
     kaggle_team_name = models.CharField(max_length=255, blank=True, null=True, help_text="Team name from Kaggle (for Kaggle-only participants)")
+    kaggle_team_id = models.BigIntegerField(null=True, blank=True, help_text="TeamId from Kaggle, identifies the team within the competition")
+    # Indexed by the (team, competition) index below
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, related_name='entries', null=True, blank=True, db_index=False)
     best_score = models.FloatField(default=0.0)
     score = models.FloatField(default=0.0, help_text="Current score")
     rank = models.IntegerField(default=0)
@@ -22,12 +99,35 @@ class LeaderboardEntry(models.Model):
         indexes = [
             models.Index(fields=['competition', 'rank']),
             models.Index(fields=['user', 'competition']),
+            models.Index(fields=['team', 'competition']),
+            models.Index(fields=['competition', 'kaggle_team_id']),
         ]
 
     def __str__(self):
         display_name = self.user.username if self.user else self.kaggle_team_name
         return f'{display_name} - {self.competition.title} - Rank {self.rank}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the team name as loaded, so save can tell whether it changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_kaggle_team_name = instance.__dict__.get('kaggle_team_name')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The sync resolves teams in bulk; entries saved one by one (registrations,
+        # legacy tasks) are given a team here when they have none or were renamed
+        update_fields = kwargs.get('update_fields')
+        renamed = getattr(self, '_loaded_kaggle_team_name', self.kaggle_team_name) != self.kaggle_team_name
+        if (self.team_id is None or renamed) and (update_fields is None or 'kaggle_team_name' in update_fields):
+            from .standings import standing_team_name
+
+            self.team_id = Team.ids_for_new_entries(self.competition_id, [standing_team_name(self.kaggle_team_name)])[0]
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'team'}
+        super().save(*args, **kwargs)
+        self._loaded_kaggle_team_name = self.kaggle_team_name
+
     def update_best_score(self, new_score):
         """Update best score if the new score is better."""
         # Assuming higher score is better - adjust based on competition metric
@@ -36,3 +136,30 @@ class LeaderboardEntry(models.Model):
             self.save(update_fields=['best_score'])
             return True
         return False
+
+
+class EventStanding(models.Model):
+    """
+    A team's overall standing in a competition event.
+    Materialized from the event's leaderboard entries and kept up to date from
+    sync change sets, see apps/leaderboard/standings.py.
+    """
+    event = models.ForeignKey('competitions.CompetitionEvent', on_delete=models.CASCADE, related_name='standings')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='standings')
+    team_name = models.CharField(max_length=255, help_text="Name of the team, copied for ordering and cursors")
+    total_score = models.FloatField(default=0.0, help_text="Sum of the team's points across the event's competitions")
+    average_score = models.FloatField(default=0.0, help_text="Total score divided by the number of competitions in the event")
+    competitions_participated = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'event_standings'
+        # Team names are not unique, the team id breaks their ties
+        ordering = ['-total_score', 'team_name', 'team']
+        unique_together = [['event', 'team']]
+        indexes = [
+            models.Index(fields=['event', '-total_score', 'team_name', 'team']),
+        ]
+
+    def __str__(self):
+        return f'{self.team_name} - {self.event.title} - {self.total_score:.2f}'
@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/leaderboard/(?P<competition_id>\d+)/$', consumers.LeaderboardConsumer.as_asgi()),
+    re_path(r'ws/event-leaderboard/(?P<event_id>\d+)/$', consumers.EventLeaderboardConsumer.as_asgi()),
 ]
@@ -16,7 +16,7 @@ class LeaderboardEntrySerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'username', 'display_name', 'elo_rating', 'rating_tier',
             'best_score', 'score', 'rank', 'submissions_count', 'last_submission_time',
-            'kaggle_team_name', 'submission_date'
+            'kaggle_team_id', 'kaggle_team_name', 'team', 'submission_date'
         ]
         read_only_fields = ['id']
     
@@ -0,0 +1,461 @@
+"""
+Materialized overall standings of competition events.
+
+EventStanding holds one row per team and event with the team's total and
+average points, so the overall leaderboard is a single ordered read instead
+of a regroup of every leaderboard entry of the event per request. Teams are
+the integer Team identities of the entries (see the Team model: a renamed
+Kaggle team keeps its team, two Kaggle teams of the same name do not share
+one); grouping, lookups and change sets all key on the team id.
+
+Standings are kept up to date from the leaderboard syncs: the
+update_event_standings post-sync hook re-aggregates only the teams in the
+sync's change set. Both paths aggregate from the stored entries (not by
+adding deltas), so applying a change set twice or racing a full rebuild
+cannot drift the totals. Truncated change sets, competitions moving between
+events and deleted competitions fall back to a full rebuild of the event.
+
+standings_queryset computes the same totals in SQL (GROUP BY team with the
+clamp as a LEAST/GREATEST expression); rebuilds use it, and the overall
+leaderboard reads it directly with EVENT_STANDINGS_SOURCE = 'database'.
+
+Both are read a page at a time with a keyset cursor on (total, team name,
+team id), which carries the rank of the last team served, see standings_page.
+
+Entries written outside the syncs (registrations, legacy Kaggle tasks)
+update the standings through schedule_standings_update.
+
+Scoring (unchanged from the original overall leaderboard):
+- A competition is worth 0 to points_for_perfect_score points (0 to 100
+  when the competition has no scoring config), scores are clamped to that
+- Total score = sum of a team's points across the event's competitions
+- Average score = total score / number of competitions in the event
+- Competitions participated counts distinct competitions (the original
+  counted entries, so a name shared by two entries of one competition
+  could report more competitions than the event has)
+"""
+import base64
+import json
+from django.db import transaction
+from django.db.models import Q, F, Value, Case, When, Sum, Count, FloatField
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_TEAM = 'Unknown'
+
+# Teams per query and rows per bulk write (keeps SQLite under its variable limit)
+STANDINGS_BATCH_SIZE = 500
+
+
+def standing_team_name(kaggle_team_name):
+    """Name of the Team an entry belongs to."""
+    return kaggle_team_name or UNKNOWN_TEAM
+
+
+def entry_points(score, points_for_perfect_score):
+    """Points a leaderboard score is worth in the overall standings."""
+    cap = points_for_perfect_score if points_for_perfect_score > 0 else 100.0
+    return max(0.0, min(float(cap), float(score)))
+
+
+def entry_points_expression():
+    """entry_points as a database expression on LeaderboardEntry."""
+    cap = Case(
+        When(competition__points_for_perfect_score__gt=0, then=F('competition__points_for_perfect_score')),
+        default=Value(100.0),
+        output_field=FloatField()
+    )
+    return Greatest(Value(0.0), Least(F('score'), cap), output_field=FloatField())
+
+
+def batches(items, size=STANDINGS_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def standings_queryset(event_id, team_ids=None, competitions_count=None):
+    """
+    Team totals of an event aggregated from its leaderboard entries in SQL.
+
+    Args:
+        event_id: CompetitionEvent ID
+        team_ids: Only aggregate these teams (None for all)
+        competitions_count: Number of competitions in the event, to annotate
+            average_score (None to skip it)
+
+    Returns:
+        QuerySet: dicts with team_id, team_name, total_score and
+        competitions_participated (plus average_score), best total first and
+        ties by team name and id, so the position in the result is the team's rank
+    """
+    from .models import LeaderboardEntry
+
+    entries = LeaderboardEntry.objects.filter(competition__event_id=event_id, team__isnull=False)
+    if team_ids is not None:
+        entries = entries.filter(team_id__in=team_ids)
+
+    standings = entries.values('team_id', team_name=F('team__name')).annotate(
+        total_score=Sum(entry_points_expression(), output_field=FloatField()),
+        # Distinct, as the entries of the 'Unknown' team can share a competition
+        competitions_participated=Count('competition_id', distinct=True),
+    ).order_by('-total_score', 'team_name', 'team_id')
+
+    if competitions_count is not None:
+        standings = standings.annotate(
+            average_score=F('total_score') / Value(float(max(competitions_count, 1)), output_field=FloatField())
+        )
+    return standings
+
+
+def aggregate_standings(event_id, team_ids=None):
+    """
+    Aggregate the event's leaderboard entries per team.
+
+    Args:
+        event_id: CompetitionEvent ID
+        team_ids: Only aggregate these teams (None for all)
+
+    Returns:
+        dict: team id -> (team name, total points, competitions participated)
+    """
+    return {
+        row['team_id']: (row['team_name'], row['total_score'] or 0.0, row['competitions_participated'])
+        for row in standings_queryset(event_id, team_ids).order_by()
+    }
+
+
+def team_competition_details(event_id, team_ids):
+    """
+    Per-competition breakdown of the given teams in an event.
+
+    Reads through the (team, competition) index of the leaderboard entries,
+    so the cost follows the teams asked for, not the event.
+
+    Returns:
+        dict: team id -> list of {competition_name, score, rank}, by competition title
+    """
+    from .models import LeaderboardEntry
+
+    details = {}
+    for ids in batches(team_ids):
+        rows = LeaderboardEntry.objects.filter(
+            team_id__in=ids, competition__event_id=event_id
+        ).order_by('competition__title').values_list(
+            'team_id', 'competition__title', 'competition__points_for_perfect_score', 'score', 'rank'
+        )
+        for team_id, competition_name, points_for_perfect_score, score, rank in rows:
+            details.setdefault(team_id, []).append({
+                'competition_name': competition_name,
+                'score': entry_points(score, points_for_perfect_score),
+                'rank': rank
+            })
+    return details
+
+
+def encode_standings_cursor(rank, total_score, team_name, team_id):
+    """Opaque cursor pointing after the team at rank."""
+    payload = json.dumps([rank, total_score, team_name, team_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_standings_cursor(cursor):
+    """
+    Decode a cursor from encode_standings_cursor.
+
+    Returns:
+        tuple: (rank, total_score, team_name, team_id) of the last team served;
+        team_id is None for cursors issued before it was included
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) not in (3, 4):
+            raise ValueError
+        rank, total_score, team_name, team_id = (values + [None])[:4]
+        if not isinstance(rank, int) or not isinstance(team_name, str):
+            raise ValueError
+        if team_id is not None and not isinstance(team_id, int):
+            raise ValueError
+        return rank, float(total_score), team_name, team_id
+    except (ValueError, TypeError, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def standings_page(standings, limit, cursor=None):
+    """
+    One page of standings ordered by total (descending), then team name and id.
+
+    The cursor is a keyset position, so each page is an index range scan of
+    limit + 1 rows however deep it is, and teams are neither repeated nor
+    skipped while scrolling. Ranks continue from the rank in the cursor.
+
+    Args:
+        standings: Values queryset with team_id, team_name and total_score, in standings order
+        limit: Teams per page
+        cursor: Cursor from the previous page (None for the first page)
+
+    Returns:
+        tuple: (rows with rank set, cursor of the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    rank = 0
+    if cursor:
+        rank, total_score, team_name, team_id = decode_standings_cursor(cursor)
+        after = Q(total_score__lt=total_score) | Q(total_score=total_score, team_name__gt=team_name)
+        if team_id is not None:
+            after |= Q(total_score=total_score, team_name=team_name, team_id__gt=team_id)
+        standings = standings.filter(after)
+
+    rows = list(standings[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    for offset, row in enumerate(rows, 1):
+        row['rank'] = rank + offset
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_standings_cursor(last['rank'], last['total_score'], last['team_name'], last['team_id'])
+    return rows, next_cursor
+
+
+def lock_event(event_id):
+    """Serialize standings writes of an event (must be called inside a transaction)."""
+    from apps.competitions.models import CompetitionEvent
+
+    return CompetitionEvent.objects.select_for_update().filter(pk=event_id).values_list('pk', flat=True).first()
+
+
+def write_standings(event_id, totals, team_ids, competitions_count):
+    """
+    Store the aggregated totals of team_ids, deleting teams that have no entries left.
+
+    Returns:
+        dict: Counts of created, updated and deleted standings
+    """
+    from .models import EventStanding
+
+    existing = {
+        standing.team_id: standing
+        for standing in EventStanding.objects.filter(event_id=event_id, team_id__in=team_ids)
+    }
+
+    now = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    for team_id in team_ids:
+        standing = existing.get(team_id)
+        if team_id not in totals:
+            if standing is not None:
+                to_delete.append(standing.id)
+            continue
+
+        team_name, total_score, participated = totals[team_id]
+        average_score = total_score / competitions_count if competitions_count else 0.0
+        if standing is None:
+            to_create.append(EventStanding(
+                event_id=event_id,
+                team_id=team_id,
+                team_name=team_name,
+                total_score=total_score,
+                average_score=average_score,
+                competitions_participated=participated,
+            ))
+        elif (standing.team_name, standing.total_score, standing.average_score, standing.competitions_participated) != (
+                team_name, total_score, average_score, participated):
+            standing.team_name = team_name
+            standing.total_score = total_score
+            standing.average_score = average_score
+            standing.competitions_participated = participated
+            # bulk_update skips auto_now
+            standing.updated_at = now
+            to_update.append(standing)
+
+    if to_create:
+        EventStanding.objects.bulk_create(to_create, batch_size=STANDINGS_BATCH_SIZE)
+    if to_update:
+        EventStanding.objects.bulk_update(
+            to_update,
+            ['team_name', 'total_score', 'average_score', 'competitions_participated', 'updated_at'],
+            batch_size=STANDINGS_BATCH_SIZE
+        )
+    if to_delete:
+        EventStanding.objects.filter(id__in=to_delete).delete()
+
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(to_delete)}
+
+
+def refresh_event_standings(event_id):
+    """
+    Rebuild all standings of an event from its leaderboard entries.
+
+    Args:
+        event_id: CompetitionEvent ID
+
+    Returns:
+        int: Number of standings stored
+    """
+    from apps.competitions.models import Competition
+    from apps.utils.cache import CacheHelper
+    from .models import EventStanding
+
+    with transaction.atomic():
+        if lock_event(event_id) is None:
+            return 0
+
+        competitions_count = Competition.objects.filter(event_id=event_id).count()
+        totals = aggregate_standings(event_id)
+
+        EventStanding.objects.filter(event_id=event_id).delete()
+        EventStanding.objects.bulk_create(
+            [
+                EventStanding(
+                    event_id=event_id,
+                    team_id=team_id,
+                    team_name=team_name,
+                    total_score=total_score,
+                    average_score=total_score / competitions_count if competitions_count else 0.0,
+                    competitions_participated=participated,
+                )
+                for team_id, (team_name, total_score, participated) in totals.items()
+            ],
+            batch_size=STANDINGS_BATCH_SIZE
+        )
+
+    # Cached overall leaderboard pages of the event are now out of date
+    CacheHelper.bump_event_version(event_id)
+
+    logger.info(f"🏆 Rebuilt standings of event {event_id}: {len(totals)} teams")
+    return len(totals)
+
+
+def rename_teams(names):
+    """
+    Rename teams whose Kaggle team was renamed, with their event standings.
+
+    Only teams that play in the one competition the rename was seen in are
+    renamed; the sync splits off teams that also play elsewhere (see
+    KaggleLeaderboardSync.assign_teams).
+
+    Args:
+        names: dict of team id -> new team name
+
+    Returns:
+        set: IDs of the events whose standings were renamed
+    """
+    from apps.utils.cache import CacheHelper
+    from .models import Team, EventStanding
+
+    event_ids = set()
+    for team_id, name in names.items():
+        Team.objects.filter(pk=team_id).update(name=name)
+        standings = EventStanding.objects.filter(team_id=team_id)
+        event_ids.update(standings.values_list('event_id', flat=True))
+        standings.update(team_name=name)
+
+    for event_id in event_ids:
+        # Cached pages show the old name
+        transaction.on_commit(lambda event_id=event_id: CacheHelper.bump_event_version(event_id))
+    return event_ids
+
+
+def update_team_standings(event_id, team_ids):
+    """
+    Re-aggregate the standings of some teams of an event from their entries.
+
+    Args:
+        event_id: CompetitionEvent ID
+        team_ids: IDs of the teams whose entries changed
+
+    Returns:
+        dict: Counts of created, updated and deleted standings
+    """
+    from apps.competitions.models import Competition
+
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    with transaction.atomic():
+        if lock_event(event_id) is None:
+            return counts
+
+        competitions_count = Competition.objects.filter(event_id=event_id).count()
+        for ids in batches(sorted(team_ids)):
+            totals = aggregate_standings(event_id, ids)
+            for key, value in write_standings(event_id, totals, ids, competitions_count).items():
+                counts[key] += value
+    return counts
+
+
+def schedule_standings_update(event_id, team_ids=None):
+    """
+    Update an event's standings once the current transaction commits.
+
+    For leaderboard entries written outside the syncs (registrations, the
+    legacy Kaggle tasks), which do not run the post-sync hooks. Bumps the
+    event's cache version, so cached overall leaderboard pages follow.
+
+    Args:
+        event_id: CompetitionEvent ID (None for standalone competitions)
+        team_ids: IDs of the teams whose entries changed (None rebuilds the event)
+    """
+    from apps.utils.cache import CacheHelper
+
+    if not event_id:
+        return
+
+    def update():
+        if team_ids is None:
+            refresh_event_standings(event_id)
+        elif team_ids:
+            update_team_standings(event_id, {team_id for team_id in team_ids if team_id})
+            CacheHelper.bump_event_version(event_id)
+
+    transaction.on_commit(update)
+
+
+def change_set_teams(change_set):
+    """Team ids touched by a change set (old and new teams of renamed ones)."""
+    teams = set()
+    for item in change_set.added + change_set.changed + change_set.removed:
+        teams.add(item['team_id'])
+        teams.add(item.get('old_team_id'))
+    teams.discard(None)
+    return teams
+
+
+def apply_change_set(competition, change_set):
+    """
+    Update the standings of the competition's event after a sync.
+
+    Only the teams in the change set are re-aggregated; a truncated change set
+    (which does not name every changed team) rebuilds the whole event.
+
+    Args:
+        competition: Competition that was synced
+        change_set: LeaderboardChangeSet of the sync
+
+    Returns:
+        dict: Counts of created, updated and deleted standings
+    """
+    event_id = competition.event_id
+    if not event_id or not change_set.has_changes:
+        return {'created': 0, 'updated': 0, 'deleted': 0}
+
+    if change_set.truncated:
+        refresh_event_standings(event_id)
+        return {'rebuilt': True}
+
+    counts = update_team_standings(event_id, change_set_teams(change_set))
+
+    logger.info(
+        f"🏆 Standings of event {event_id} updated from {competition.title}: "
+        f"{counts['created']} new, {counts['updated']} updated, {counts['deleted']} removed"
+    )
+    return counts
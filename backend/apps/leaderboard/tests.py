@@ -1 +1,165 @@
 # Leaderboard app tests
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.competitions.kaggle_leaderboard_sync import KaggleLeaderboardSync
+from apps.competitions.leaderboard_parser import LeaderboardRow
+from apps.competitions.models import Competition, CompetitionEvent
+from .models import EventStanding, LeaderboardEntry, Team
+from .standings import (
+    apply_change_set, decode_standings_cursor, encode_standings_cursor, refresh_event_standings,
+    standings_page, standings_queryset,
+)
+
+STANDING_FIELDS = ('team_id', 'team_name', 'total_score', 'average_score', 'competitions_participated')
+
+
+def leaderboard_rows(teams):
+    """LeaderboardRow records for (team_id, team_name, score) tuples, ranked in order."""
+    date = datetime(2025, 10, 1, tzinfo=dt_timezone.utc)
+    return [
+        LeaderboardRow(rank, team_id, team_name, score, date, '')
+        for rank, (team_id, team_name, score) in enumerate(teams, 1)
+    ]
+
+
+def legacy_cursor(rank, total_score, team_name):
+    """Cursor in the format issued before the team ID was included."""
+    payload = json.dumps([rank, total_score, team_name]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+class StandingsCursorTests(TestCase):
+    """Encoding and decoding of standings cursors."""
+
+    def test_round_trip(self):
+        cursor = encode_standings_cursor(20, 187.5, 'team ü/+', 42)
+
+        self.assertEqual(decode_standings_cursor(cursor), (20, 187.5, 'team ü/+', 42))
+
+    def test_cursor_without_team_id_is_accepted(self):
+        self.assertEqual(decode_standings_cursor(legacy_cursor(3, 90, 'alpha')), (3, 90.0, 'alpha', None))
+
+    def test_malformed_cursors_are_rejected(self):
+        for cursor in ('', 'not base64!', legacy_cursor('3', 90, 'alpha'), 'eyJyYW5rIjoxfQ'):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_standings_cursor(cursor)
+
+
+class EventStandingsTests(TestCase):
+    """Materialized standings against the SQL aggregation, and paging through them."""
+
+    def setUp(self):
+        now = timezone.now()
+        self.event = CompetitionEvent.objects.create(
+            title='Event', slug='event', description='', start_date=now, end_date=now + timezone.timedelta(days=30)
+        )
+        self.syncer = KaggleLeaderboardSync()
+        self.first = self.competition('First')
+        self.second = self.competition('Second')
+        # Tied totals and two different teams called 'twins'
+        self.ingest(self.first, [
+            (1, 'alpha', 90), (2, 'twins', 80), (3, 'beta', 80), (4, 'gamma', 70), (5, 'twins', 70)
+        ])
+        self.ingest(self.second, [(11, 'beta', 90), (12, 'twins', 80), (13, 'alpha', 80), (14, 'delta', 60)])
+        refresh_event_standings(self.event.id)
+
+    def competition(self, title):
+        now = timezone.now()
+        competition = Competition.objects.create(
+            title=title, description='', kaggle_competition_id='', event=self.event,
+            start_date=now, end_date=now + timezone.timedelta(days=30)
+        )
+        # Set the slug with an update so that saving does not queue a sync
+        Competition.objects.filter(pk=competition.pk).update(kaggle_competition_id=title.lower())
+        competition.refresh_from_db()
+        return competition
+
+    def ingest(self, competition, teams):
+        self.syncer.ingest_leaderboard(leaderboard_rows(teams), competition)
+        return self.syncer.last_change_set
+
+    def materialized(self):
+        return EventStanding.objects.filter(event=self.event).order_by(
+            '-total_score', 'team_name', 'team_id'
+        ).values(*STANDING_FIELDS)
+
+    def aggregated(self):
+        return standings_queryset(self.event.id, competitions_count=2)
+
+    def snapshot(self, standings):
+        return [
+            tuple(round(value, 6) if isinstance(value, float) else value for value in map(row.get, STANDING_FIELDS))
+            for row in standings
+        ]
+
+    def walk(self, standings, limit):
+        rows, cursor = standings_page(standings, limit)
+        pages = [rows]
+        while cursor:
+            rows, cursor = standings_page(standings, limit, cursor)
+            pages.append(rows)
+        return pages
+
+    def test_sources_agree_after_refresh(self):
+        self.assertEqual(self.snapshot(self.materialized()), self.snapshot(self.aggregated()))
+        self.assertEqual(len(self.materialized()), 6)
+
+    def test_sources_agree_after_change_set(self):
+        change_set = self.ingest(self.second, [(14, 'delta', 95), (11, 'beta', 90), (15, 'epsilon', 50)])
+        apply_change_set(self.second, change_set)
+
+        self.assertEqual(self.snapshot(self.materialized()), self.snapshot(self.aggregated()))
+        self.assertIn('epsilon', [row['team_name'] for row in self.materialized()])
+
+    def test_pages_neither_repeat_nor_skip_teams(self):
+        for standings in (self.materialized(), self.aggregated()):
+            for limit in (1, 2, 4, 6):
+                with self.subTest(limit=limit):
+                    pages = self.walk(standings, limit)
+                    rows = [row for page in pages for row in page]
+
+                    self.assertEqual([row['team_id'] for row in rows], [row['team_id'] for row in standings])
+                    self.assertEqual([row['rank'] for row in rows], list(range(1, len(rows) + 1)))
+                    self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_legacy_cursor_continues_after_the_name(self):
+        standings = self.materialized()
+        rows = list(standings)
+        last = rows[1]
+
+        legacy = legacy_cursor(2, last['total_score'], last['team_name'])
+        page, _ = standings_page(standings, 10, legacy)
+
+        self.assertEqual(page[0]['rank'], 3)
+        self.assertTrue(all((row['total_score'], row['team_name']) != (last['total_score'], last['team_name'])
+                            for row in page))
+
+    def test_rename_in_one_competition_splits_a_shared_team(self):
+        alpha = EventStanding.objects.get(event=self.event, team_name='alpha').team_id
+        change_set = self.ingest(self.second, [
+            (11, 'beta', 90), (12, 'twins', 80), (13, 'alpha-renamed', 80), (14, 'delta', 60)
+        ])
+        apply_change_set(self.second, change_set)
+
+        self.assertEqual(Team.objects.get(pk=alpha).name, 'alpha')
+        self.assertEqual(LeaderboardEntry.objects.get(competition=self.first, kaggle_team_id=1).team_id, alpha)
+        renamed = LeaderboardEntry.objects.get(competition=self.second, kaggle_team_id=13)
+        self.assertNotEqual(renamed.team_id, alpha)
+        self.assertEqual(renamed.team.name, 'alpha-renamed')
+        self.assertEqual(self.snapshot(self.materialized()), self.snapshot(self.aggregated()))
+        self.assertIn('alpha', [row['team_name'] for row in self.materialized()])
+
+    def test_rename_in_the_only_competition_renames_the_team(self):
+        gamma = EventStanding.objects.get(event=self.event, team_name='gamma').team_id
+        change_set = self.ingest(self.first, [
+            (1, 'alpha', 90), (2, 'twins', 80), (3, 'beta', 80), (4, 'gamma-renamed', 70), (5, 'twins', 70)
+        ])
+        apply_change_set(self.first, change_set)
+
+        self.assertEqual(Team.objects.get(pk=gamma).name, 'gamma-renamed')
+        self.assertEqual(EventStanding.objects.get(event=self.event, team_id=gamma).team_name, 'gamma-renamed')
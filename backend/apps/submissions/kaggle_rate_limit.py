@@ -0,0 +1,272 @@
+"""
+Shared rate limiting for Kaggle API calls.
+
+Every Kaggle call made by KaggleService and the leaderboard fetchers takes a
+token from a token bucket kept in the Django cache (Redis in production), so
+all web and Celery processes share one budget per credential. When no
+credential has a token left the caller waits for the next one instead of
+failing; only after KAGGLE_API_MAX_WAIT seconds is KaggleRateLimitTimeout
+raised. Web requests wrap their calls in limit_kaggle_wait so they give up
+after KAGGLE_API_REQUEST_MAX_WAIT seconds instead of holding the request
+thread.
+
+Several credentials can be pooled with KAGGLE_CREDENTIAL_POOL
+("user1:key1,user2:key2"); each has its own bucket and calls go to whichever
+has a token. Without a pool the credential from KAGGLE_USERNAME/KAGGLE_KEY
+(or kaggle.json) is used.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bucket state lives this long after the last call (a full bucket needs no state)
+STATE_TIMEOUT = 24 * 60 * 60
+
+# How long to wait for another process to release a bucket's update lock
+LOCK_WAIT = 1.0
+
+# Seconds before trying a bucket again whose lock could not be taken
+LOCK_RETRY = 0.1
+
+# max_wait of acquire() calls in the current context, see limit_kaggle_wait
+_context_max_wait = ContextVar('kaggle_api_max_wait', default=None)
+
+
+class KaggleRateLimitTimeout(Exception):
+    """Raised when no Kaggle credential had a token within KAGGLE_API_MAX_WAIT seconds."""
+
+
+class KaggleCredential:
+    """
+    A Kaggle username/key pair.
+
+    A key of None stands for the default credential, which KaggleApi reads
+    from the environment or kaggle.json.
+    """
+
+    def __init__(self, username, key=None):
+        self.username = username
+        self.key = key
+
+    def __repr__(self):
+        return f"<KaggleCredential {self.username}>"
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all processes through the cache.
+
+    Holds up to capacity tokens and regains rate tokens per second; each API
+    call takes one. Updates are serialized with a short cache lock.
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.state_key = f"kaggle_rate:bucket:{name}"
+        self.lock_key = f"kaggle_rate:lock:{name}"
+
+    def _acquire_lock(self):
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(self.lock_key, True, timeout=5):
+            if time.monotonic() >= deadline:
+                # Busy or held by a crashed process (it expires on its own)
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _load(self, now):
+        state = cache.get(self.state_key) or {
+            'tokens': float(self.capacity),
+            'updated': now,
+            'calls': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+        }
+        # Refill for the time since the last update
+        elapsed = max(0.0, now - state['updated'])
+        state['tokens'] = min(float(self.capacity), state['tokens'] + elapsed * self.rate)
+        state['updated'] = now
+        return state
+
+    def _update(self, change, unlocked=None):
+        """
+        Apply change to the bucket state under the lock.
+
+        Fails closed: without the lock the state is left alone (an unlocked
+        read-modify-write could hand out tokens twice) and unlocked is
+        returned instead.
+        """
+        if not self._acquire_lock():
+            return unlocked
+        try:
+            state = self._load(time.time())
+            result = change(state)
+            cache.set(self.state_key, state, timeout=STATE_TIMEOUT)
+            return result
+        finally:
+            cache.delete(self.lock_key)
+
+    def take(self):
+        """
+        Try to take a token.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one may be
+            available (LOCK_RETRY when the bucket could not be locked)
+        """
+        def change(state):
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                state['calls'] += 1
+                return 0.0
+            return (1 - state['tokens']) / self.rate
+
+        return self._update(change, unlocked=LOCK_RETRY)
+
+    def record_wait(self, seconds):
+        """Count a call that had to wait for a token (skipped if the bucket is locked)."""
+        def change(state):
+            state['waits'] += 1
+            state['wait_seconds'] += seconds
+
+        self._update(change)
+
+    def status(self):
+        """Current bucket state, for monitoring."""
+        state = self._load(time.time())
+        return {
+            'credential': self.name,
+            'tokens': round(state['tokens'], 2),
+            'capacity': self.capacity,
+            'rate_per_minute': round(self.rate * 60, 2),
+            'calls': state['calls'],
+            'waits': state['waits'],
+            'wait_seconds': round(state['wait_seconds'], 1),
+        }
+
+
+class KaggleRateLimiter:
+    """
+    Hands out Kaggle credentials, one token at a time, across a credential pool.
+
+    Usage:
+        credential = get_kaggle_rate_limiter().acquire()
+        # make one Kaggle API call with credential
+    """
+
+    def __init__(self, credentials=None):
+        self.credentials = credentials or get_kaggle_credentials()
+        rate = getattr(settings, 'KAGGLE_API_RATE_PER_MINUTE', 30) / 60.0
+        capacity = getattr(settings, 'KAGGLE_API_BURST', 10)
+        self.buckets = [TokenBucket(credential.username, rate, capacity) for credential in self.credentials]
+
+    def acquire(self, max_wait=None):
+        """
+        Wait for a token on any credential of the pool.
+
+        Args:
+            max_wait: Seconds to wait at most, defaults to the limit_kaggle_wait
+                in effect, else KAGGLE_API_MAX_WAIT
+
+        Returns:
+            KaggleCredential: Credential to make the call with
+
+        Raises:
+            KaggleRateLimitTimeout: If no token became available in time
+        """
+        if max_wait is None:
+            max_wait = _context_max_wait.get()
+        if max_wait is None:
+            max_wait = getattr(settings, 'KAGGLE_API_MAX_WAIT', 300)
+        started = time.monotonic()
+
+        while True:
+            waits = []
+            for credential, bucket in zip(self.credentials, self.buckets):
+                wait = bucket.take()
+                if wait == 0:
+                    waited = time.monotonic() - started
+                    if waited > 0.05:
+                        bucket.record_wait(waited)
+                    return credential
+                waits.append(wait)
+
+            remaining = max_wait - (time.monotonic() - started)
+            if remaining <= 0:
+                raise KaggleRateLimitTimeout(
+                    f"No Kaggle API token available within {max_wait}s "
+                    f"({len(self.credentials)} credential(s))"
+                )
+
+            delay = min(min(waits), remaining)
+            logger.debug(f"Kaggle API rate limit reached, waiting {delay:.2f}s")
+            time.sleep(delay)
+
+    def status(self):
+        """State of every bucket in the pool, for monitoring."""
+        return {
+            'credentials': [bucket.status() for bucket in self.buckets],
+            'rate_per_minute': getattr(settings, 'KAGGLE_API_RATE_PER_MINUTE', 30),
+            'burst': getattr(settings, 'KAGGLE_API_BURST', 10),
+            'max_wait_seconds': getattr(settings, 'KAGGLE_API_MAX_WAIT', 300),
+            'request_max_wait_seconds': getattr(settings, 'KAGGLE_API_REQUEST_MAX_WAIT', 5),
+        }
+
+
+@contextmanager
+def limit_kaggle_wait(max_wait=None):
+    """
+    Cap how long Kaggle calls made inside the block wait for a rate limit token.
+
+    Usage:
+        with limit_kaggle_wait():
+            get_kaggle_service().search_competitions(...)
+
+    Args:
+        max_wait: Seconds, defaults to KAGGLE_API_REQUEST_MAX_WAIT
+    """
+    if max_wait is None:
+        max_wait = getattr(settings, 'KAGGLE_API_REQUEST_MAX_WAIT', 5)
+    token = _context_max_wait.set(max_wait)
+    try:
+        yield
+    finally:
+        _context_max_wait.reset(token)
+
+
+def get_kaggle_credentials():
+    """
+    Credentials from KAGGLE_CREDENTIAL_POOL, or the default credential.
+
+    Returns:
+        list: KaggleCredential objects
+    """
+    credentials = []
+    for item in getattr(settings, 'KAGGLE_CREDENTIAL_POOL', []):
+        username, _, key = item.strip().partition(':')
+        if username and key:
+            credentials.append(KaggleCredential(username, key))
+        else:
+            logger.warning("Ignoring malformed KAGGLE_CREDENTIAL_POOL entry, expected username:key")
+
+    if not credentials:
+        credentials.append(KaggleCredential(getattr(settings, 'KAGGLE_USERNAME', '') or 'default'))
+    return credentials
+
+
+# Singleton instance
+_kaggle_rate_limiter = None
+
+def get_kaggle_rate_limiter() -> KaggleRateLimiter:
+    """Get or create the Kaggle rate limiter for this process."""
+    global _kaggle_rate_limiter
+    if _kaggle_rate_limiter is None:
+        _kaggle_rate_limiter = KaggleRateLimiter()
+    return _kaggle_rate_limiter
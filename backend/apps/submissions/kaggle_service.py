@@ -3,31 +3,81 @@ Kaggle API Integration Service
 """
 import os
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Optional, Dict, List
-from kaggle.api.kaggle_api_extended import KaggleApi
 from django.conf import settings
+from .kaggle_rate_limit import KaggleRateLimitTimeout, get_kaggle_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# Serializes authentications that swap the process-wide KAGGLE_* environment
+_environment_lock = threading.Lock()
+
+
+@contextmanager
+def kaggle_environment(username, key):
+    """
+    Point the KAGGLE_USERNAME/KAGGLE_KEY environment at a credential for the
+    duration of the block, restoring the previous values afterwards.
+    """
+    names = {'KAGGLE_USERNAME': username, 'KAGGLE_KEY': key}
+    with _environment_lock:
+        saved = {name: os.environ.get(name) for name in names}
+        os.environ.update(names)
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def new_kaggle_api():
+    """
+    Create a KaggleApi client.
+    
+    The kaggle package authenticates as soon as it is imported, so it is only
+    imported once a real client is needed (not with the offline stand-in).
+    """
+    from kaggle.api.kaggle_api_extended import KaggleApi
+    return KaggleApi()
+
 
 class KaggleService:
     """
     Service class for interacting with Kaggle API.
+    
+    All API calls go through call(), which waits for the shared rate limiter
+    and uses whichever pooled credential it hands out.
+    
+    Args:
+        api: KaggleApi-like client to use instead of the real one, e.g. the
+            offline KaggleStandInApi; it is used for every pooled credential
+        rate_limited: Take a rate limit token for every call
     """
     
-    def __init__(self):
-        self.api = KaggleApi()
-        self._authenticated = False
+    def __init__(self, api=None, rate_limited=True):
+        self.api = api if api is not None else new_kaggle_api()
+        self._injected = api is not None
+        self._authenticated = self._injected
+        self._pool_apis = {}
+        self.rate_limited = rate_limited
+        self.rate_limiter = get_kaggle_rate_limiter()
         
     def authenticate(self):
         """Authenticate with Kaggle API."""
         try:
             # Set credentials from settings
             if settings.KAGGLE_USERNAME and settings.KAGGLE_KEY:
-                os.environ['KAGGLE_USERNAME'] = settings.KAGGLE_USERNAME
-                os.environ['KAGGLE_KEY'] = settings.KAGGLE_KEY
-            
-            self.api.authenticate()
+                with _environment_lock:
+                    os.environ['KAGGLE_USERNAME'] = settings.KAGGLE_USERNAME
+                    os.environ['KAGGLE_KEY'] = settings.KAGGLE_KEY
+                    self.api.authenticate()
+            else:
+                self.api.authenticate()
             self._authenticated = True
             logger.info("Successfully authenticated with Kaggle API")
             return True
@@ -35,6 +85,65 @@ class KaggleService:
             logger.error(f"Failed to authenticate with Kaggle API: {str(e)}")
             return False
     
+    def get_api(self) -> Optional['KaggleApi']:
+        """
+        Get the authenticated KaggleApi client, authenticating on first use.
+        
+        Returns:
+            KaggleApi instance or None if authentication failed
+        """
+        if not self._authenticated:
+            if not self.authenticate():
+                return None
+        return self.api
+    
+    def api_for(self, credential) -> Optional['KaggleApi']:
+        """
+        Get an authenticated KaggleApi client for a pooled credential.
+        
+        Args:
+            credential: KaggleCredential; one without a key (or None) is the default credential
+        """
+        if credential is None or credential.key is None or self._injected:
+            return self.get_api()
+        
+        api = self._pool_apis.get(credential.username)
+        if api is None:
+            api = new_kaggle_api()
+            try:
+                # authenticate() reads the credential from the environment once;
+                # the client keeps it after the environment is restored
+                with kaggle_environment(credential.username, credential.key):
+                    api.authenticate()
+            except Exception as e:
+                logger.error(f"Failed to authenticate pooled Kaggle credential {credential.username}: {e}")
+                return None
+            self._pool_apis[credential.username] = api
+        return api
+    
+    def call(self, method: str, *args, **kwargs):
+        """
+        Call a KaggleApi method once a rate limit token is available.
+        
+        Waits (rather than fails) while every pooled credential is out of
+        tokens; see kaggle_rate_limit.py.
+        
+        Args:
+            method: Name of the KaggleApi method, e.g. 'competition_view'
+        
+        Returns:
+            Whatever the KaggleApi method returns
+        
+        Raises:
+            KaggleRateLimitTimeout: If no token became available in time
+            RuntimeError: If the credential could not be authenticated
+        """
+        credential = self.rate_limiter.acquire() if self.rate_limited else None
+        api = self.api_for(credential)
+        if api is None:
+            raise RuntimeError("Kaggle API is not authenticated")
+        return getattr(api, method)(*args, **kwargs)
+    
     def get_competition_leaderboard(self, competition_id: str) -> Optional[List[Dict]]:
         """
         Fetch leaderboard data for a specific competition.
@@ -51,7 +160,7 @@ class KaggleService:
         
         try:
             # Fetch leaderboard from Kaggle
-            leaderboard = self.api.competition_leaderboard_view(competition_id)
+            leaderboard = self.call('competition_leaderboard_view', competition_id)
             
             # Parse leaderboard data
             entries = []
@@ -85,7 +194,7 @@ class KaggleService:
                 return None
         
         try:
-            submissions = self.api.competition_submissions(competition_id)
+            submissions = self.call('competition_submissions', competition_id)
             
             submission_list = []
             for sub in submissions:
@@ -122,7 +231,7 @@ class KaggleService:
         
         try:
             # Fetch leaderboard which contains submission information
-            leaderboard = self.api.competition_leaderboard_view(competition_id)
+            leaderboard = self.call('competition_leaderboard_view', competition_id)
             
             submission_list = []
             for entry in leaderboard:
@@ -150,6 +259,9 @@ class KaggleService:
             
         Returns:
             Competition details dict or None if failed
+        
+        Raises:
+            KaggleRateLimitTimeout: If no rate limit token became available in time
         """
         if not self._authenticated:
             if not self.authenticate():
@@ -158,7 +270,7 @@ class KaggleService:
         try:
             # First try to get competition directly by ID
             try:
-                comp = self.api.competition_view(competition_id)
+                comp = self.call('competition_view', competition_id)
                 return {
                     'id': comp.ref if hasattr(comp, 'ref') else competition_id,
                     'title': comp.title if hasattr(comp, 'title') else competition_id,
@@ -170,9 +282,11 @@ class KaggleService:
                     'teamCount': comp.teamCount if hasattr(comp, 'teamCount') else 0,
                     'userHasEntered': comp.userHasEntered if hasattr(comp, 'userHasEntered') else False,
                 }
+            except KaggleRateLimitTimeout:
+                raise
             except:
                 # If direct fetch fails, search for it
-                competitions = self.api.competitions_list(search=competition_id)
+                competitions = self.call('competitions_list', search=competition_id)
                 
                 # Try exact match first
                 for comp in competitions:
@@ -207,6 +321,8 @@ class KaggleService:
             logger.warning(f"Competition {competition_id} not found")
             return None
             
+        except KaggleRateLimitTimeout:
+            raise
         except Exception as e:
             logger.error(f"Failed to fetch competition details for {competition_id}: {str(e)}")
             return None
@@ -222,13 +338,16 @@ class KaggleService:
             
         Returns:
             List of competition dicts or None if failed
+        
+        Raises:
+            KaggleRateLimitTimeout: If no rate limit token became available in time
         """
         if not self._authenticated:
             if not self.authenticate():
                 return None
         
         try:
-            competitions = self.api.competitions_list(search=search_term, page=page)
+            competitions = self.call('competitions_list', search=search_term, page=page)
             
             results = []
             for comp in competitions[:page_size]:
@@ -253,6 +372,8 @@ class KaggleService:
             logger.info(f"Found {len(results)} competitions for search term: {search_term}")
             return results
             
+        except KaggleRateLimitTimeout:
+            raise
         except Exception as e:
             logger.error(f"Failed to search competitions: {str(e)}")
             return None
@@ -277,5 +398,11 @@ def get_kaggle_service() -> KaggleService:
     """Get or create Kaggle service instance."""
     global _kaggle_service
     if _kaggle_service is None:
-        _kaggle_service = KaggleService()
+        if getattr(settings, 'KAGGLE_STANDIN', False):
+            # Offline benchmarking and load tests, see kaggle_standin.py
+            from .kaggle_standin import KaggleStandInApi
+            logger.warning("Using the offline Kaggle stand-in instead of the Kaggle API")
+            _kaggle_service = KaggleService(api=KaggleStandInApi())
+        else:
+            _kaggle_service = KaggleService()
     return _kaggle_service
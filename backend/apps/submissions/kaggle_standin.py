@@ -0,0 +1,276 @@
+"""
+Offline stand-in for the Kaggle API, for benchmarking and load-testing syncs.
+
+KaggleStandInApi implements the KaggleApi methods the leaderboard sync uses:
+- competition_leaderboard_download: writes <slug>.zip with a Kaggle-style CSV
+- competition_leaderboard_view: the top page, as SDK-style objects
+- competition_view_leaderboard: pages as JSON dicts with nextPageToken, as
+  older Kaggle clients return them (so the paged fetcher can walk them)
+
+Leaderboards come from KAGGLE_LEADERBOARD_LOCAL_DIR (<slug>.csv or
+<slug>*.csv, e.g. all_leaderboard_data/) or are synthesized for slugs of the
+form synthetic-<teams> or synthetic-<teams>-<label>, e.g. synthetic-1000000.
+Synthetic rows are computed from their rank, so a million-team leaderboard is
+never held in memory.
+
+Latency, errors, partial responses and leaderboard churn between listings
+are configurable (KAGGLE_STANDIN_* settings or constructor arguments).
+
+Enable it for the whole process with KAGGLE_STANDIN=True, or inject it with
+KaggleService(api=KaggleStandInApi(...)); the kaggle CLI fetcher cannot use it.
+"""
+import csv
+import glob
+import hashlib
+import io
+import os
+import random
+import re
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+CSV_HEADER = ['Rank', 'TeamId', 'TeamName', 'LastSubmissionDate', 'Score', 'SubmissionCount', 'TeamMemberUserNames']
+
+SYNTHETIC_SLUG = re.compile(r'^synthetic-(\d+)(?:-[\w-]+)?$')
+
+# Synthetic submission dates fall in the 30 days after this
+SYNTHETIC_EPOCH = datetime(2025, 10, 1, tzinfo=dt_timezone.utc)
+
+
+class KaggleStandInError(Exception):
+    """Error raised by the stand-in where the Kaggle API would fail."""
+
+
+class StandInSubmission:
+    """Leaderboard entry shaped like the Kaggle SDK's ApiLeaderboardSubmission."""
+
+    def __init__(self, row):
+        self.team_id = row.team_id
+        self.team_name = row.team_name
+        self.submission_date = row.submission_date
+        self.score = repr(row.score)
+
+    def __repr__(self):
+        return f"<StandInSubmission {self.team_name} ({self.score})>"
+
+
+def unit_hash(*parts):
+    """Deterministic float in [0, 1) for the given parts."""
+    digest = hashlib.blake2b(':'.join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+class SyntheticLeaderboard:
+    """
+    Leaderboard of size teams computed from rank, seed and version.
+
+    Scores fall with rank. Each version, a churn fraction of teams gets a new
+    submission: a later date, one more submission and a score nudged within
+    the gap to its neighbours, so ranks stay put but rows change.
+    """
+
+    def __init__(self, size, seed=0, version=0, churn=0.0):
+        self.size = size
+        self.seed = seed
+        self.version = version
+        self.churn = churn
+
+    def __len__(self):
+        return self.size
+
+    def row(self, rank):
+        from apps.competitions.leaderboard_parser import LeaderboardRow
+
+        gap = 1.0 / (self.size + 1)
+        score = 1.0 - rank * gap
+        submissions = 1 + int(unit_hash(self.seed, rank, 'count') * 20)
+        offset = unit_hash(self.seed, rank, 'date') * 30 * 86400
+
+        # The last version this team submitted in
+        if self.churn:
+            for version in range(self.version, 0, -1):
+                if unit_hash(self.seed, rank, version) < self.churn:
+                    score += gap * 0.4 * unit_hash(self.seed, rank, version, 'score')
+                    submissions += version
+                    offset += version * 3600
+                    break
+
+        return LeaderboardRow(
+            rank=rank,
+            team_id=1_000_000 + rank,
+            team_name=f'team-{self.seed}-{rank}',
+            score=round(score, 12),
+            submission_date=SYNTHETIC_EPOCH + timedelta(seconds=int(offset)),
+            member_usernames=f'user-{self.seed}-{rank}',
+        ), submissions
+
+    def rows(self, start=0, stop=None):
+        """Yield (LeaderboardRow, submission count) for ranks start+1 to stop."""
+        stop = self.size if stop is None else min(stop, self.size)
+        for rank in range(start + 1, stop + 1):
+            yield self.row(rank)
+
+
+class FileLeaderboard:
+    """Leaderboard read from a local CSV export, held in memory."""
+
+    def __init__(self, path):
+        from apps.competitions.leaderboard_parser import iter_leaderboard_rows
+
+        with open(path, 'rb') as stream:
+            self.entries = [(row, 1) for row in iter_leaderboard_rows(stream)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def rows(self, start=0, stop=None):
+        return iter(self.entries[start:stop])
+
+
+class KaggleStandInApi:
+    """
+    KaggleApi-like client that serves leaderboards locally.
+
+    Args:
+        source_dir: Directory with leaderboard CSVs, defaults to KAGGLE_LEADERBOARD_LOCAL_DIR
+        latency: Seconds every call takes, plus up to the same again as jitter
+        error_rate: Fraction of calls that raise KaggleStandInError
+        partial_rate: Fraction of listings cut off early (downloads lose their
+            tail, paged listings end without a next page token)
+        churn: Fraction of synthetic teams that resubmit between listings
+        page_size: Entries per leaderboard view page
+        seed: Seed for synthetic leaderboards and the random failures
+    """
+
+    def __init__(self, source_dir=None, latency=None, error_rate=None, partial_rate=None,
+                 churn=None, page_size=None, seed=None):
+        def option(value, name, default):
+            return value if value is not None else getattr(settings, name, default)
+
+        self.source_dir = str(option(source_dir, 'KAGGLE_LEADERBOARD_LOCAL_DIR', ''))
+        self.latency = option(latency, 'KAGGLE_STANDIN_LATENCY', 0.0)
+        self.error_rate = option(error_rate, 'KAGGLE_STANDIN_ERROR_RATE', 0.0)
+        self.partial_rate = option(partial_rate, 'KAGGLE_STANDIN_PARTIAL_RATE', 0.0)
+        self.churn = option(churn, 'KAGGLE_STANDIN_CHURN', 0.0)
+        self.page_size = option(page_size, 'KAGGLE_STANDIN_PAGE_SIZE', 50)
+        self.seed = option(seed, 'KAGGLE_STANDIN_SEED', 0)
+        self.random = random.Random(self.seed)
+        self.versions = {}
+        self.calls = 0
+
+    def authenticate(self):
+        """Nothing to authenticate against."""
+
+    def simulate_call(self, competition):
+        """Apply latency and injected errors to one API call."""
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency * (1 + self.random.random()))
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise KaggleStandInError(f"503 Service Unavailable (stand-in) for {competition}")
+
+    def leaderboard(self, competition, new_listing=True):
+        """
+        Leaderboard of a competition; a new listing moves synthetic ones to their next version.
+
+        Raises:
+            KaggleStandInError: If there is no leaderboard for the competition
+        """
+        match = SYNTHETIC_SLUG.match(competition)
+        if match:
+            if new_listing:
+                self.versions[competition] = self.versions.get(competition, -1) + 1
+            version = self.versions.get(competition, 0)
+            return SyntheticLeaderboard(int(match.group(1)), self.seed, version, self.churn)
+
+        for pattern in (f'{competition}.csv', f'{competition}*.csv'):
+            matches = sorted(glob.glob(os.path.join(glob.escape(self.source_dir), pattern)))
+            if matches:
+                return FileLeaderboard(matches[0])
+
+        raise KaggleStandInError(f"404 Not Found (stand-in): no leaderboard for {competition}")
+
+    def listing_size(self, leaderboard):
+        """Rows to serve in this listing, fewer when a partial response is injected."""
+        size = len(leaderboard)
+        if self.partial_rate and self.random.random() < self.partial_rate:
+            size = int(size * (0.5 + self.random.random() * 0.4))
+            logger.info(f"Stand-in serving a partial leaderboard: {size} of {len(leaderboard)} rows")
+        return size
+
+    def competition_leaderboard_download(self, competition, path, quiet=True):
+        """Write the leaderboard as <path>/<competition>.zip, like the Kaggle API."""
+        self.simulate_call(competition)
+        leaderboard = self.leaderboard(competition)
+        size = self.listing_size(leaderboard)
+
+        os.makedirs(path, exist_ok=True)
+        zip_path = os.path.join(path, f'{competition}.zip')
+        member = f"{competition}-publicleaderboard-{datetime.now(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')}.csv"
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            with zf.open(member, 'w', force_zip64=True) as raw:
+                text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                writer = csv.writer(text)
+                writer.writerow(CSV_HEADER)
+                for row, submissions in leaderboard.rows(0, size):
+                    writer.writerow([
+                        row.rank,
+                        row.team_id if row.team_id is not None else '',
+                        row.team_name,
+                        row.submission_date.strftime('%Y-%m-%dT%H:%M:%S.%fZ') if row.submission_date else '',
+                        repr(row.score) if row.score is not None else '',
+                        submissions,
+                        row.member_usernames,
+                    ])
+                text.flush()
+                text.detach()
+        return zip_path
+
+    def competition_leaderboard_view(self, competition):
+        """Top page of the leaderboard as SDK-style submission objects (no page token)."""
+        self.simulate_call(competition)
+        leaderboard = self.leaderboard(competition)
+        return [StandInSubmission(row) for row, _ in leaderboard.rows(0, self.page_size)]
+
+    def competition_view_leaderboard(self, competition, page_token=None, **kwargs):
+        """
+        One page of the leaderboard as JSON, like older Kaggle clients.
+
+        Returns:
+            dict: submissions (teamId, teamName, submissionDate, score) and nextPageToken
+        """
+        self.simulate_call(competition)
+        start = int(page_token or 0)
+        leaderboard = self.leaderboard(competition, new_listing=not page_token)
+
+        stop = start + self.page_size
+        next_token = str(stop) if stop < len(leaderboard) else ''
+        if next_token and self.partial_rate and self.random.random() < self.partial_rate:
+            logger.info(f"Stand-in ending the leaderboard listing early at rank {stop}")
+            next_token = ''
+
+        return {
+            'submissions': [
+                {
+                    'teamId': row.team_id,
+                    'teamName': row.team_name,
+                    'submissionDate': row.submission_date.isoformat() if row.submission_date else None,
+                    'score': repr(row.score),
+                }
+                for row, _ in leaderboard.rows(start, stop)
+            ],
+            'nextPageToken': next_token,
+        }
+
+    def competitions_list(self, search=None, page=1, **kwargs):
+        """The stand-in has no competition catalogue."""
+        self.simulate_call(search or 'competitions_list')
+        return []
+
+    def competition_view(self, competition):
+        raise KaggleStandInError(f"404 Not Found (stand-in): competition details are not served for {competition}")
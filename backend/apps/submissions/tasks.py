@@ -1,14 +1,15 @@
 from celery import shared_task
 from django.db import transaction
-from django.contrib.auth import get_user_model
 from .kaggle_service import get_kaggle_service
 from .models import Submission
 from apps.competitions.models import Competition
 from apps.leaderboard.models import LeaderboardEntry
+from apps.leaderboard.standings import schedule_standings_update
+from apps.utils.cache import CacheHelper
+from apps.users.kaggle_matching import KaggleUserIndex
 import logging
 
 logger = logging.getLogger(__name__)
-User = get_user_model()
 
 
 @shared_task
@@ -36,21 +37,21 @@ def fetch_kaggle_leaderboard(competition_id: int):
             logger.warning(f"No leaderboard data for {competition.title}")
             return
         
+        # Resolve all Kaggle team names to platform users with one lookup
+        user_index = KaggleUserIndex.for_names(
+            entry_data['team_name'] for entry_data in leaderboard_data
+        )
+        
         # Update leaderboard entries
         updated_count = 0
         with transaction.atomic():
             for entry_data in leaderboard_data:
                 # Try to match Kaggle team name with platform username
                 # First try exact match, then try Kaggle username field
-                user = None
-                try:
-                    user = User.objects.get(username=entry_data['team_name'])
-                except User.DoesNotExist:
-                    try:
-                        user = User.objects.get(kaggle_username=entry_data['team_name'])
-                    except User.DoesNotExist:
-                        logger.debug(f"No user found for Kaggle team: {entry_data['team_name']}")
-                        continue
+                user = user_index.get(entry_data['team_name'])
+                if not user:
+                    logger.debug(f"No user found for Kaggle team: {entry_data['team_name']}")
+                    continue
                 
                 # Update or create leaderboard entry
                 entry, created = LeaderboardEntry.objects.update_or_create(
@@ -77,6 +78,12 @@ def fetch_kaggle_leaderboard(competition_id: int):
                 )
                 
                 updated_count += 1
+            
+            # Written outside the leaderboard sync, so no post-sync hook updates the standings
+            if updated_count:
+                schedule_standings_update(competition.event_id)
+                # Bump once the entries are visible, or a reader could cache the old ones under the new version
+                transaction.on_commit(lambda: CacheHelper.bump_competition_version(competition.id))
         
         logger.info(f"Updated {updated_count} leaderboard entries for {competition.title}")
         
@@ -0,0 +1,79 @@
+"""
+Matching of Kaggle team and member names to platform users.
+Used by the leaderboard sync tasks to link Kaggle rows to registered users.
+"""
+from django.db.models import Q
+from .models import User
+
+# Names per username__in/kaggle_username__in lookup, keeps each query well
+# below SQLite's bound-parameter limit
+NAME_CHUNK_SIZE = 450
+
+
+def split_member_usernames(value):
+    """Split Kaggle's comma-separated TeamMemberUserNames value into names."""
+    if not value or not isinstance(value, str):
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class KaggleUserIndex:
+    """
+    In-memory index of the users matching a set of Kaggle names.
+
+    Built up front from every candidate name in a leaderboard, so matching
+    a row afterwards is a dict lookup with no further database round-trips.
+
+    Usage:
+        index = KaggleUserIndex.for_names(all_names)
+        user = index.match(*member_usernames, team_name)
+    """
+
+    def __init__(self, users=()):
+        self.by_username = {}
+        self.by_kaggle_username = {}
+        for user in users:
+            self.by_username[user.username] = user
+            if user.kaggle_username:
+                self.by_kaggle_username.setdefault(user.kaggle_username, user)
+
+    @classmethod
+    def for_names(cls, names):
+        """
+        Build an index for the given candidate names.
+
+        Args:
+            names: Iterable of team names and member usernames
+
+        Returns:
+            KaggleUserIndex: Index of users whose username or kaggle_username
+            is one of the names
+        """
+        candidates = sorted({str(name).strip() for name in names if name} - {''})
+        users = []
+        for start in range(0, len(candidates), NAME_CHUNK_SIZE):
+            chunk = candidates[start:start + NAME_CHUNK_SIZE]
+            users.extend(
+                User.objects.filter(
+                    Q(username__in=chunk) | Q(kaggle_username__in=chunk)
+                ).only('id', 'username', 'kaggle_username')
+            )
+        return cls(users)
+
+    def __len__(self):
+        return len(self.by_username)
+
+    def get(self, name):
+        """Find a user by platform username, then by Kaggle username."""
+        if not name:
+            return None
+        name = str(name).strip()
+        return self.by_username.get(name) or self.by_kaggle_username.get(name)
+
+    def match(self, *names):
+        """Return the user for the first of names that matches, or None."""
+        for name in names:
+            user = self.get(name)
+            if user:
+                return user
+        return None
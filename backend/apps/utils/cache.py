@@ -74,6 +74,53 @@ def invalidate_pattern(pattern):
         cache.delete_pattern(pattern)
 
 
+def cache_version_key(namespace, identifier):
+    """Cache key holding the current data version of one object, e.g. a competition."""
+    return f"version:{namespace}:{identifier}"
+
+
+def get_cache_version(namespace, identifier):
+    """
+    Get the current data version of an object (1 until it is first bumped).
+    
+    Usage:
+        version = get_cache_version('event', 5)
+    """
+    return cache.get(cache_version_key(namespace, identifier), 1)
+
+
+def bump_cache_version(namespace, identifier):
+    """
+    Move an object to a new data version, orphaning every key built for the old one.
+    Version keys never expire, so a version is never reused.
+    
+    Usage:
+        bump_cache_version('event', 5)
+    
+    Returns:
+        int: The new version
+    """
+    key = cache_version_key(namespace, identifier)
+    # First bump: start above the implicit version 1
+    if cache.add(key, 2, timeout=None):
+        return 2
+    return cache.incr(key)
+
+
+def versioned_cache_key(namespace, identifier, *parts, version=None):
+    """
+    Build a cache key tied to the current data version of an object
+    (or to the given version, e.g. one read before a slow computation).
+    
+    Usage:
+        key = versioned_cache_key('event', 5, 'overall_leaderboard')
+    """
+    if version is None:
+        version = get_cache_version(namespace, identifier)
+    suffix = ':'.join(str(part) for part in parts)
+    return f"{namespace}:{identifier}:v{version}:{suffix}"
+
+
 # Cache timeouts (in seconds)
 CACHE_TIMEOUTS = {
     'leaderboard': 300,  # 5 minutes
@@ -135,6 +182,16 @@ class CacheHelper:
         for key in keys:
             cache.delete(key)
     
+    @staticmethod
+    def bump_competition_version(competition_id):
+        """Move a competition's cached data (e.g. its leaderboard) to a new version."""
+        return bump_cache_version('competition', competition_id)
+    
+    @staticmethod
+    def bump_event_version(event_id):
+        """Move an event's cached data (e.g. overall standings) to a new version."""
+        return bump_cache_version('event', event_id)
+    
     @staticmethod
     def invalidate_event_cache(event_slug):
         """Invalidate all cache related to an event."""
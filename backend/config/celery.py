@@ -18,9 +18,9 @@ app.autodiscover_tasks()
 
 # Celery Beat Schedule
 app.conf.beat_schedule = {
-    'sync-kaggle-leaderboard-auto': {
-        'task': 'apps.competitions.tasks.sync_kaggle_leaderboard_auto',
-        'schedule': 300.0,  # Every 5 minutes - Fetch, CSV, Update DB, Delete CSV
+    'dispatch-due-leaderboard-syncs': {
+        'task': 'apps.competitions.tasks.dispatch_due_leaderboard_syncs',
+        'schedule': 60.0,  # Every minute - syncs only competitions whose next_sync_at has passed
     },
     'update-competition-status': {
         'task': 'apps.competitions.tasks.update_competition_statuses',
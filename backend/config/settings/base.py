@@ -179,6 +179,93 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 KAGGLE_USERNAME = config('KAGGLE_USERNAME', default='')
 KAGGLE_KEY = config('KAGGLE_KEY', default='')
 
+# Shared Kaggle API rate limit (token bucket per credential, kept in the cache)
+KAGGLE_API_RATE_PER_MINUTE = config('KAGGLE_API_RATE_PER_MINUTE', default=30, cast=float)
+KAGGLE_API_BURST = config('KAGGLE_API_BURST', default=10, cast=int)
+# Calls wait up to this many seconds for a token before failing
+KAGGLE_API_MAX_WAIT = config('KAGGLE_API_MAX_WAIT', default=300, cast=int)
+# Shorter wait for calls made while serving a web request (answered with 429 after it)
+KAGGLE_API_REQUEST_MAX_WAIT = config('KAGGLE_API_REQUEST_MAX_WAIT', default=5, cast=int)
+# Optional extra credentials to spread calls over: "user1:key1,user2:key2"
+KAGGLE_CREDENTIAL_POOL = [c for c in config('KAGGLE_CREDENTIAL_POOL', default='').split(',') if c]
+
+# Parse downloaded leaderboards straight from the ZIP instead of extracting a temp CSV
+KAGGLE_SYNC_IN_MEMORY = config('KAGGLE_SYNC_IN_MEMORY', default=True, cast=bool)
+
+# Leaderboard CSV parser: 'csv' (stdlib, default) or 'pandas' (needs the optional pandas package)
+KAGGLE_SYNC_PARSER = config('KAGGLE_SYNC_PARSER', default='csv')
+
+# How leaderboards are downloaded: 'api' (in-process KaggleApi), 'cli' (kaggle CLI
+# subprocess), 'paged' (Kaggle API leaderboard view, page by page) or 'local'
+# (files in KAGGLE_LEADERBOARD_LOCAL_DIR, for offline runs)
+KAGGLE_LEADERBOARD_FETCHER = config('KAGGLE_LEADERBOARD_FETCHER', default='api')
+KAGGLE_LEADERBOARD_LOCAL_DIR = config(
+    'KAGGLE_LEADERBOARD_LOCAL_DIR', default=str(BASE_DIR / 'all_leaderboard_data')
+)
+
+# Paged fetcher: only sync the top N rows (0 = all) and stop at the first unchanged page
+KAGGLE_PAGED_TOP_N = config('KAGGLE_PAGED_TOP_N', default=0, cast=int)
+KAGGLE_PAGED_STOP_ON_UNCHANGED = config('KAGGLE_PAGED_STOP_ON_UNCHANGED', default=True, cast=bool)
+
+# Offline Kaggle stand-in (apps/submissions/kaggle_standin.py) for benchmarks and load
+# tests: serves KAGGLE_LEADERBOARD_LOCAL_DIR CSVs and synthetic-<teams> leaderboards
+KAGGLE_STANDIN = config('KAGGLE_STANDIN', default=False, cast=bool)
+KAGGLE_STANDIN_LATENCY = config('KAGGLE_STANDIN_LATENCY', default=0.0, cast=float)
+KAGGLE_STANDIN_ERROR_RATE = config('KAGGLE_STANDIN_ERROR_RATE', default=0.0, cast=float)
+KAGGLE_STANDIN_PARTIAL_RATE = config('KAGGLE_STANDIN_PARTIAL_RATE', default=0.0, cast=float)
+KAGGLE_STANDIN_CHURN = config('KAGGLE_STANDIN_CHURN', default=0.0, cast=float)
+KAGGLE_STANDIN_PAGE_SIZE = config('KAGGLE_STANDIN_PAGE_SIZE', default=50, cast=int)
+KAGGLE_STANDIN_SEED = config('KAGGLE_STANDIN_SEED', default=0, cast=int)
+
+# Maximum number of competitions synced in parallel per sync cycle
+KAGGLE_SYNC_MAX_PARALLEL = config('KAGGLE_SYNC_MAX_PARALLEL', default=4, cast=int)
+
+# Pipelined multi-competition sync: parallel downloads, and how many finished
+# downloads may wait for the database writer
+KAGGLE_SYNC_DOWNLOAD_WORKERS = config('KAGGLE_SYNC_DOWNLOAD_WORKERS', default=2, cast=int)
+KAGGLE_SYNC_QUEUE_SIZE = config('KAGGLE_SYNC_QUEUE_SIZE', default=2, cast=int)
+
+# Leaderboard CSVs of at least this many bytes are ingested in chunks of
+# KAGGLE_SYNC_CHUNK_ROWS rows, keeping worker memory bounded for huge competitions
+KAGGLE_SYNC_STREAMING_MIN_BYTES = config('KAGGLE_SYNC_STREAMING_MIN_BYTES', default=50 * 1024 * 1024, cast=int)
+KAGGLE_SYNC_CHUNK_ROWS = config('KAGGLE_SYNC_CHUNK_ROWS', default=50000, cast=int)
+
+# Adaptive per-competition sync intervals (seconds), see Competition.next_sync_interval
+KAGGLE_SYNC_MIN_INTERVAL = config('KAGGLE_SYNC_MIN_INTERVAL', default=60, cast=int)
+KAGGLE_SYNC_MAX_INTERVAL = config('KAGGLE_SYNC_MAX_INTERVAL', default=3600, cast=int)
+# Competitions this close to their end_date are synced at the minimum interval
+KAGGLE_SYNC_DEADLINE_WINDOW_HOURS = config('KAGGLE_SYNC_DEADLINE_WINDOW_HOURS', default=24, cast=int)
+
+# Saves of a competition within this many seconds are coalesced into one sync
+KAGGLE_SYNC_DEBOUNCE_SECONDS = config('KAGGLE_SYNC_DEBOUNCE_SECONDS', default=30, cast=int)
+# Expiry of the per-competition queued/running sync locks, in case a worker dies mid-sync
+KAGGLE_SYNC_LOCK_TIMEOUT = config('KAGGLE_SYNC_LOCK_TIMEOUT', default=900, cast=int)
+
+# Failing syncs back off exponentially (base doubling up to max seconds); after
+# KAGGLE_SYNC_BREAKER_THRESHOLD consecutive failures the circuit breaker opens
+# and only one probe sync runs per KAGGLE_SYNC_BREAKER_COOLDOWN seconds
+KAGGLE_SYNC_BACKOFF_BASE = config('KAGGLE_SYNC_BACKOFF_BASE', default=60, cast=int)
+KAGGLE_SYNC_BACKOFF_MAX = config('KAGGLE_SYNC_BACKOFF_MAX', default=3600, cast=int)
+KAGGLE_SYNC_BREAKER_THRESHOLD = config('KAGGLE_SYNC_BREAKER_THRESHOLD', default=5, cast=int)
+KAGGLE_SYNC_BREAKER_COOLDOWN = config('KAGGLE_SYNC_BREAKER_COOLDOWN', default=6 * 3600, cast=int)
+
+# Where the overall event leaderboard reads team totals from: 'materialized'
+# (the EventStanding table kept up to date by syncs) or 'database' (aggregated
+# from the leaderboard entries in SQL on every request)
+EVENT_STANDINGS_SOURCE = config('EVENT_STANDINGS_SOURCE', default='materialized')
+# Teams per overall leaderboard page (?limit= may ask for up to the maximum)
+EVENT_STANDINGS_PAGE_SIZE = config('EVENT_STANDINGS_PAGE_SIZE', default=100, cast=int)
+EVENT_STANDINGS_MAX_PAGE_SIZE = config('EVENT_STANDINGS_MAX_PAGE_SIZE', default=1000, cast=int)
+# Cached overall leaderboard pages live this long per event version; after a
+# version bump the previous page is served while one background task
+# (holding its lock at most EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT) recomputes it
+EVENT_STANDINGS_CACHE_TIMEOUT = config('EVENT_STANDINGS_CACHE_TIMEOUT', default=3600, cast=int)
+EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT = config('EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT', default=120, cast=int)
+# Connect timeout (seconds) for queueing a page refresh; publishing runs on a
+# background thread, and a page whose refresh could not be queued is retried
+# after EVENT_STANDINGS_REFRESH_LOCK_TIMEOUT rather than recomputed in-process
+EVENT_STANDINGS_REFRESH_PUBLISH_TIMEOUT = config('EVENT_STANDINGS_REFRESH_PUBLISH_TIMEOUT', default=2, cast=float)
+
 # Cache Configuration
 CACHES = {
     'default': {
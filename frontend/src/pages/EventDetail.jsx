@@ -30,6 +30,8 @@ const EventDetail = () => {
   });
   const [overallLeaderboard, setOverallLeaderboard] = useState([]);
   const [leaderboardLoading, setLeaderboardLoading] = useState(false);
+  const [leaderboardCursor, setLeaderboardCursor] = useState(null);
+  const [loadingMoreStandings, setLoadingMoreStandings] = useState(false);
 
   const fetchEventDetails = useCallback(async () => {
     try {
@@ -61,14 +63,31 @@ const EventDetail = () => {
       setLeaderboardLoading(true);
       const response = await competitionEventsAPI.getOverallLeaderboard(slug);
       setOverallLeaderboard(response.data.entries || []);
+      setLeaderboardCursor(response.data.next_cursor || null);
     } catch (err) {
       console.error('Error fetching overall leaderboard:', err);
       setOverallLeaderboard([]);
+      setLeaderboardCursor(null);
     } finally {
       setLeaderboardLoading(false);
     }
   }, [slug]);
 
+  const loadMoreStandings = useCallback(async () => {
+    if (!slug || !leaderboardCursor) return;
+    
+    try {
+      setLoadingMoreStandings(true);
+      const response = await competitionEventsAPI.getOverallLeaderboard(slug, { cursor: leaderboardCursor });
+      setOverallLeaderboard((entries) => [...entries, ...(response.data.entries || [])]);
+      setLeaderboardCursor(response.data.next_cursor || null);
+    } catch (err) {
+      console.error('Error fetching more standings:', err);
+    } finally {
+      setLoadingMoreStandings(false);
+    }
+  }, [slug, leaderboardCursor]);
+
   useEffect(() => {
     fetchEventDetails();
     fetchOverallLeaderboard();
@@ -336,6 +355,15 @@ const EventDetail = () => {
                     ))}
                   </tbody>
                 </table>
+                {leaderboardCursor && (
+                  <button
+                    className="btn btn-secondary"
+                    onClick={loadMoreStandings}
+                    disabled={loadingMoreStandings}
+                  >
+                    {loadingMoreStandings ? 'Loading...' : 'Load more teams'}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -104,8 +104,8 @@ export const competitionEventsAPI = {
   getCompetitions: (slug) =>
     api.get(`/competitions/events/${slug}/competitions/`),
   
-  getOverallLeaderboard: (slug) =>
-    api.get(`/competitions/events/${slug}/overall_leaderboard/`),
+  getOverallLeaderboard: (slug, params) =>
+    api.get(`/competitions/events/${slug}/overall_leaderboard/`, { params }),
   
   create: (data) =>
     api.post('/competitions/events/', data),